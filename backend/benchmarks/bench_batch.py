@@ -0,0 +1,70 @@
+"""
+Benchmark batch recommendations against one ranking call per attribute profile.
+
+Profiles look like merchandising saved searches: a category plus a few of size,
+budget and attribute values. Throughput is reported in profiles per second.
+
+    python -m benchmarks.bench_batch --sizes 1000 100000 --profiles 2000
+"""
+
+import argparse
+import logging
+import time
+import numpy as np
+from services.attribute_values import AttributeValues
+from services.catalog_index import CatalogIndex
+from services.product_recommender import ProductRecommender
+from benchmarks.synthetic_catalog import ATTRIBUTE_COLUMNS, generate_catalog
+
+
+def generate_profiles(count: int, seed: int = 0) -> list:
+    """Random saved-search style attribute profiles"""
+    rng = np.random.default_rng(seed)
+    profiles = []
+    for _ in range(count):
+        profile = {'category': str(rng.choice(AttributeValues.CATEGORIES))}
+        if rng.random() < 0.6:
+            profile['size'] = str(rng.choice(AttributeValues.SIZES))
+        if rng.random() < 0.5:
+            profile['price_max'] = int(rng.choice([50, 100, 150, 200]))
+        for column in rng.choice(list(ATTRIBUTE_COLUMNS), int(rng.integers(1, 3)), replace=False):
+            values = ATTRIBUTE_COLUMNS[column]
+            if rng.random() < 0.3:
+                profile[column] = [str(v) for v in rng.choice(values, 2, replace=False)]
+            else:
+                profile[column] = str(rng.choice(values))
+        profiles.append(profile)
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--profiles', type=int, default=2000)
+    parser.add_argument('--top-k', type=int, default=3)
+    args = parser.parse_args()
+    # Per-call INFO logging is part of the single path's cost in production, but it would
+    # swamp the output here
+    logging.disable(logging.INFO)
+
+    profiles = generate_profiles(args.profiles)
+    print(f"{'catalog':>10} {'profiles':>9} {'batch/s':>10} {'single/s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        products_df = generate_catalog(size)
+        recommender = ProductRecommender(products_df, CatalogIndex(products_df), cache_size=0)
+
+        start = time.perf_counter()
+        batch = list(recommender.rank_batch(profiles, args.top_k))
+        batch_rate = len(profiles) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        single = [recommender.rank(profile, args.top_k) for profile in profiles]
+        single_rate = len(profiles) / (time.perf_counter() - start)
+
+        same = all(np.array_equal(b.positions, s.positions[:args.top_k]) for b, s in zip(batch, single))
+        print(f"{size:>10} {len(profiles):>9} {batch_rate:>10.0f} {single_rate:>10.0f} "
+              f"{batch_rate / single_rate:>7.1f}x{'' if same else '  MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark ProductFilter scoring as the catalog grows.
+
+Scoring runs over a fixed number of candidate rows at every catalog size, so its
+per-request cost should stay flat; the pandas scorer it replaced copied and sorted
+the whole candidate frame.
+
+    python -m benchmarks.bench_scoring --sizes 1000 100000 1000000
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from services.catalog_index import CatalogIndex
+from services.product_filter import ProductFilter
+from benchmarks.synthetic_catalog import generate_catalog
+
+ATTRIBUTES = {
+    'category': 'dress',
+    'fit': 'Relaxed',
+    'fabric': ['Linen', 'Cotton'],
+    'color_or_print': 'Sage green',
+    'occasion': 'Party',
+    'price_max': 150
+}
+
+
+def pandas_score(products_df: pd.DataFrame, attributes: dict) -> pd.DataFrame:
+    """The DataFrame scorer ProductFilter used before, kept for comparison"""
+    scored = products_df.copy()
+    scored['score'] = 0
+    for attr, value in attributes.items():
+        if attr in scored.columns:
+            if isinstance(value, list):
+                scored['score'] += scored[attr].isin(value).astype(int)
+            else:
+                scored['score'] += (scored[attr] == value).astype(int)
+    return scored.sort_values('score', ascending=False)
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time of fn in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--candidates', type=int, default=1000, help="candidate rows scored per request")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'catalog':>10} {'candidates':>10} {'numpy ms':>10} {'pandas ms':>10} {'filter ms':>10}")
+    for size in args.sizes:
+        products_df = generate_catalog(size)
+        index = CatalogIndex(products_df)
+        positions = np.sort(np.random.default_rng(1).choice(size, min(args.candidates, size), replace=False))
+        candidates = products_df.iloc[positions]
+
+        numpy_ms = time_call(
+            lambda: ProductFilter._top_k(ProductFilter._score_products(index, positions, ATTRIBUTES)[0], args.top_k),
+            args.repeat
+        )
+        pandas_ms = time_call(lambda: pandas_score(candidates, ATTRIBUTES).head(args.top_k), args.repeat)
+        filter_ms = time_call(
+            lambda: ProductFilter.filter_products(products_df, ATTRIBUTES, args.top_k, index=index),
+            args.repeat
+        )
+        print(f"{size:>10} {len(positions):>10} {numpy_ms:>10.3f} {pandas_ms:>10.3f} {filter_ms:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Multi-turn conversation scripts replayed by the load test.
+
+Each script is the sequence of user messages of one chat session; the mix covers
+greetings, vague requests that need followups, fully specified requests that the
+local extractor can answer, and refinements of an earlier recommendation.
+"""
+
+from typing import List
+
+CONVERSATIONS: List[List[str]] = [
+    # Vague vibe, refined over followups
+    [
+        "hi there!",
+        "I need something cute for a summer brunch",
+        "a dress please, size M",
+        "under $120 and in linen if possible",
+    ],
+    # Fully specified up front
+    [
+        "Show me a relaxed fit cotton top in size S under $60",
+        "do you have it in something sleeveless?",
+    ],
+    # Party outfit with a budget
+    [
+        "I have a party this weekend",
+        "looking for a skirt",
+        "size L, budget is 150",
+    ],
+    # Workwear
+    [
+        "what should I wear to the office?",
+        "tailored pants in size XS",
+        "black or navy would be great",
+        "anything under $90?",
+    ],
+    # Small talk only
+    [
+        "hello!",
+        "what are the trends this season?",
+        "thanks, that's helpful",
+    ],
+    # Vacation
+    [
+        "going on a beach vacation, need some outfits",
+        "dresses in size S",
+        "flowy, floral print, under 100",
+    ],
+]
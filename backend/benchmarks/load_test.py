@@ -0,0 +1,169 @@
+"""
+End-to-end load test for /api/chat.
+
+Drives the FastAPI app in-process over an ASGI transport with the mock LLM backend,
+replaying the multi-turn scripts in benchmarks.conversations from concurrent virtual
+users against a synthetic catalog. Reports latency percentiles, requests/sec and a
+per-stage breakdown taken from the Server-Timing header.
+
+    python -m benchmarks.load_test --rows 100k --users 20 --conversations 10
+    python -m benchmarks.load_test --rows 1k --json results.json
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+import numpy as np
+from benchmarks.conversations import CONVERSATIONS
+from benchmarks.synthetic_catalog import parse_rows, write_catalog
+
+# Stages in the order a request passes through them
+STAGES = ['session', 'extract', 'llm', 'filter', 'format', 'persist', 'serialize']
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse a Server-Timing header into stage name -> milliseconds"""
+    stages = {}
+    for entry in filter(None, (part.strip() for part in header.split(','))):
+        name, _, params = entry.partition(';')
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                stages[name.strip()] = float(value)
+    return stages
+
+
+async def run_user(client, user: int, conversations: int, results: List[Dict]):
+    """Replay conversation scripts one after another as a single virtual user"""
+    for n in range(conversations):
+        script = CONVERSATIONS[(user + n) % len(CONVERSATIONS)]
+        session_id = None
+        last_message_id = None
+        for message in script:
+            payload = {"message": message, "session_id": session_id, "last_message_id": last_message_id}
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json=payload)
+            elapsed = (time.perf_counter() - start) * 1000
+            result = {"status": response.status_code, "ms": elapsed,
+                      "stages": parse_server_timing(response.headers.get("server-timing", ""))}
+            if response.status_code == 200:
+                body = response.json()
+                session_id = body["session_id"]
+                last_message_id = body["last_message_id"]
+                result["type"] = body.get("type")
+            results.append(result)
+
+
+async def run_load(app_module, users: int, conversations: int) -> Dict:
+    """Run all virtual users against the app and summarize the results"""
+    import httpx
+
+    results: List[Dict] = []
+    async with app_module.lifespan(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(run_user(client, user, conversations, results) for user in range(users)))
+            duration = time.perf_counter() - start
+    return summarize(results, duration)
+
+
+def summarize(results: List[Dict], duration: float) -> Dict:
+    """Latency percentiles, throughput and per-stage timings"""
+    latencies = np.array([r["ms"] for r in results])
+    summary = {
+        "requests": len(results),
+        "errors": sum(r["status"] != 200 for r in results),
+        "duration_s": round(duration, 3),
+        "rps": round(len(results) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2),
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+        },
+        "response_types": {},
+        "stages": {}
+    }
+    for r in results:
+        if r.get("type"):
+            summary["response_types"][r["type"]] = summary["response_types"].get(r["type"], 0) + 1
+
+    names = STAGES + sorted({name for r in results for name in r["stages"]} - set(STAGES))
+    for name in names:
+        # Requests that skipped a stage count as zero, so stage means add up to the request mean
+        timings = np.array([r["stages"].get(name, 0.0) for r in results])
+        hits = sum(name in r["stages"] for r in results)
+        if hits:
+            summary["stages"][name] = {
+                "requests": hits,
+                "mean_ms": round(float(timings.mean()), 3),
+                "p95_ms": round(float(np.percentile(timings, 95)), 3),
+            }
+    return summary
+
+
+def print_summary(summary: Dict, rows: int):
+    """Print a summary in human readable form"""
+    latency = summary["latency_ms"]
+    print(f"catalog rows:   {rows}")
+    print(f"requests:       {summary['requests']} ({summary['errors']} errors) in {summary['duration_s']}s")
+    print(f"throughput:     {summary['rps']} req/s")
+    print(f"latency ms:     mean {latency['mean']}  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}")
+    print(f"response types: {summary['response_types']}")
+    print(f"{'stage':>10} {'requests':>9} {'mean ms':>9} {'p95 ms':>9}")
+    for name, stage in summary["stages"].items():
+        print(f"{name:>10} {stage['requests']:>9} {stage['mean_ms']:>9.3f} {stage['p95_ms']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=parse_rows, default=1000, help="synthetic catalog rows, e.g. 1k, 100k, 1M")
+    parser.add_argument('--catalog', help="existing catalog CSV to use instead of a synthetic one")
+    parser.add_argument('--users', type=int, default=10, help="concurrent virtual users")
+    parser.add_argument('--conversations', type=int, default=5, help="conversation scripts replayed per user")
+    parser.add_argument('--llm-latency-ms', type=float, default=50, help="median mock model latency")
+    parser.add_argument('--llm-cache', action='store_true', help="keep the LLM response cache enabled")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the summary to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        catalog = args.catalog
+        rows = args.rows
+        if catalog is None:
+            catalog = os.path.join(workdir, "catalog.csv")
+            write_catalog(catalog, args.rows, args.seed)
+
+        # main reads its configuration at import time
+        os.environ.update({
+            "CATALOG_PATH": catalog,
+            "LLM_BACKEND": "mock",
+            "LLM_MOCK_LATENCY_MS": str(args.llm_latency_ms),
+            "LLM_MOCK_SEED": str(args.seed),
+            "STAGE_TIMING": "1",
+            "SESSION_STORE_PATH": os.path.join(workdir, "sessions.log"),
+            "RECOMMENDATION_WARMUP": "0",
+        })
+        if not args.llm_cache:
+            os.environ["LLM_CACHE_SIZE"] = "0"
+        app_module = importlib.import_module("main")
+        if args.catalog is not None:
+            rows = len(app_module.products_df)
+
+        summary = asyncio.run(run_load(app_module, args.users, args.conversations))
+        summary.update({"catalog_rows": rows, "users": args.users, "llm_latency_ms": args.llm_latency_ms})
+
+    print_summary(summary, rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
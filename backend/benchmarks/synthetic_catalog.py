@@ -0,0 +1,88 @@
+"""
+Synthetic product catalogs with the same columns and value vocabulary as Apparels_shared.csv.
+
+    python -m benchmarks.synthetic_catalog --rows 1M --out catalog_1m.csv
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from services.attribute_values import AttributeValues
+
+# Attribute columns and the values they are drawn from
+ATTRIBUTE_COLUMNS = {
+    'fit': AttributeValues.FITS,
+    'fabric': AttributeValues.FABRICS,
+    'sleeve_length': AttributeValues.SLEEVE_LENGTHS,
+    'color_or_print': AttributeValues.COLORS_AND_PRINTS,
+    'occasion': AttributeValues.OCCASIONS,
+    'neckline': AttributeValues.NECKLINES,
+    'length': AttributeValues.LENGTHS,
+    'pant_type': AttributeValues.PANT_TYPES
+}
+
+
+def generate_catalog(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a random catalog.
+
+    Args:
+        rows: Number of products
+        seed: Random seed, the same seed always gives the same catalog
+
+    Returns:
+        DataFrame with the columns of Apparels_shared.csv
+    """
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(AttributeValues.CATEGORIES, rows)
+    sizes = np.array(AttributeValues.SIZES)
+    size_mask = rng.random((rows, len(sizes))) < 0.7
+    size_mask[~size_mask.any(axis=1), 2] = True
+
+    data = {
+        'id': [f"P{i:07d}" for i in range(rows)],
+        'name': [f"Synthetic {c} {i}" for i, c in enumerate(categories)],
+        'category': categories,
+        'available_sizes': [",".join(sizes[m]) for m in size_mask],
+    }
+    for column, values in ATTRIBUTE_COLUMNS.items():
+        column_values = rng.choice(values, rows).astype(object)
+        # Mirror the CSV: some attributes only apply to some categories
+        column_values[rng.random(rows) < 0.2] = np.nan
+        data[column] = column_values
+    data['price'] = rng.integers(20, 300, rows)
+    return pd.DataFrame(data)
+
+
+# Named catalog sizes used to track scaling across commits
+PRESETS = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def parse_rows(value: str) -> int:
+    """Parse a row count given as a preset name (1k, 100k, 1M) or a plain integer"""
+    preset = PRESETS.get(value.strip().lower())
+    if preset is not None:
+        return preset
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(PRESETS)} or an integer, got {value}")
+
+
+def write_catalog(path: str, rows: int, seed: int = 0):
+    """Generate a catalog and write it as CSV"""
+    generate_catalog(rows, seed).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=parse_rows, default=1000, help="row count or preset: 1k, 100k, 1M")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help="CSV file to write")
+    args = parser.parse_args()
+    write_catalog(args.out, args.rows, args.seed)
+    print(f"Wrote {args.rows} products to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
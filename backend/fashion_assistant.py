@@ -7,8 +7,9 @@ import logging
 import asyncio
 import pandas as pd
 import os
-import re
 from services.fashion_agent import FashionAgent
+from services.catalog_loader import load_catalog
+from services.conversation_manager import ConversationManager
 
 # Set up logging
 logging.basicConfig(
@@ -36,6 +37,7 @@ async def main():
             return
             
         agent = FashionAgent(products_df, api_key)
+        conversation = ConversationManager()
         
         # Test conversation
         test_queries = [
@@ -45,7 +47,7 @@ async def main():
         
         for query in test_queries:
             print(f"\nUser: {query}")
-            response = await agent.process_message(query)
+            response = await agent.process_message(query, conversation)
             print(f"Agent: {response['message']}")
             
             if response['type'] == 'recommendation':
@@ -56,66 +58,17 @@ async def main():
                     print(f"  {rec['match_reason']}\n")
                     
     except Exception as e:
-        logger.error(f"Error in main: {str(e)}", exc_info=True)
+        logger.error("Error in main: %s", e, exc_info=True)
 
 async def load_products_data() -> pd.DataFrame:
-    """Load and clean product data from CSV"""
+    """Load the normalized product catalog, from its snapshot when the CSV is unchanged"""
     try:
-        # First, read the raw CSV content
-        with open('Apparels_shared.csv', 'r') as f:
-            content = f.read()
+        products_df = load_catalog('Apparels_shared.csv')
         
-        # Clean up the content
-        # Remove extra spaces and normalize newlines
-        content = re.sub(r'\s+', ' ', content)
-        content = re.sub(r',\s+', ',', content)
-        
-        # Split into lines and clean each line
-        lines = content.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            if line.strip():  # Skip empty lines
-                # Remove extra spaces around commas
-                line = re.sub(r'\s*,\s*', ',', line.strip())
-                cleaned_lines.append(line)
-        
-        # Write cleaned content to a temporary file
-        temp_file = 'temp_cleaned.csv'
-        with open(temp_file, 'w') as f:
-            f.write('\n'.join(cleaned_lines))
-        
-        # Load the cleaned CSV
-        products_df = pd.read_csv(temp_file)
-        
-        # Clean up the data
-        # Fill NaN values with empty strings for string columns
-        string_columns = products_df.select_dtypes(include=['object']).columns
-        products_df[string_columns] = products_df[string_columns].fillna('')
-        
-        # Convert price to float
-        products_df['price'] = pd.to_numeric(products_df['price'], errors='coerce').fillna(0)
-        
-        # Ensure all string columns are properly formatted
-        for col in string_columns:
-            products_df[col] = products_df[col].astype(str).str.strip()
-        
-        # Remove any duplicate rows
-        products_df = products_df.drop_duplicates()
-        
-        # Clean up temporary file
-        os.remove(temp_file)
-        
-        # Verify the data structure
-        required_columns = ['id', 'name', 'category', 'available_sizes', 'price']
-        missing_columns = [col for col in required_columns if col not in products_df.columns]
-        if missing_columns:
-            logger.error(f"Missing required columns: {missing_columns}")
-            return None
-            
-        logger.info(f"Loaded {len(products_df)} products from CSV")
-        logger.debug(f"CSV columns: {products_df.columns.tolist()}")
-        logger.debug(f"Data types:\n{products_df.dtypes}")
-        logger.debug(f"First few products:\n{products_df.head()}")
+        logger.info("Loaded %s products from CSV", len(products_df))
+        logger.debug("CSV columns: %s", products_df.columns.tolist())
+        logger.debug("Data types:\n%s", products_df.dtypes)
+        logger.debug("First few products:\n%s", products_df.head())
         
         # Verify we have the expected data
         if len(products_df) == 0:
@@ -125,7 +78,7 @@ async def load_products_data() -> pd.DataFrame:
         return products_df
             
     except Exception as e:
-        logger.error(f"Error loading CSV: {e}")
+        logger.error("Error loading CSV: %s", e)
         return None
 
 if __name__ == "__main__":
@@ -1,29 +1,78 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.encoders import jsonable_encoder
 from services.fashion_agent import FashionAgent
+from services.catalog_manager import CatalogManager
+from services.product_filter import ProductFilter
+from services.vibe_engine import VibeEngine
+from services.response_cache import ResponseCache
+from services.attribute_extractor import LocalAttributeExtractor
+from services.prompt_builder import PromptBuilder
+from services.llm_client import GeminiClient, create_llm_client
+from services.stage_timer import stage, start_request, server_timing
+from services.metrics import metrics
+from services.structured_logging import SamplingFilter, configure_logging, new_request_id
+import glob
+import hashlib
+import hmac
 import os
+from typing import Literal, Optional
+import json
 import logging
+import time
 from dotenv import load_dotenv
-from models import ChatRequest
+from models import BatchRecommendationRequest, ChatRequest, ProductRequest, ProductResponse
 from session_manager import SessionManager
-from starlette.responses import Response
+from session_store import create_session_store
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 
 # Load environment variables
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+# Set up logging; LOG_SAMPLE_RATES keeps a fraction of sub-WARNING records per logger,
+# e.g. "services.product_filter=0.1,services.conversation_manager=0.2"
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "text"),
+    sample_rates=SamplingFilter.parse_rates(os.getenv("LOG_SAMPLE_RATES", ""))
 )
 logger = logging.getLogger(__name__)
 
+# METRICS_ENABLED=0 turns off stage histograms, event counters and the /metrics endpoint
+metrics.enabled = os.getenv("METRICS_ENABLED", "1") == "1"
+# Seconds browsers and CDNs may reuse a product search response; PRODUCT_SEARCH_MAX_AGE=0 disables caching
+product_search_max_age = int(os.getenv("PRODUCT_SEARCH_MAX_AGE", "300"))
+# Token required by the admin endpoints as "Authorization: Bearer <token>"; unset disables them
+admin_token = os.getenv("ADMIN_TOKEN", "")
+# STAGE_TIMING=1 reports per-stage durations (session, llm, filter, format, persist) in a Server-Timing header
+stage_timing = os.getenv("STAGE_TIMING", "0") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the session writer and catalog watcher for the lifetime of the app and flush on shutdown"""
+    session_manager.start()
+    catalog_manager.start()
+    # RECOMMENDATION_WARMUP=0 skips precomputing recommendations from session history
+    warmup = int(os.getenv("RECOMMENDATION_WARMUP", "0"))
+    if warmup > 0:
+        attribute_sets = await run_in_threadpool(session_manager.recommendation_attributes)
+        await run_in_threadpool(fashion_agent.product_recommender.warm_up, attribute_sets, warmup)
+    yield
+    logger.info("Flushing %s pending session records", session_manager.queue_depth)
+    await run_in_threadpool(catalog_manager.stop)
+    await run_in_threadpool(session_manager.stop)
+    await run_in_threadpool(fashion_agent.ai_response_handler.close)
+    if response_cache is not None:
+        response_cache.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="E-commerce Assistant API",
     description="API for intelligent e-commerce product recommendations and chat assistance",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 allowed_origin_suffix = "-hilloridesais-projects.vercel.app"
@@ -36,7 +85,9 @@ async def custom_cors_middleware(request: Request, call_next):
         response.headers["Access-Control-Allow-Origin"] = origin
         response.headers["Access-Control-Allow-Credentials"] = "true"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS, PUT, DELETE"
-        response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
+        response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type, If-None-Match"
+        # Lets browser code read the ETag to send it back in If-None-Match
+        response.headers["Access-Control-Expose-Headers"] = "ETag"
         if request.method == "OPTIONS":
             response.status_code = 200
             return response
@@ -44,90 +95,426 @@ async def custom_cors_middleware(request: Request, call_next):
     else:
         return await call_next(request)
 
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    # Every log record of this request carries its id, echoed back as X-Request-ID
+    request_id = new_request_id(request.headers.get("x-request-id"))
+    stages = start_request() if stage_timing else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so session ids don't create a series each
+    route = request.scope.get("route")
+    metrics.observe_request(
+        request.method, getattr(route, "path", "unmatched"), response.status_code, time.perf_counter() - start
+    )
+    response.headers["X-Request-ID"] = request_id
+    if stages:
+        response.headers["Server-Timing"] = server_timing(stages)
+    return response
+
 # Initialize services
 try:
-    products_df = pd.read_csv("Apparels_shared.csv")
-    logger.info(f"Successfully loaded {len(products_df)} products")
+    # Curated vibe files layered over the built-in vibes; VIBE_FILES takes comma-separated globs
+    vibe_engine = VibeEngine.from_files(
+        path for pattern in os.getenv("VIBE_FILES", "vibe_to_attribute*.txt").split(",") if pattern.strip()
+        for path in glob.glob(pattern.strip())
+    )
+    
+    # The normalized catalog is snapshotted next to the CSV and reused until the CSV changes;
+    # CATALOG_SNAPSHOT=0 always parses the CSV. The catalog and its indexes (VECTOR_INDEX=0 skips
+    # the embedding index) are rebuilt in the background when the CSV changes, checked every
+    # CATALOG_WATCH_INTERVAL seconds (0 disables watching), or on POST /api/admin/catalog/reload
+    catalog_manager = CatalogManager(
+        os.getenv("CATALOG_PATH", "Apparels_shared.csv"),
+        snapshot_dir=os.getenv("CATALOG_SNAPSHOT_DIR"),
+        use_snapshot=os.getenv("CATALOG_SNAPSHOT", "1") == "1",
+        vector_index=os.getenv("VECTOR_INDEX", "1") == "1",
+        vibes=vibe_engine.mappings,
+        watch_interval=float(os.getenv("CATALOG_WATCH_INTERVAL", "30"))
+    )
+    catalog = catalog_manager.load()
+    logger.info("Successfully loaded %s products", len(catalog.products_df))
+    
+    # LLM_CACHE_SIZE=0 disables the AI response cache
+    response_cache = None
+    if int(os.getenv("LLM_CACHE_SIZE", "1024")) > 0:
+        response_cache = ResponseCache(
+            max_size=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+            db_path=os.getenv("LLM_CACHE_PATH")
+        )
+    
+    # Share of category/size/budget a message must name to skip the LLM; above 1 disables it
+    local_extractor = LocalAttributeExtractor(
+        confidence_threshold=float(os.getenv("LOCAL_EXTRACTOR_THRESHOLD", "1.0")),
+        vibe_resolver=catalog.vector_index,
+        vibe_engine=vibe_engine
+    )
+    
+    # Static prompt instructions are rendered once and handed to the LLM client
+    prompt_builder = PromptBuilder(
+        history_token_budget=int(os.getenv("PROMPT_HISTORY_TOKEN_BUDGET", "400"))
+    )
+    
+    # LLM_BACKEND=mock swaps Gemini for a local seeded backend, for load tests without API spend
+    llm_backend = os.getenv("LLM_BACKEND", "gemini")
+    if llm_backend == "mock":
+        mock_responses = None
+        if os.getenv("LLM_MOCK_RESPONSES"):
+            with open(os.getenv("LLM_MOCK_RESPONSES")) as f:
+                mock_responses = json.load(f)
+        llm_options = dict(
+            latency_ms=float(os.getenv("LLM_MOCK_LATENCY_MS", "800")),
+            distribution=os.getenv("LLM_MOCK_LATENCY_DIST", "lognormal"),
+            seed=int(os.getenv("LLM_MOCK_SEED", "0")),
+            responses=mock_responses
+        )
+    else:
+        # PROMPT_CONTEXT_MODE picks how the static prompt reaches Gemini. The ~1.4k-token
+        # static prompt is below the 4096-token cached content minimum of the default model,
+        # so "auto" falls back to a system instruction unless GEMINI_MODEL is a model with a
+        # lower minimum (gemini-2.5-flash: 1024), see MIN_CACHE_TOKENS
+        llm_options = dict(
+            model_name=os.getenv("GEMINI_MODEL", GeminiClient.MODEL_NAME),
+            context_mode=os.getenv("PROMPT_CONTEXT_MODE", "auto"),
+            cache_ttl=float(os.getenv("PROMPT_CACHE_TTL", "3600"))
+        )
+    llm_client = create_llm_client(
+        llm_backend, os.getenv("GOOGLE_GEMINI_API_KEY", ""), prompt_builder.static_prefix, **llm_options
+    )
     
     fashion_agent = FashionAgent(
-        products_df=products_df,
-        api_key=os.getenv("GOOGLE_GEMINI_API_KEY", "")
+        products_df=catalog.products_df,
+        api_key=os.getenv("GOOGLE_GEMINI_API_KEY", ""),
+        catalog_index=catalog.catalog_index,
+        response_cache=response_cache,
+        local_extractor=local_extractor,
+        recommendation_cache_size=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "256")),
+        ranking_depth=int(os.getenv("RECOMMENDATION_RANKING_DEPTH", "100")),
+        prompt_builder=prompt_builder,
+        llm_client=llm_client,
+        vector_index=catalog.vector_index,
+        vibe_engine=vibe_engine
     )
+    catalog_manager.subscribe(fashion_agent.swap_catalog)
+    # Services read catalog_manager.current from here on; a module-level reference would keep the first catalog alive after a reload
+    del catalog
     logger.info("Successfully initialized FashionAgent")
     
-    session_manager = SessionManager()
+    session_manager = SessionManager(
+        store=create_session_store(
+            backend=os.getenv("SESSION_BACKEND", "log"),
+            legacy_file="chat_sessions.json",
+            path=os.getenv("SESSION_STORE_PATH")
+        ),
+        flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5")),
+        batch_size=int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "200")),
+        # Sessions kept in memory; should exceed the number of sessions with a turn in flight
+        max_sessions=int(os.getenv("SESSION_CACHE_SIZE", "1000")),
+        # Several workers without sticky routing: write each turn before answering it
+        sync_writes=os.getenv("SESSION_SYNC_WRITES", "0") == "1"
+    )
     logger.info("Successfully initialized SessionManager")
 except Exception as e:
-    logger.error(f"Failed to initialize services: {str(e)}")
+    logger.error("Failed to initialize services: %s", e)
     raise
 
+if metrics.enabled:
+    metrics.gauge("session_write_queue_depth", "Session records waiting to be written", lambda: session_manager.queue_depth)
+    metrics.gauge(
+        "recommendation_cache_entries", "Memoized rankings held",
+        lambda: fashion_agent.product_recommender.cache_stats()["size"]
+    )
+    metrics.gauge("catalog_products", "Products in the loaded catalog", lambda: len(catalog_manager.current.products_df))
+    metrics.gauge("catalog_generation", "Catalogs swapped in since startup, counting the first", lambda: catalog_manager.current.generation)
+
+    @app.get("/metrics")
+    def get_metrics():
+        """Metrics in the Prometheus text format."""
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/")
 def read_root():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "session_write_queue_depth": session_manager.queue_depth,
+        "catalog": catalog_manager.status(),
+        "prompt": fashion_agent.ai_response_handler.prompt_stats(),
+        "local_extraction": local_extractor.stats()
+    }
+
+def open_session(session_id: Optional[str]):
+    """
+    Get or create a chat session and its conversation state.
+    
+    Reading the store (refresh, lazy loads, flushing queued records) blocks, so this runs in the threadpool.
+    The conversation is rebuilt from the history before the new message; the agent adds the message itself.
+    """
+    session = session_manager.get_session(session_id)
+    if not session:
+        session = session_manager.create_session()
+    return session, session_manager.get_conversation(session.session_id)
+
+async def start_turn(request: ChatRequest):
+    """
+    Get or create the chat session for a request and record the user's message.
+    
+    Returns the session, its conversation state and the id after which messages are new to the client.
+    """
+    # Get or create chat session; loading from the store may touch disk
+    with stage("session"):
+        session, conversation = await run_in_threadpool(open_session, request.session_id)
+    
+    # Without last_message_id the client only gets this turn's messages
+    since = request.last_message_id if request.last_message_id is not None else session.last_message_id
+    
+    # Add user message to session
+    session.add_message("user", request.message)
+    
+    # Update session attributes if provided
+    if request.current_attributes:
+        session.attributes.update(request.current_attributes)
+        logger.info("Updated conversation state with attributes: %s", request.current_attributes)
+    
+    return session, conversation, since
+
+def finish_turn(session, conversation, response: dict, since: int) -> dict:
+    """
+    Record the agent's response in the session and build the API response.
+    
+    Only messages newer than since are returned; the full history comes from GET /api/chat/{session_id}.
+    """
+    # Add bot response to session
+    session.add_message("bot", response["message"], response)
+    
+    # Update session state
+    session.followup_count = response.get("followup_count", 0)
+    with stage("persist"):
+        session_manager.update_session(session.session_id, session, conversation)
+    
+    # Return response with session info
+    return {
+        "session_id": session.session_id,
+        "message": response["message"],
+        "type": response["type"],
+        "recommendations": response.get("recommendations", []),
+        "next_cursor": response.get("next_cursor"),
+        "messages": session.messages_after(since),
+        "last_message_id": session.last_message_id,
+        "current_state": {
+            "attributes": session.attributes,
+            "followup_count": session.followup_count
+        }
+    }
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 @app.post("/api/chat")
 async def process_message(request: ChatRequest):
     """Process a chat message and return AI-generated response with product recommendations."""
     try:
-        logger.info(f"Processing chat message: {request.message}")
-        
-        # Get or create chat session
-        session = session_manager.get_session(request.session_id)
-        if not session:
-            session = session_manager.create_session()
-        
-        # Add user message to session
-        session.add_message("user", request.message)
+        logger.info("Processing chat message: %s", request.message)
+        session, conversation, since = await start_turn(request)
         
-        # Update session attributes if provided
-        if request.current_attributes:
-            session.attributes.update(request.current_attributes)
-            logger.info(f"Updated conversation state with attributes: {request.current_attributes}")
+        # Process message with the agent using this session's conversation state
+        response = await fashion_agent.process_message(request.message, conversation)
+        logger.debug("Response from fashion agent: %s", response)
         
-        # Process message with the agent
-        response = await fashion_agent.process_message(request.message)
-        logger.info("Response from fashion agent:", response)
-        
-        # Add bot response to session
-        session.add_message("bot", response["message"], response)
-        
-        # Update session state
-        session.followup_count = response.get("followup_count", 0)
-        session_manager.update_session(session.session_id, session)
-        
-        # Return response with session info
-        return {
-            "session_id": session.session_id,
-            "message": response["message"],
-            "type": response["type"],
-            "recommendations": response.get("recommendations", []),
-            "messages": session.messages,
-            "current_state": {
-                "attributes": session.attributes,
-                "followup_count": session.followup_count
-            }
-        }
+        body = finish_turn(session, conversation, response, since)
+        await run_in_threadpool(session_manager.wait_persisted)
+        with stage("serialize"):
+            return JSONResponse(jsonable_encoder(body))
+    except Exception as e:
+        logger.error("Error processing chat message: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/chat/stream")
+async def stream_message(request: ChatRequest):
+    """
+    Process a chat message and stream the response as Server-Sent Events.
+    
+    Events arrive in order: session, attributes, products (recommendations only),
+    token (the conversational message piece by piece) and done with the full response.
+    """
+    try:
+        logger.info("Streaming chat message: %s", request.message)
+        session, conversation, since = await start_turn(request)
     except Exception as e:
-        logger.error(f"Error processing chat message: {str(e)}")
+        logger.error("Error processing chat message: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def events():
+        yield format_sse("session", {"session_id": session.session_id})
+        try:
+            async for event, data in fashion_agent.stream_message(request.message, conversation):
+                if event == "done":
+                    data = finish_turn(session, conversation, data, since)
+                    await run_in_threadpool(session_manager.wait_persisted)
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error("Error streaming chat message: %s", e)
+            yield format_sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/chat/{session_id}")
-async def get_chat_history(session_id: str):
-    """Retrieve chat history for a specific session."""
-    session = session_manager.get_session(session_id)
+async def get_chat_history(
+    session_id: str,
+    before: Optional[int] = Query(None, ge=1, description="Only return messages older than this message id"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of messages to return")
+):
+    """Retrieve chat history for a specific session, newest page first."""
+    session = await run_in_threadpool(session_manager.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Chat session not found")
     
+    # Message ids are 1-based positions, so a page is a slice
+    end = min(before - 1, len(session.messages)) if before is not None else len(session.messages)
+    start = max(end - limit, 0)
     return {
         "session_id": session.session_id,
         "created_at": session.created_at.isoformat(),
-        "messages": session.messages,
+        "messages": session.messages[start:end],
+        "last_message_id": session.last_message_id,
+        "has_more": start > 0,
         "current_state": {
             "attributes": session.attributes,
             "followup_count": session.followup_count
         }
     }
 
+@app.get("/api/chat/{session_id}/recommendations")
+async def get_more_recommendations(
+    session_id: str,
+    cursor: int = Query(0, ge=0, description="Position in the ranking, from next_cursor"),
+    limit: int = Query(3, ge=1, le=50, description="Recommendations per page")
+):
+    """Page through the ranked results behind the session's last recommendations."""
+    session = await run_in_threadpool(session_manager.get_session, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    
+    conversation = await run_in_threadpool(session_manager.get_conversation, session_id)
+    try:
+        page = fashion_agent.more_recommendations(conversation, cursor, limit)
+    except Exception as e:
+        logger.error("Error paging recommendations: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"session_id": session_id, **page}
+
+@app.post("/api/recommendations/batch")
+def recommend_batch(request: BatchRecommendationRequest):
+    """
+    Recommendations for many attribute profiles, streamed as NDJSON.
+    
+    Profiles are ranked together in vectorized passes and each result line is sent as
+    soon as its pass finishes, in request order.
+    """
+    def lines():
+        for result in fashion_agent.recommend_batch(request.profiles, request.top_k):
+            yield json.dumps(result, default=str) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/products/search", response_model=ProductResponse)
+def search_products(request: ProductRequest, http_request: Request):
+    """
+    Structured product search for filter-driven browsing, without the model or a session.
+    
+    Responses carry an ETag derived from the catalog version and the request, so
+    If-None-Match revalidation answers 304 without searching again.
+    """
+    return run_product_search(request, http_request)
+
+@app.get("/api/products/search", response_model=ProductResponse)
+def search_products_get(
+    http_request: Request,
+    category: Optional[str] = Query(None, description="Product category"),
+    size: Optional[str] = Query(None, description="Product size"),
+    budget: Optional[float] = Query(None, description="Maximum budget"),
+    style: Optional[str] = Query(None, description="Style preference"),
+    occasion: Optional[str] = Query(None, description="Occasion"),
+    color: Optional[str] = Query(None, description="Color preference"),
+    fabric: Optional[str] = Query(None, description="Fabric preference"),
+    fit: Optional[str] = Query(None, description="Fit preference"),
+    sort: Literal['relevance', 'price_asc', 'price_desc', 'name'] = Query("relevance", description="Result order"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    limit: int = Query(20, ge=1, le=100, description="Results per page")
+):
+    """
+    The same search with query parameters, so browsers and CDNs can cache the responses.
+    
+    Equal searches get the same ETag as through POST.
+    """
+    request = ProductRequest(
+        category=category, size=size, budget=budget, style=style, occasion=occasion,
+        color=color, fabric=fabric, fit=fit, sort=sort, offset=offset, limit=limit
+    )
+    return run_product_search(request, http_request)
+
+def run_product_search(request: ProductRequest, http_request: Request) -> Response:
+    """Answer a product search, or 304 when the client's ETag is still current"""
+    # One snapshot for the whole request, so a reload mid-request cannot mix catalogs
+    catalog = catalog_manager.current
+    request_key = json.dumps(request.model_dump(), sort_keys=True, default=str)
+    etag = 'W/"%s-%s"' % (catalog.version, hashlib.sha1(request_key.encode('utf-8')).hexdigest()[:16])
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={product_search_max_age}" if product_search_max_age > 0 else "no-cache"
+    }
+    if etag in (tag.strip() for tag in http_request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=cache_headers)
+    
+    attributes = request.attributes()
+    try:
+        page, ranked = ProductFilter.search(
+            catalog.products_df, attributes, request.sort, request.offset, request.limit,
+            index=catalog.catalog_index, vector_index=catalog.vector_index
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    with stage("serialize"):
+        products = page.drop(columns=['is_fallback', 'removed_filters']).astype(object)
+        end = request.offset + request.limit
+        body = ProductResponse(
+            products=products.where(products.notna(), None).to_dict('records'),
+            total_count=ranked.total,
+            filters_applied={k: v for k, v in attributes.items() if k not in ranked.removed_filters},
+            removed_filters=ranked.removed_filters or None,
+            next_offset=end if end < ranked.total else None
+        )
+        return JSONResponse(jsonable_encoder(body), headers=cache_headers)
+
+@app.post("/api/admin/catalog/reload")
+def reload_catalog(
+    wait: bool = Query(False, description="Reload before responding instead of in the background"),
+    force: bool = Query(False, description="Rebuild even if the catalog file looks unchanged"),
+    authorization: str = Header("")
+):
+    """
+    Rebuild the catalog and its indexes and swap them in without interrupting requests.
+    
+    Each worker process reloads its own catalog, so call this once per worker or rely on
+    the file watcher, which every worker runs.
+    """
+    if not admin_token or not hmac.compare_digest(authorization, f"Bearer {admin_token}"):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if wait:
+        catalog_manager.reload(force=force)
+        status = catalog_manager.status()
+        if status["last_error"]:
+            raise HTTPException(status_code=500, detail=status["last_error"])
+        return status
+    started = catalog_manager.reload_in_background(force=force)
+    return JSONResponse({"started": started, **catalog_manager.status()}, status_code=202)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 import uuid
 
@@ -11,10 +11,13 @@ class ChatSession:
         self.messages = []
         self.attributes = {}
         self.followup_count = 0
+        # Extracted/inferred attributes and ranking hints of the ConversationManager
+        self.conversation_state = {}
 
     def add_message(self, role: str, content: str, response_data: Optional[dict] = None):
         """Add a new message to the chat session"""
         message = {
+            "id": len(self.messages) + 1,
             "role": role,
             "content": content,
             "timestamp": datetime.now().isoformat(),
@@ -23,11 +26,33 @@ class ChatSession:
         self.messages.append(message)
         return message
 
+    def assign_message_ids(self):
+        """Give messages saved before ids existed their position-based id"""
+        for position, message in enumerate(self.messages):
+            message.setdefault("id", position + 1)
+
+    @property
+    def last_message_id(self) -> int:
+        """Id of the newest message, 0 for an empty session"""
+        return len(self.messages)
+
+    def messages_after(self, message_id: int) -> List[dict]:
+        """Get the messages newer than message_id; ids are 1-based positions"""
+        return self.messages[max(message_id, 0):]
+
 class ChatRequest(BaseModel):
     """Request model for chat messages"""
     message: str = Field(..., description="The user's message to process")
     current_attributes: Optional[Dict] = Field(None, description="Current conversation attributes")
     session_id: Optional[str] = Field(None, description="Session ID")
+    last_message_id: Optional[int] = Field(
+        None, ge=0, description="Newest message id the client has; the response only carries newer messages"
+    )
+
+class BatchRecommendationRequest(BaseModel):
+    """Request model for batch recommendations"""
+    profiles: List[Dict] = Field(..., min_length=1, description="Attribute sets to recommend for")
+    top_k: int = Field(3, ge=1, le=100, description="Recommendations per attribute set")
 
 class ProductRequest(BaseModel):
     """Request model for product queries"""
@@ -39,10 +64,20 @@ class ProductRequest(BaseModel):
     color: Optional[str] = Field(None, description="Color preference")
     fabric: Optional[str] = Field(None, description="Fabric preference")
     fit: Optional[str] = Field(None, description="Fit preference")
+    sort: Literal['relevance', 'price_asc', 'price_desc', 'name'] = Field("relevance", description="Result order")
+    offset: int = Field(0, ge=0, description="Number of results to skip")
+    limit: int = Field(20, ge=1, le=100, description="Results per page")
+
+    def attributes(self) -> Dict:
+        """The filters as a ProductFilter attribute dict"""
+        names = {'budget': 'price_max', 'color': 'color_or_print'}
+        filters = self.model_dump(exclude={'sort', 'offset', 'limit'}, exclude_none=True)
+        return {names.get(field, field): value for field, value in filters.items()}
 
 class ProductResponse(BaseModel):
     """Response model for product recommendations"""
     products: List[Dict]
     total_count: int
     filters_applied: Dict
-    removed_filters: Optional[List[str]] = None 
\ No newline at end of file
+    removed_filters: Optional[List[str]] = None
+    next_offset: Optional[int] = Field(None, description="Offset of the next page, None on the last page") 
\ No newline at end of file
@@ -3,10 +3,22 @@ from .product_recommender import ProductRecommender
 from .conversation_manager import ConversationManager
 from .attribute_values import AttributeValues
 from .product_filter import ProductFilter
+from .catalog_index import CatalogIndex
+from .catalog_loader import CatalogLoader, load_catalog
+from .catalog_manager import CatalogManager, CatalogSnapshot
+from .vector_index import VectorIndex
+from .vibe_engine import VibeEngine
 
 __all__ = [
     'FashionAgent',
     'ProductRecommender',
     'ConversationManager',
-    'ProductFilter'
+    'ProductFilter',
+    'CatalogIndex',
+    'CatalogLoader',
+    'load_catalog',
+    'CatalogManager',
+    'CatalogSnapshot',
+    'VectorIndex',
+    'VibeEngine'
 ] 
\ No newline at end of file
@@ -1,8 +1,15 @@
 import logging
-from typing import Dict
-import google.generativeai as genai
+from typing import AsyncIterator, Dict, Optional, Tuple
 from .conversation_manager import ConversationManager
-from .attribute_values import AttributeValues
+from .response_cache import ResponseCache
+from .constants import SIZE_PATTERN, BUDGET_PATTERN
+from .stream_parser import IncrementalResponseParser
+from .prompt_builder import PromptBuilder
+from .llm_client import GeminiClient, LLMClient, LLMResponse
+from .vibe_engine import VibeEngine
+from .stage_timer import stage
+from .metrics import metrics
+import hashlib
 import json
 import re
 
@@ -10,19 +17,40 @@ logger = logging.getLogger(__name__)
 
 class AIResponseHandler:
     """
-    Handles AI response generation using Google's Gemini model.
+    Handles AI response generation through a pluggable LLM client (Google Gemini by default).
     Manages the interaction with the AI model and processes its responses.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, response_cache: Optional[ResponseCache] = None,
+                 prompt_builder: Optional[PromptBuilder] = None, llm_client: Optional[LLMClient] = None,
+                 vibe_engine: Optional[VibeEngine] = None):
         """
         Initialize the AI response handler.
         
         Args:
-            api_key: Google Gemini API key
+            api_key: Google Gemini API key, used when no llm_client is given
+            response_cache: Optional cache of parsed model responses
+            prompt_builder: Prompt builder, a default one is created if not given
+            llm_client: Model backend created with prompt_builder's static prefix,
+                a GeminiClient if not given
+            vibe_engine: Vibe phrase engine used by the fallback response, one over
+                VIBE_MAPPINGS if not given
         """
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.response_cache = response_cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.llm_client = llm_client or GeminiClient(api_key, self.prompt_builder.static_prefix)
+        self.vibe_engine = vibe_engine or VibeEngine()
+        # Cached responses are only served to the prompt and model that produced them
+        self.cache_version = hashlib.sha256(
+            f"{self.llm_client.model_name}\n{self.prompt_builder.static_prefix}".encode('utf-8')
+        ).hexdigest()[:16]
+        self.prompt_count = 0
+        self.prompt_chars = 0
+        self.prompt_tokens = 0
+        self.reported_prompts = 0
+        self.reported_prompt_tokens = 0
+        self.reported_response_tokens = 0
+        self.reported_cached_tokens = 0
         logger.info("Initialized AI Response Handler")
         
     async def get_ai_response(self, message: str, conversation_manager: ConversationManager) -> Dict:
@@ -36,30 +64,27 @@ class AIResponseHandler:
         Returns:
             Dict containing AI response with type, message, and attributes
         """
-        # Check for greetings/small talk first
-        if self._is_greeting_or_small_talk(message):
-            return {
-                "type": "direct_conversation",
-                "message": "Hello! I'm your fashion shopping assistant. How can I help you find the perfect outfit today?",
-                "extracted_attributes": {},
-                "inferred_attributes": {},
-                "recommendations": []
-            }
-            
-        # Check for attribute removal requests
-        if any(phrase in message.lower() for phrase in ["remove all attributes", "clear attributes", "reset attributes"]):
-            return {
-                "type": "direct_conversation",
-                "message": "I've cleared all the previous attributes. What would you like to look for?",
-                "extracted_attributes": {},
-                "inferred_attributes": {},
-                "recommendations": []
-            }
+        # Greetings and attribute resets are answered without the model
+        canned = self._canned_response(message)
+        if canned is not None:
+            return canned
             
+        # Serve repeated queries from the cache instead of calling the model
+        cache_key = self._cache_key(message, conversation_manager)
+        if cache_key is not None:
+            cached = await self.response_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Serving AI response from cache")
+                metrics.count("llm_cache_hit")
+                return cached
+            metrics.count("llm_cache_miss")
+        
         prompt = self._build_prompt(message, conversation_manager)
         
         try:
-            response = await self.model.generate_content_async(prompt)
+            with stage("llm"):
+                response = await self.llm_client.generate(prompt)
+            self._record(response)
             response_text = response.text
             
             # Clean up the response text to ensure it's valid JSON
@@ -77,17 +102,111 @@ class AIResponseHandler:
                 if 'recommendations' not in ai_response:
                     ai_response['recommendations'] = []
                 
+                if cache_key is not None:
+                    self.response_cache.set(cache_key, ai_response)
+                
                 return ai_response
                 
             except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse AI response as JSON: {e}")
-                logger.error(f"Raw response: {response_text}")
+                logger.error("Failed to parse AI response as JSON: %s", e)
+                logger.error("Raw response: %s", response_text)
                 return self._fallback_response(message)
                 
         except Exception as e:
-            logger.error(f"AI Error: {e}")
+            logger.error("AI Error: %s", e)
             return self._fallback_response(message)
             
+    async def stream_ai_response(self, message: str, conversation_manager: ConversationManager) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Stream a structured response from AI as it is generated.
+        
+        Args:
+            message: User's input message
+            conversation_manager: Current conversation state manager
+            
+        Yields:
+            ("field", (key, value)) as top-level fields complete, ("message_delta", text)
+            while the message is generated, and finally ("complete", response dict)
+        """
+        canned = self._canned_response(message)
+        if canned is not None:
+            yield "complete", canned
+            return
+        
+        cache_key = self._cache_key(message, conversation_manager)
+        if cache_key is not None:
+            cached = await self.response_cache.get_async(cache_key)
+            if cached is not None:
+                logger.info("Serving AI response from cache")
+                metrics.count("llm_cache_hit")
+                yield "complete", cached
+                return
+            metrics.count("llm_cache_miss")
+        
+        prompt = self._build_prompt(message, conversation_manager)
+        parser = IncrementalResponseParser()
+        
+        try:
+            async for piece in self.llm_client.stream(prompt):
+                self._record(piece)
+                for event in parser.feed(piece.text):
+                    yield event
+        except Exception as e:
+            logger.error("AI Error: %s", e)
+            yield "complete", self._fallback_response(message)
+            return
+        
+        try:
+            ai_response = parser.result()
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse AI response as JSON: %s", e)
+            logger.error("Raw response: %s", parser.buffer)
+            yield "complete", self._fallback_response(message)
+            return
+        
+        if 'recommendations' not in ai_response:
+            ai_response['recommendations'] = []
+        if cache_key is not None:
+            self.response_cache.set(cache_key, ai_response)
+        yield "complete", ai_response
+    
+    def _canned_response(self, message: str) -> Optional[Dict]:
+        """Response for messages that never need the model, or None"""
+        # Check for greetings/small talk first
+        if self._is_greeting_or_small_talk(message):
+            metrics.count("greeting_short_circuit")
+            return {
+                "type": "direct_conversation",
+                "message": "Hello! I'm your fashion shopping assistant. How can I help you find the perfect outfit today?",
+                "extracted_attributes": {},
+                "inferred_attributes": {},
+                "recommendations": []
+            }
+            
+        # Check for attribute removal requests
+        if any(phrase in message.lower() for phrase in ["remove all attributes", "clear attributes", "reset attributes"]):
+            metrics.count("attribute_reset_short_circuit")
+            return {
+                "type": "direct_conversation",
+                "message": "I've cleared all the previous attributes. What would you like to look for?",
+                "extracted_attributes": {},
+                "inferred_attributes": {},
+                "recommendations": []
+            }
+        return None
+    
+    def _cache_key(self, message: str, conversation_manager: ConversationManager) -> Optional[str]:
+        """Response cache key for this turn, or None when caching is off"""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.make_key(
+            message,
+            conversation_manager.get_attributes(),
+            conversation_manager.get_followup_count(),
+            conversation_manager.get_messages(),
+            self.cache_version
+        )
+            
     def _is_greeting_or_small_talk(self, message: str) -> bool:
         """Check if the message is a greeting or small talk"""
         greetings = ['hi', 'hello', 'hey', 'howdy', 'greetings', 'good morning', 'good afternoon', 'good evening']
@@ -108,17 +227,18 @@ class AIResponseHandler:
         
     def _fallback_response(self, message: str) -> Dict:
         """Fallback response if AI fails"""
+        metrics.count("llm_fallback_response")
         # Simple keyword extraction for non-greetings
         extracted = {}
-        inferred = {}  # TODO: Implement vibe to attribute mapping
+        inferred = self.vibe_engine.infer(message)
         
         # Basic size extraction
-        sizes = re.findall(r'\b(XS|S|M|L|XL|XXL)\b', message.upper())
+        sizes = re.findall(SIZE_PATTERN, message.upper())
         if sizes:
             extracted['size'] = sizes[0]
             
         # Basic budget extraction  
-        budget_match = re.search(r'\$(\d+)|under (\d+)|budget.*?(\d+)', message.lower())
+        budget_match = re.search(BUDGET_PATTERN, message.lower())
         if budget_match:
             budget = int(budget_match.group(1) or budget_match.group(2) or budget_match.group(3))
             extracted['price_max'] = budget
@@ -133,100 +253,47 @@ class AIResponseHandler:
         } 
 
     def _build_prompt(self, message: str, conversation_manager: ConversationManager) -> str:
-        """Build the prompt for AI"""
-        logger.info(f"Conversation history: {conversation_manager.get_messages()[-3:] if len(conversation_manager.get_messages()) > 3 else conversation_manager.get_messages()}")
-        logger.info(f"Current attributes: {conversation_manager.get_attributes()}")
-        
-        # Get valid attribute values
-        valid_values = {
-            'category': AttributeValues.CATEGORIES,
-            'size': AttributeValues.SIZES,
-            'fit': AttributeValues.FITS,
-            'fabric': AttributeValues.FABRICS,
-            'sleeve_length': AttributeValues.SLEEVE_LENGTHS,
-            'color_or_print': AttributeValues.COLORS_AND_PRINTS,
-            'occasion': AttributeValues.OCCASIONS,
-            'neckline': AttributeValues.NECKLINES,
-            'length': AttributeValues.LENGTHS,
-            'pant_type': AttributeValues.PANT_TYPES
-        }
-        
-        return f"""
-You are a friendly and knowledgeable fashion shopping assistant. You have great fashion sense and you are able to understand the user's request and provide them with the best recommendations. 
-You can also engage in natural conversations with users about fashion, style, and shopping in general.
-
-Your primary capabilities:
-1. Provide fashion recommendations based on user preferences
-2. Engage in natural conversations about fashion and style
-3. Ask followup questions to better understand user needs
-4. Infer missing information from user's vibe and context
-5. Have casual conversations about fashion trends, style advice, and shopping tips
-
-CURRENT SITUATION:
-- User message: "{message}"
-- Conversation history: {conversation_manager.get_messages()[-3:] if len(conversation_manager.get_messages()) > 3 else conversation_manager.get_messages()}
-- Followup count: {conversation_manager.get_followup_count()}/2
-- Current attributes: {conversation_manager.get_attributes()}
-
-AVAILABLE PRODUCT ATTRIBUTES AND VALID VALUES:
-{json.dumps(valid_values, indent=2)}
-
-VIBE TO ATTRIBUTE MAPPING:
-- casual/relaxed → fit: "Relaxed"
-- summer → fabric: ["Cotton", "Linen"], sleeve_length: "Sleeveless"  
-- brunch → occasion: "Everyday"
-- cute → style: "feminine"
-- elevated → fit: "Tailored"
-- budget mentions → extract number as price_max
-
-CONVERSATION TYPES:
-1. Direct Conversation (type: "direct_conversation")
-   - Greetings and small talk (hi, hello, how are you, etc.)
-   - General fashion questions
-   - Style advice requests
-   - Shopping tips
-   - Fashion trend discussions
-   - Personal style questions
-   - Outfit planning help
-   - Fashion terminology explanations
-
-2. Followup Questions (type: "followup")
-   - When missing key info (category, size, budget)
-   - When need clarification on preferences
-   - When need more details about style
-   - When need to narrow down options
-
-3. Product Recommendations (type: "recommendation")
-   - When user asks for specific items
-   - When user describes what they're looking for
-   - When user needs outfit suggestions
-
-RULES:
-1. If the message is a greeting, small talk, or general fashion discussion → type: "direct_conversation"
-2. If followup_count < 2 AND missing key info (category, size, budget) → type: "followup"
-3. If user is asking for specific product recommendations → type: "recommendation"
-4. Extract explicit attributes mentioned by user
-5. Infer attributes from vibe words
-6. Ask focused questions about missing essentials
-7. Keep direct conversations natural and engaging
-8. Provide helpful fashion advice even in casual conversations
-9. Only use attribute values from the provided valid values list
-10. Match attribute values exactly as they appear in the valid values list
-
-IMPORTANT: Before making recommendations, you MUST:
-1. Have at least 2 of these key attributes: category, size, budget, occasion
-2. Ask followup questions if missing key information
-3. Only proceed with recommendations when you have enough information
-4. Use only valid attribute values from the provided list
-
-RESPONSE FORMAT:
-{{
-  "type": "followup" | "recommendation" | "direct_conversation",
-  "message": "conversational response to user",
-  "extracted_attributes": {{"category": "dress", "size": "M"}},
-  "inferred_attributes": {{"fit": "Relaxed", "fabric": "Cotton"}},
-  "followup_question": "specific question if type=followup"
-}}
+        """Build the per-turn prompt; the LLM client already holds the static prefix"""
+        prompt = self.prompt_builder.build_turn(message, conversation_manager)
+        self.prompt_count += 1
+        return prompt
+    
+    def _record(self, response: LLMResponse):
+        """Record the prompt size sent and the token counts the backend reports"""
+        if response.prompt_chars:
+            tokens = (response.prompt_chars + 3) // 4  # Same estimate as estimate_tokens
+            self.prompt_chars += response.prompt_chars
+            self.prompt_tokens += tokens
+            logger.info("Sent prompt with %s chars (~%s tokens)", response.prompt_chars, tokens)
+        if response.usage:
+            self.reported_prompts += 1
+            self.reported_prompt_tokens += response.usage.get("prompt_tokens", 0)
+            self.reported_response_tokens += response.usage.get("response_tokens", 0)
+            self.reported_cached_tokens += response.usage.get("cached_tokens", 0)
+    
+    def prompt_stats(self) -> Dict:
+        """
+        Get prompt size and token counters.
 
-JSON Response:
-""" 
\ No newline at end of file
+        The estimated counts cover only the text sent in each request. A static prefix held
+        as a system instruction is billed on every request too, so the reported counts from
+        the model's usage metadata are the ones to compare modes by.
+        """
+        reported_prompts = self.reported_prompts
+        return {
+            "prompts": self.prompt_count,
+            "static_prefix_tokens": self.prompt_builder.static_tokens,
+            "avg_prompt_chars": self.prompt_chars / self.prompt_count if self.prompt_count else 0.0,
+            "avg_prompt_tokens": self.prompt_tokens / self.prompt_count if self.prompt_count else 0.0,
+            "estimated_prompt_tokens": self.prompt_tokens,
+            "reported_prompt_tokens": self.reported_prompt_tokens,
+            "reported_response_tokens": self.reported_response_tokens,
+            "reported_cached_tokens": self.reported_cached_tokens,
+            "avg_reported_prompt_tokens": self.reported_prompt_tokens / reported_prompts if reported_prompts else 0.0,
+            "avg_reported_cached_tokens": self.reported_cached_tokens / reported_prompts if reported_prompts else 0.0,
+            "llm": self.llm_client.stats()
+        }
+    
+    def close(self):
+        """Release model-side resources such as cached prompt content"""
+        self.llm_client.close()
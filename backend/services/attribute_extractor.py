@@ -0,0 +1,161 @@
+import logging
+import re
+from typing import Dict, List, Optional
+from .attribute_values import AttributeValues
+from .constants import CATEGORY_SYNONYMS, SIZE_PATTERN, BUDGET_PATTERN
+from .phrase_matcher import PhraseMatcher
+from .vector_index import VectorIndex
+from .vibe_engine import VibeEngine, merge_hint
+
+logger = logging.getLogger(__name__)
+
+
+class LocalAttributeExtractor:
+    """
+    Deterministic attribute extractor that runs without the LLM.
+    Matches every valid attribute value in one pass over the message and takes vibe
+    hints from the VibeEngine, so fully specified queries can skip the model round-trip.
+    """
+
+    # Attributes that must be covered before a message is answered locally
+    KEY_ATTRIBUTES = ['category', 'size', 'price_max']
+
+    # Words users say for each category
+    CATEGORY_SYNONYMS = CATEGORY_SYNONYMS
+
+    # Attribute -> valid values matched verbatim in the message
+    VALUE_ATTRIBUTES = {
+        'fit': AttributeValues.FITS,
+        'fabric': AttributeValues.FABRICS,
+        'sleeve_length': AttributeValues.SLEEVE_LENGTHS,
+        'color_or_print': AttributeValues.COLORS_AND_PRINTS,
+        'occasion': AttributeValues.OCCASIONS,
+        'neckline': AttributeValues.NECKLINES,
+        'length': AttributeValues.LENGTHS,
+        'pant_type': AttributeValues.PANT_TYPES
+    }
+
+    def __init__(self, confidence_threshold: float = 1.0, vibe_resolver: Optional[VectorIndex] = None,
+                 vibe_engine: Optional[VibeEngine] = None):
+        """
+        Initialize the extractor.
+
+        Args:
+            confidence_threshold: Share of KEY_ATTRIBUTES (0-1) that must be found to bypass the LLM
+            vibe_resolver: Optional embedding index that infers attributes from vibe words
+                the phrase table does not know
+            vibe_engine: Vibe phrase engine, one over VIBE_MAPPINGS if not given
+        """
+        self.confidence_threshold = confidence_threshold
+        self.vibe_resolver = vibe_resolver
+        self.vibe_engine = vibe_engine or VibeEngine()
+        self.requests = 0
+        self.bypass_count = 0
+
+        self.matcher = PhraseMatcher()
+        for category, words in self.CATEGORY_SYNONYMS.items():
+            for word in words:
+                self.matcher.add(word, ('value', 'category', category))
+        for attr, values in self.VALUE_ATTRIBUTES.items():
+            for value in values:
+                self.matcher.add(value, ('value', attr, value))
+        self.matcher.compile()
+        logger.info("Initialized local attribute extractor with %s phrases", len(self.matcher))
+
+    def extract(self, message: str) -> Dict:
+        """
+        Extract attributes from a message.
+
+        Args:
+            message: User's input message
+
+        Returns:
+            Dict with extracted_attributes, inferred_attributes, ranking_hints (guesses of
+            the vibe resolver and the matched vibe phrases under 'vibe', which order results
+            but must not filter them) and confidence
+        """
+        extracted: Dict = {}
+        vibes = self.vibe_engine.match(message)
+        inferred = self.vibe_engine.hints(vibes)
+
+        for match in self.matcher.find(message):
+            for _, name, value in match.payloads:
+                self._merge(extracted, name, value)
+
+        size = self._extract_size(message)
+        if size:
+            extracted['size'] = size
+
+        budget_match = re.search(BUDGET_PATTERN, message.lower())
+        if budget_match:
+            extracted['price_max'] = int(budget_match.group(1) or budget_match.group(2) or budget_match.group(3))
+
+        ranking_hints: Dict = {}
+        if self.vibe_resolver is not None:
+            resolution = self.vibe_resolver.resolve(message)
+            ranking_hints = {
+                attr: hint for attr, hint in resolution.attributes.items() if attr not in extracted and attr not in inferred
+            }
+            vibes += [vibe for vibe in resolution.vibes if vibe not in vibes]
+        if vibes:
+            # The matched phrases are not an attribute the user gave; they only steer similarity ranking
+            ranking_hints['vibe'] = " ".join(vibes)
+
+        # Explicit values win over vibe hints for the same attribute
+        inferred = {k: v for k, v in inferred.items() if k not in extracted}
+        covered = [attr for attr in self.KEY_ATTRIBUTES if attr in extracted]
+
+        return {
+            "extracted_attributes": extracted,
+            "inferred_attributes": inferred,
+            "ranking_hints": ranking_hints,
+            "confidence": len(covered) / len(self.KEY_ATTRIBUTES)
+        }
+
+    def try_extract(self, message: str) -> Optional[Dict]:
+        """
+        Answer a message locally when extraction is confident enough.
+
+        Args:
+            message: User's input message
+
+        Returns:
+            A recommendation dict shaped like AIResponseHandler.get_ai_response, or None
+        """
+        self.requests += 1
+        result = self.extract(message)
+        if result["confidence"] < self.confidence_threshold:
+            return None
+
+        self.bypass_count += 1
+        logger.info("Answering locally with confidence %.2f, skipping the LLM", result['confidence'])
+        return {
+            "type": "recommendation",
+            "message": "Here are some options that match what you asked for!",
+            "extracted_attributes": result["extracted_attributes"],
+            "inferred_attributes": result["inferred_attributes"],
+            "ranking_hints": result["ranking_hints"],
+            "recommendations": []
+        }
+
+    def stats(self) -> Dict:
+        """Get counters for how many requests bypassed the LLM"""
+        return {
+            "requests": self.requests,
+            "bypassed": self.bypass_count,
+            "bypass_rate": self.bypass_count / self.requests if self.requests else 0.0
+        }
+
+    @staticmethod
+    def _extract_size(message: str) -> Optional[str]:
+        """Find an explicit size, only trusting uppercase size letters or 'size x'"""
+        sizes = re.findall(SIZE_PATTERN, message)
+        if sizes:
+            return sizes[0]
+        size_match = re.search(r'\bsize\s+(xs|s|m|l|xl|xxl)\b', message, re.IGNORECASE)
+        return size_match.group(1).upper() if size_match else None
+
+    @staticmethod
+    def _merge(attributes: Dict, attr: str, value):
+        """Add a value to an attribute, turning repeated distinct values into a list"""
+        merge_hint(attributes, attr, value)
@@ -0,0 +1,266 @@
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of set bits for every possible byte value, used to count packed bitsets
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+# Same for every 16-bit value, so stacked bitsets are counted two bytes per lookup
+_POPCOUNT16 = (_POPCOUNT[np.arange(1 << 16) >> 8] + _POPCOUNT[np.arange(1 << 16) & 0xFF]).astype(np.uint8)
+
+
+class CatalogIndex:
+    """
+    Precompiled columnar index over the product catalog.
+    Built once per catalog so filtering becomes bitset intersections instead of DataFrame scans.
+    """
+
+    # Attribute columns that get an inverted value -> bitset index
+    INDEXED_COLUMNS = [
+        'category', 'fit', 'fabric', 'sleeve_length', 'color_or_print',
+        'occasion', 'neckline', 'length', 'pant_type'
+    ]
+
+    def __init__(self, products_df: pd.DataFrame):
+        """
+        Build the index from a products DataFrame.
+
+        Args:
+            products_df: DataFrame containing product information
+        """
+        self.products_df = products_df
+        self.size = len(products_df)
+        # Content fingerprint, changes whenever the catalog data does
+        self.version = self._fingerprint(products_df)
+        self._all = self._pack(np.ones(self.size, dtype=bool))
+
+        # Inverted index per attribute column: normalized value -> bitset,
+        # plus the integer-coded column (-1 for missing) used for scoring
+        self.value_index: Dict[str, Dict[str, np.ndarray]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.code_lookup: Dict[str, Dict[str, int]] = {}
+        for column in self.INDEXED_COLUMNS:
+            if column in products_df.columns:
+                self._build_value_index(column, products_df[column])
+
+        # Size index parsed from the comma separated available_sizes column
+        self.size_index: Dict[str, np.ndarray] = {}
+        if 'available_sizes' in products_df.columns:
+            self.size_index = self._build_size_index(products_df['available_sizes'])
+
+        # Prices sorted once so price_max becomes a binary search
+        prices = pd.to_numeric(products_df['price'], errors='coerce').to_numpy(dtype=float) \
+            if 'price' in products_df.columns else np.zeros(self.size)
+        self.price_order = np.argsort(prices, kind='stable')
+        self.sorted_prices = prices[self.price_order]
+
+        logger.info(
+            "Built catalog index over %s products (%s attribute values, %s sizes)",
+            self.size, sum(len(v) for v in self.value_index.values()), len(self.size_index)
+        )
+
+    def match(self, filters: Dict) -> np.ndarray:
+        """
+        Get the bitset of products matching all filters.
+
+        Args:
+            filters: Attribute filters, same shape as ProductFilter attributes
+
+        Returns:
+            Packed bitset with one bit per product row
+        """
+        result = self._all.copy()
+        for attr, value in filters.items():
+            bits = self.attribute_bitset(attr, value)
+            if bits is not None:
+                np.bitwise_and(result, bits, out=result)
+        return result
+
+    def attribute_bitset(self, attr: str, value) -> Optional[np.ndarray]:
+        """
+        Get the bitset of products matching a single attribute filter.
+
+        Returns None for attributes that do not constrain the catalog (e.g. style).
+        """
+        if attr == 'price_max':
+            return self._price_bitset(value)
+        if attr == 'size':
+            return self._size_bitset(value)
+        if attr in self.value_index:
+            return self._value_bitset(self.value_index[attr], value)
+        if attr in self.products_df.columns:
+            # Non-indexed column, fall back to a one-off scan
+            return self._pack(self._scan_mask(self.products_df[attr], value))
+        return None
+
+    def value_codes(self, attr: str, value) -> List[int]:
+        """
+        Get the integer codes of the values an attribute filter asks for.
+
+        Values are compared exactly after normalization; unknown values are skipped.
+        """
+        lookup = self.code_lookup.get(attr)
+        if lookup is None:
+            return []
+        values = value if isinstance(value, list) else [value]
+        keys = (str(v).strip().lower() for v in values)
+        return [lookup[key] for key in keys if key in lookup]
+
+    def exact_bitset(self, attr: str, value) -> Optional[np.ndarray]:
+        """
+        Get the bitset of products whose value is exactly one of those asked for.
+
+        These are the products value_codes scores; None when no requested value is known.
+        """
+        values = self.value_index.get(attr)
+        if values is None:
+            return None
+        keys = {str(v).strip().lower() for v in (value if isinstance(value, list) else [value])}
+        matched = [values[key] for key in keys if key in values]
+        return self._union(matched) if matched else None
+
+    def count(self, bits: np.ndarray) -> int:
+        """Count the products in a bitset"""
+        return int(_POPCOUNT[bits].sum())
+
+    def count_rows(self, bitsets: np.ndarray) -> np.ndarray:
+        """Count the products in each row of a stacked bitset matrix"""
+        paired = bitsets.shape[1] // 2 * 2
+        counts = _POPCOUNT16[np.ascontiguousarray(bitsets[:, :paired]).view(np.uint16)].sum(axis=1, dtype=np.int64)
+        if paired < bitsets.shape[1]:
+            counts += _POPCOUNT[bitsets[:, -1]]
+        return counts
+
+    def first_positions(self, bitsets: np.ndarray, counts: np.ndarray) -> List[np.ndarray]:
+        """
+        Get the row positions of the first counts[i] products in each row of a stacked bitset matrix.
+
+        Rows are read through a prefix window that only grows for the rows it has not
+        satisfied yet, so rows with many products never touch the rest of the matrix.
+        Rows holding fewer products than asked for get all of them.
+        """
+        positions: List[np.ndarray] = [np.empty(0, dtype=np.int32)] * len(bitsets)
+        pending = np.flatnonzero(counts > 0)
+        width = 64
+        while len(pending):
+            window = bitsets[pending, :width]
+            rows, columns = np.nonzero(window)
+            found = np.bincount(rows, weights=_POPCOUNT[window[rows, columns]], minlength=len(pending))
+            done = (width >= bitsets.shape[1]) | (found >= counts[pending])
+            selected = done[rows]
+            rows, columns = rows[selected], columns[selected]
+            # Unpack only the nonzero bytes of the finished rows
+            bits = np.unpackbits(window[rows, columns][:, None], axis=1).astype(bool)
+            owners = np.repeat(rows, bits.sum(axis=1))
+            found_positions = (columns[:, None] * 8 + np.arange(8))[bits].astype(np.int32)
+            bounds = np.searchsorted(owners, np.arange(len(pending) + 1))
+            for slot in np.flatnonzero(done):
+                row = pending[slot]
+                positions[row] = found_positions[bounds[slot]:bounds[slot + 1]][:counts[row]]
+            pending = pending[~done]
+            width *= 4
+        return positions
+
+    def positions(self, bits: np.ndarray) -> np.ndarray:
+        """Get the row positions of the products in a bitset"""
+        return np.flatnonzero(self.to_mask(bits))
+
+    def to_mask(self, bits: np.ndarray) -> np.ndarray:
+        """Unpack a bitset into a boolean row mask"""
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def _value_bitset(self, values: Dict[str, np.ndarray], value) -> np.ndarray:
+        """Match an attribute value against an inverted index"""
+        if isinstance(value, list):
+            # For lists, any exact (case-insensitive) value matches
+            keys = [str(v).strip().lower() for v in value]
+            matched = [values[k] for k in keys if k in values]
+        else:
+            # For single values, substring matching over the vocabulary
+            needle = str(value).strip().lower()
+            matched = [bits for key, bits in values.items() if needle in key]
+        return self._union(matched)
+
+    def _size_bitset(self, value) -> np.ndarray:
+        """Match one or more sizes against the size index"""
+        sizes = value if isinstance(value, list) else [value]
+        return self._union([
+            self.size_index[key] for key in (str(s).strip().upper() for s in sizes)
+            if key in self.size_index
+        ])
+
+    def _price_bitset(self, value) -> Optional[np.ndarray]:
+        """Match products priced at or below value using the sorted price array"""
+        try:
+            price_max = float(value)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring invalid price_max value: %s", value)
+            return None
+        cutoff = np.searchsorted(self.sorted_prices, price_max, side='right')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.price_order[:cutoff]] = True
+        return self._pack(mask)
+
+    def _union(self, bitsets: List[np.ndarray]) -> np.ndarray:
+        """OR together a list of bitsets"""
+        if not bitsets:
+            return np.zeros_like(self._all)
+        if len(bitsets) == 1:
+            return bitsets[0]
+        return np.bitwise_or.reduce(bitsets)
+
+    def _build_value_index(self, column: str, values: pd.Series):
+        """Build normalized value -> bitset and the integer codes for one attribute column"""
+        # Normalize the distinct values only, then map row codes through
+        raw_codes, raw_uniques = pd.factorize(values)
+        normalized = pd.Series(raw_uniques, dtype=object).astype('string').str.strip().str.lower()
+        unique_codes, uniques = pd.factorize(normalized)
+        # Missing values (code -1) map through the trailing -1, which also covers all-missing columns
+        codes = np.append(unique_codes, -1)[raw_codes]
+        index = {}
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for code, key in enumerate(uniques):
+            mask = np.zeros(self.size, dtype=bool)
+            mask[order[boundaries[code]:boundaries[code + 1]]] = True
+            index[key] = self._pack(mask)
+        self.value_index[column] = index
+        self.codes[column] = codes.astype(np.int32)
+        self.code_lookup[column] = {key: code for code, key in enumerate(uniques)}
+
+    def _build_size_index(self, column: pd.Series) -> Dict[str, np.ndarray]:
+        """Build size -> bitset from the available_sizes column"""
+        # Parse each distinct size list once; catalogs repeat a handful of combinations
+        codes, uniques = pd.factorize(column)
+        size_codes: Dict[str, List[int]] = {}
+        for code, sizes in enumerate(uniques):
+            for size in str(sizes).split(','):
+                size = size.strip().upper()
+                if size:
+                    size_codes.setdefault(size, []).append(code)
+        return {size: self._pack(np.isin(codes, matching)) for size, matching in size_codes.items()}
+
+    @staticmethod
+    def _fingerprint(products_df: pd.DataFrame) -> str:
+        """Hash the catalog contents and columns into a short version string"""
+        digest = hashlib.sha1(pd.util.hash_pandas_object(products_df, index=True).to_numpy().tobytes())
+        digest.update(",".join(map(str, products_df.columns)).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def _scan_mask(column: pd.Series, value) -> np.ndarray:
+        """Scan a non-indexed column the way the original DataFrame filter did"""
+        text = column.astype('string')
+        if isinstance(value, list):
+            mask = text.str.lower().isin([str(v).lower() for v in value])
+        else:
+            mask = text.str.contains(str(value), case=False, regex=False)
+        return mask.fillna(False).to_numpy(dtype=bool)
+
+    @staticmethod
+    def _pack(mask: np.ndarray) -> np.ndarray:
+        """Pack a boolean row mask into a bitset"""
+        return np.packbits(mask)
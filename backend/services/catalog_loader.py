@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogLoader:
+    """
+    Loads the product catalog CSV once, normalizes it, and keeps a columnar snapshot next to it.
+
+    The snapshot holds one .npy file per column: integer codes plus a category array for
+    string columns, raw values for numeric ones. Later loads memory-map it instead of
+    parsing and cleaning the CSV again, until the CSV contents or the snapshot format change.
+    """
+
+    # Bump when normalization or the snapshot layout changes so old snapshots are rebuilt
+    FORMAT_VERSION = 1
+
+    REQUIRED_COLUMNS = ['id', 'name', 'category', 'available_sizes', 'price']
+
+    def __init__(self, csv_path: str, snapshot_dir: Optional[str] = None, use_snapshot: bool = True):
+        """
+        Initialize the loader.
+
+        Args:
+            csv_path: Catalog CSV file
+            snapshot_dir: Directory for snapshots, .catalog_cache next to the CSV by default
+            use_snapshot: Whether to read and write snapshots at all
+        """
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.catalog_cache')
+        self.use_snapshot = use_snapshot
+        self.stem = os.path.splitext(os.path.basename(csv_path))[0]
+        # Where the last load came from: "snapshot" or "csv"
+        self.source: Optional[str] = None
+
+    def load(self) -> pd.DataFrame:
+        """
+        Load the catalog, from the snapshot when it matches the CSV.
+
+        Returns:
+            Normalized DataFrame with categorical string columns
+        """
+        start = time.perf_counter()
+        if not self.use_snapshot:
+            products_df = self.normalize(pd.read_csv(self.csv_path))
+            self.source = "csv"
+            logger.info("Loaded %s products from %s in %.3fs", len(products_df), self.csv_path, time.perf_counter() - start)
+            return products_df
+
+        digest = self._csv_digest()
+        snapshot = self._snapshot_path(digest)
+        if os.path.isdir(snapshot):
+            try:
+                products_df = self._read_snapshot(snapshot)
+                self.source = "snapshot"
+                logger.info("Loaded %s products from snapshot %s in %.3fs",
+                            len(products_df), snapshot, time.perf_counter() - start)
+                return products_df
+            except Exception as e:
+                logger.warning("Ignoring unreadable catalog snapshot %s: %s", snapshot, e)
+
+        products_df = self.normalize(pd.read_csv(self.csv_path))
+        self.source = "csv"
+        try:
+            self._write_snapshot(products_df, digest, snapshot)
+        except OSError as e:
+            logger.warning("Failed to write catalog snapshot: %s", e)
+        logger.info("Loaded %s products from %s in %.3fs", len(products_df), self.csv_path, time.perf_counter() - start)
+        return products_df
+
+    @classmethod
+    def normalize(cls, products_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean a raw catalog frame: trimmed whitespace, numeric price, categorical strings.
+
+        Empty strings become missing values, spaces around the commas of available_sizes
+        are removed, and exact duplicate rows are dropped.
+        """
+        products_df = products_df.rename(columns=lambda col: str(col).strip())
+        missing = [col for col in cls.REQUIRED_COLUMNS if col not in products_df.columns]
+        if missing:
+            raise ValueError(f"Catalog is missing required columns: {missing}")
+
+        columns = {}
+        for column in products_df.columns:
+            values = products_df[column]
+            if column == 'price':
+                columns[column] = pd.to_numeric(values, errors='coerce').fillna(0)
+            elif pd.api.types.is_numeric_dtype(values):
+                columns[column] = values
+            else:
+                # Clean the distinct values once rather than every row
+                codes, uniques = pd.factorize(values)
+                cleaned = pd.Series(uniques, dtype=object).astype(str).str.replace(r'\s+', ' ', regex=True).str.strip()
+                if column == 'available_sizes':
+                    cleaned = cleaned.str.replace(r'\s*,\s*', ',', regex=True)
+                cleaned_codes, categories = pd.factorize(cleaned.where(cleaned != ''))
+                codes = np.where(codes >= 0, cleaned_codes[codes], -1)
+                columns[column] = pd.Categorical.from_codes(codes, categories=categories)
+        return pd.DataFrame(columns).drop_duplicates().reset_index(drop=True)
+
+    def _csv_digest(self) -> str:
+        """SHA-1 of the CSV, reused from the pointer file while its size and mtime are unchanged"""
+        stat = os.stat(self.csv_path)
+        pointer = os.path.join(self.snapshot_dir, f"{self.stem}.json")
+        try:
+            with open(pointer) as f:
+                recorded = json.load(f)
+            if recorded.get("size") == stat.st_size and recorded.get("mtime_ns") == stat.st_mtime_ns:
+                return recorded["sha1"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        digest = hashlib.sha1()
+        with open(self.csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        sha1 = digest.hexdigest()
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            self._write_json(pointer, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1})
+        except OSError as e:
+            logger.warning("Failed to record catalog hash: %s", e)
+        return sha1
+
+    def _snapshot_path(self, digest: str) -> str:
+        """Snapshot directory for a CSV hash and the current format version"""
+        return os.path.join(self.snapshot_dir, f"{self.stem}-{digest[:16]}-v{self.FORMAT_VERSION}")
+
+    def _read_snapshot(self, path: str) -> pd.DataFrame:
+        """Memory-map a snapshot back into a DataFrame"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != self.FORMAT_VERSION:
+            raise ValueError(f"snapshot format {meta.get('format_version')}, expected {self.FORMAT_VERSION}")
+
+        columns = {}
+        for position, spec in enumerate(meta["columns"]):
+            prefix = os.path.join(path, f"{position:03d}")
+            if spec["kind"] == "category":
+                codes = np.load(f"{prefix}.codes.npy", mmap_mode='r')
+                categories = np.load(f"{prefix}.categories.npy", mmap_mode='r').astype(object)
+                columns[spec["name"]] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                columns[spec["name"]] = np.load(f"{prefix}.values.npy", mmap_mode='r')
+        products_df = pd.DataFrame(columns)
+        if len(products_df) != meta["rows"]:
+            raise ValueError(f"snapshot has {len(products_df)} rows, expected {meta['rows']}")
+        return products_df
+
+    def _write_snapshot(self, products_df: pd.DataFrame, digest: str, path: str):
+        """Write a snapshot atomically and remove snapshots of older CSV versions"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{self.stem}-", dir=self.snapshot_dir)
+        try:
+            specs: List[Dict] = []
+            for position, column in enumerate(products_df.columns):
+                values = products_df[column]
+                prefix = os.path.join(staging, f"{position:03d}")
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    np.save(f"{prefix}.codes.npy", values.cat.codes.to_numpy().astype(np.int32))
+                    np.save(f"{prefix}.categories.npy", values.cat.categories.to_numpy().astype(str))
+                    specs.append({"name": column, "kind": "category"})
+                else:
+                    np.save(f"{prefix}.values.npy", values.to_numpy())
+                    specs.append({"name": column, "kind": "values", "dtype": str(values.dtype)})
+            self._write_json(os.path.join(staging, "meta.json"), {
+                "format_version": self.FORMAT_VERSION,
+                "csv_sha1": digest,
+                "rows": len(products_df),
+                "columns": specs
+            })
+            # Another worker may have published the same snapshot first; either copy is fine
+            if os.path.isdir(path):
+                shutil.rmtree(staging)
+            else:
+                os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info("Wrote catalog snapshot %s", path)
+
+        for entry in os.listdir(self.snapshot_dir):
+            stale = os.path.join(self.snapshot_dir, entry)
+            if entry.startswith(f"{self.stem}-") and stale != path and os.path.isdir(stale):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        """Write a JSON file atomically"""
+        fd, staging = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(staging, path)
+
+
+def load_catalog(csv_path: str, snapshot_dir: Optional[str] = None, use_snapshot: bool = True) -> pd.DataFrame:
+    """
+    Load a normalized catalog, using the snapshot cache when possible.
+
+    Args:
+        csv_path: Catalog CSV file
+        snapshot_dir: Directory for snapshots, .catalog_cache next to the CSV by default
+        use_snapshot: Whether to read and write snapshots at all
+
+    Returns:
+        Normalized products DataFrame
+    """
+    return CatalogLoader(csv_path, snapshot_dir, use_snapshot).load()
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+from .catalog_index import CatalogIndex
+from .catalog_loader import load_catalog
+from .vector_index import VectorIndex
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot(NamedTuple):
+    """One loaded catalog with the indexes derived from it, swapped in as a whole"""
+    generation: int  # Increases by one with every swap in this process
+    products_df: pd.DataFrame
+    catalog_index: CatalogIndex
+    vector_index: Optional[VectorIndex]
+    loaded_at: float  # Unix time the snapshot was swapped in
+
+    @property
+    def version(self) -> str:
+        """Content fingerprint of the catalog, the same in every worker; caches key on this"""
+        return self.catalog_index.version
+
+
+class CatalogManager:
+    """
+    Owns the current catalog and replaces it without restarting the process.
+
+    A reload loads the CSV and builds the CatalogIndex and VectorIndex off the request
+    path, then publishes the new snapshot with a single reference assignment. Readers
+    take the current snapshot once per operation, so a request never mixes two catalogs
+    and never waits on a reload. Listeners are told about each new snapshot, e.g. to
+    repoint services that hold catalog references.
+    """
+
+    def __init__(self, csv_path: str, snapshot_dir: Optional[str] = None, use_snapshot: bool = True,
+                 vector_index: bool = True, vibes: Optional[Dict[str, Dict]] = None, watch_interval: float = 0.0):
+        """
+        Initialize the manager; nothing is loaded until load() is called.
+
+        Args:
+            csv_path: Catalog CSV file
+            snapshot_dir: Directory for the loader's columnar snapshots
+            use_snapshot: Whether the loader reads and writes snapshots
+            vector_index: Whether to build a VectorIndex for each catalog
+            vibes: Vibe phrase -> attribute hints the VectorIndex embeds
+            watch_interval: Seconds between checks of the CSV for changes, 0 disables watching
+        """
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self.use_snapshot = use_snapshot
+        self.build_vector_index = vector_index
+        self.vibes = vibes
+        self.watch_interval = watch_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._current: Optional[CatalogSnapshot] = None
+        self._source_stamp: Optional[Tuple[int, int]] = None
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+        # Serializes reloads; readers never take it
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> CatalogSnapshot:
+        """The catalog in service; read it once and use that snapshot for the whole operation"""
+        if self._current is None:
+            raise RuntimeError("Catalog has not been loaded")
+        return self._current
+
+    @property
+    def reloading(self) -> bool:
+        """Whether a background reload is in progress"""
+        return self._reload_thread is not None and self._reload_thread.is_alive()
+
+    def load(self) -> CatalogSnapshot:
+        """Load the first catalog in the calling thread; errors propagate"""
+        with self._reload_lock:
+            stamp = self._stamp()
+            self._publish(self._build(), stamp)
+        return self.current
+
+    def subscribe(self, listener: Callable[[CatalogSnapshot], None]):
+        """Call listener with every snapshot swapped in after this call"""
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> Optional[CatalogSnapshot]:
+        """
+        Rebuild the catalog in the calling thread and swap it in.
+
+        Builds that fail are logged and leave the current catalog in service.
+
+        Args:
+            force: Rebuild even when the CSV's size and mtime are unchanged
+
+        Returns:
+            The new snapshot, or None when nothing changed or the build failed
+        """
+        with self._reload_lock:
+            stamp = self._stamp()
+            if not force and stamp is not None and stamp == self._source_stamp:
+                return None
+            start = time.perf_counter()
+            try:
+                built = self._build()
+            except Exception as e:
+                self.last_error = str(e)
+                metrics.count("catalog_reload_failed")
+                logger.error("Catalog reload failed, keeping version %s: %s", self.current.version, e)
+                return None
+            self.last_error = None
+            if built[1].version == self.current.version:
+                # Same contents (e.g. the file was only touched): keep the snapshot and its caches
+                self._source_stamp = stamp
+                logger.info("Catalog unchanged at version %s", self.current.version)
+                return None
+            snapshot = self._publish(built, stamp)
+            metrics.count("catalog_reload")
+            logger.info("Reloaded catalog in %.3fs", time.perf_counter() - start)
+            return snapshot
+
+    def reload_in_background(self, force: bool = False) -> bool:
+        """
+        Start a reload on a background thread and return immediately.
+
+        Returns:
+            False if a reload was already running, in which case none is started
+        """
+        with self._thread_lock:
+            if self.reloading:
+                return False
+            self._reload_thread = threading.Thread(
+                target=self.reload, kwargs={"force": force}, name="catalog-reload", daemon=True
+            )
+            self._reload_thread.start()
+        return True
+
+    def start(self):
+        """Start watching the CSV for changes, if a watch interval is set"""
+        if self.watch_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stopping.clear()
+        self._watcher = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Watching %s for changes every %ss", self.csv_path, self.watch_interval)
+
+    def stop(self):
+        """Stop the watcher and wait for a reload in progress"""
+        self._stopping.set()
+        for thread in (self._watcher, self._reload_thread):
+            if thread is not None:
+                thread.join()
+        self._watcher = None
+        self._reload_thread = None
+
+    def status(self) -> Dict:
+        """Version, generation and reload state of the catalog in service"""
+        snapshot = self.current
+        return {
+            "version": snapshot.version,
+            "generation": snapshot.generation,
+            "products": len(snapshot.products_df),
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "reloading": self.reloading,
+            "last_error": self.last_error
+        }
+
+    def _build(self) -> Tuple[pd.DataFrame, CatalogIndex, Optional[VectorIndex]]:
+        """Load the CSV and build its indexes"""
+        products_df = load_catalog(self.csv_path, snapshot_dir=self.snapshot_dir, use_snapshot=self.use_snapshot)
+        catalog_index = CatalogIndex(products_df)
+        vector_index = VectorIndex(catalog_index, vibes=self.vibes) if self.build_vector_index else None
+        return products_df, catalog_index, vector_index
+
+    def _publish(self, built: Tuple[pd.DataFrame, CatalogIndex, Optional[VectorIndex]],
+                 stamp: Optional[Tuple[int, int]]) -> CatalogSnapshot:
+        """Swap a built catalog in and notify listeners; caller holds the reload lock"""
+        generation = self._current.generation + 1 if self._current is not None else 1
+        snapshot = CatalogSnapshot(generation, *built, time.time())
+        # A single reference assignment, so readers see the old or the new snapshot, never a mix
+        self._current = snapshot
+        self._source_stamp = stamp
+        if generation > 1:
+            self.reloads += 1
+        logger.info("Serving catalog version %s (generation %s, %s products)",
+                    snapshot.version, generation, len(snapshot.products_df))
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error("Catalog listener failed for version %s: %s", snapshot.version, e)
+        return snapshot
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Size and mtime of the CSV, None if it cannot be read"""
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _watch(self):
+        """Watcher loop: reload once a changed CSV has kept the same size and mtime for one interval"""
+        pending = attempted = None
+        while not self._stopping.wait(self.watch_interval):
+            stamp = self._stamp()
+            if stamp is None or stamp == self._source_stamp or stamp == attempted:
+                pending = None
+            elif stamp != pending:
+                # Still being written, or just changed; check again next interval
+                pending = stamp
+            else:
+                logger.info("Catalog file %s changed, reloading", self.csv_path)
+                self.reload()
+                # A file that failed to load is retried once it changes again
+                pending, attempted = None, stamp
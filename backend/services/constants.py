@@ -2,6 +2,29 @@
 Constants used across the fashion assistant services.
 """
 
+# Size and budget patterns shared by the fallback response and the local extractor
+SIZE_PATTERN = r'\b(XS|S|M|L|XL|XXL)\b'
+BUDGET_PATTERN = r'\$(\d+)|under (\d+)|budget.*?(\d+)'
+
+# Words users say for each category
+CATEGORY_SYNONYMS = {
+    'top': ['top', 'tops', 'blouse', 'blouses', 'shirt', 'shirts', 'tee', 'tees', 'tank', 'tanks'],
+    'dress': ['dress', 'dresses', 'gown', 'gowns'],
+    'skirt': ['skirt', 'skirts'],
+    'pants': ['pants', 'trousers', 'jeans', 'slacks']
+}
+
+# Words that say what is being asked for rather than how it should look; free-text
+# similarity ignores them so "dress" or "need" cannot pull in unrelated vibes or values
+QUERY_STOP_WORDS = {
+    'a', 'an', 'the', 'for', 'of', 'to', 'in', 'on', 'at', 'with', 'and', 'or', 'but', 'my', 'me',
+    'i', 'im', 'we', 'you', 'it', 'is', 'am', 'are', 'be', 'that', 'this', 'some', 'something', 'any',
+    'need', 'want', 'looking', 'look', 'looks', 'find', 'show', 'get', 'buy', 'like', 'would', 'love',
+    'please', 'can', 'could', 'have', 'has', 'size', 'sized', 'under', 'over', 'below', 'around', 'about',
+    'less', 'than', 'max', 'budget', 'price', 'up', 'xs', 's', 'm', 'l', 'xl', 'xxl', 'vibe', 'vibes',
+    'item', 'items', 'piece', 'pieces', 'outfit', 'outfits', 'clothes', 'wear', 'style'
+} | {word for words in CATEGORY_SYNONYMS.values() for word in words}
+
 VIBE_MAPPINGS = {
     # Occasion vibes
     'casual': {'fit': 'Relaxed', 'style': 'casual'},
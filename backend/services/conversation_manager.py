@@ -1,3 +1,4 @@
+import copy
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -25,24 +26,28 @@ class ConversationManager:
         self.extracted_attrs = {}
         self.inferred_attrs = {}
         self.combined_attrs = {}
+        # Guessed attributes that only order recommendations, kept apart so they never filter
+        self.ranking_hints = {}
         self.messages = []
+        # Last recommendation ranking, kept so more results can be paged without re-filtering
+        self.ranking = None
         logger.info("Conversation state reset to initial values")
         
     def get_state(self) -> Dict:
         """Get current conversation state"""
-        logger.debug(f"Current conversation state: {self.state}")
+        logger.debug("Current conversation state: %s", self.state)
         return self.state
         
     def update_state(self, attributes: Dict):
         """Update conversation state with new attributes"""
-        logger.info(f"Updating state with new attributes: {attributes}")
+        logger.info("Updating state with new attributes: %s", attributes)
         self.state["attributes"].update(attributes)
         self.state["followup_count"] += 1
-        logger.debug(f"Updated state: {self.state}")
+        logger.debug("Updated state: %s", self.state)
 
     def update_attributes(self, extracted: Dict, inferred: Dict):
         """Update conversation attributes with new extracted and inferred values"""
-        logger.info(f"Updating attributes - extracted: {extracted}, inferred: {inferred}")
+        logger.info("Updating attributes - extracted: %s, inferred: %s", extracted, inferred)
         
         # Store the current followup count
         current_followup_count = self.state["followup_count"]
@@ -58,7 +63,38 @@ class ConversationManager:
         self.state["attributes"] = self.combined_attrs
         self.state["followup_count"] = current_followup_count
         
-        logger.debug(f"Updated attributes: {self.combined_attrs}")
+        logger.debug("Updated attributes: %s", self.combined_attrs)
+
+    def update_ranking_hints(self, hints: Dict):
+        """Update the hints that order recommendations without filtering them"""
+        if hints:
+            logger.info("Updating ranking hints: %s", hints)
+            self.ranking_hints.update(hints)
+
+    def get_ranking_hints(self) -> Dict:
+        """Get ranking hints"""
+        return self.ranking_hints
+
+    def export_state(self) -> Dict:
+        """Attribute state to persist with the session, restored by restore_state()"""
+        return copy.deepcopy({
+            "extracted": self.extracted_attrs,
+            "inferred": self.inferred_attrs,
+            "ranking_hints": self.ranking_hints,
+            "followup_count": self.state["followup_count"],
+            "stage": self.state["stage"]
+        })
+
+    def restore_state(self, saved: Dict):
+        """Restore attribute state saved by export_state()"""
+        saved = copy.deepcopy(saved)
+        self.extracted_attrs = saved.get("extracted", {})
+        self.inferred_attrs = saved.get("inferred", {})
+        self.combined_attrs = {**self.extracted_attrs, **self.inferred_attrs}
+        self.ranking_hints = saved.get("ranking_hints", {})
+        self.state["attributes"] = self.combined_attrs
+        self.state["followup_count"] = saved.get("followup_count", 0)
+        self.state["stage"] = saved.get("stage", "initial")
 
     def get_extracted_attributes(self) -> Dict:
         """Get extracted attributes"""
@@ -89,9 +125,9 @@ class ConversationManager:
         Returns:
             Response type: "followup" or "recommendation"
         """
-        logger.info(f"Determining response type for message: {message}")
-        logger.debug(f"Current attributes: {attributes}")
-        logger.debug(f"Current state: {current_state}")
+        logger.info("Determining response type for message: %s", message)
+        logger.debug("Current attributes: %s", attributes)
+        logger.debug("Current state: %s", current_state)
         
         # Update state with new attributes
         self.update_state(attributes)
@@ -99,7 +135,7 @@ class ConversationManager:
         # Check if we need more information
         needs_more = self._needs_more_info(attributes, current_state)
         response_type = "followup" if needs_more else "recommendation"
-        logger.info(f"Response type determined: {response_type}")
+        logger.info("Response type determined: %s", response_type)
         return response_type
         
     def generate_response(
@@ -119,16 +155,16 @@ class ConversationManager:
         Returns:
             Generated response message
         """
-        logger.info(f"Generating {response_type} response")
-        logger.debug(f"Current attributes: {attributes}")
-        logger.debug(f"Number of recommendations: {len(recommendations)}")
+        logger.info("Generating %s response", response_type)
+        logger.debug("Current attributes: %s", attributes)
+        logger.debug("Number of recommendations: %s", len(recommendations))
         
         if response_type == "followup":
             response = self._generate_followup_message(attributes)
         else:
             response = self._generate_recommendation_message(recommendations)
             
-        logger.debug(f"Generated response: {response}")
+        logger.debug("Generated response: %s", response)
         return response
             
     def _needs_more_info(self, attributes: Dict, current_state: Dict) -> bool:
@@ -136,7 +172,7 @@ class ConversationManager:
         required_attributes = ['category', 'budget']
         missing_attributes = [attr for attr in required_attributes 
                             if not attributes.get(attr)]
-        logger.debug(f"Missing required attributes: {missing_attributes}")
+        logger.debug("Missing required attributes: %s", missing_attributes)
         return len(missing_attributes) > 0
         
     def _generate_followup_message(self, attributes: Dict) -> str:
@@ -170,8 +206,8 @@ class ConversationManager:
         categories = set(rec.get('category', '') for rec in recommendations)
         styles = set(rec.get('style', '') for rec in recommendations)
         
-        logger.debug(f"Found categories: {categories}")
-        logger.debug(f"Found styles: {styles}")
+        logger.debug("Found categories: %s", categories)
+        logger.debug("Found styles: %s", styles)
         
         message = "Here are some great options that match your style!"
         if categories:
@@ -180,7 +216,7 @@ class ConversationManager:
             message += f" in {', '.join(styles)} style"
         message += ". Let me know if you'd like to see more or try different preferences!"
         
-        logger.debug(f"Generated recommendation message: {message}")
+        logger.debug("Generated recommendation message: %s", message)
         return message
 
     def get_messages(self) -> List[Dict]:
@@ -209,7 +245,29 @@ class ConversationManager:
         if metadata:
             message.update(metadata)
         self.messages.append(message)
-        logger.debug(f"Added {role} message to conversation history")
+        logger.debug("Added %s message to conversation history", role)
+
+    def replace_reply(self, content: str):
+        """Replace the assistant's reply to the latest user message, e.g. with the text the user was shown"""
+        for message in reversed(self.messages):
+            if message["role"] == "user":
+                break
+            if message["role"] == "assistant":
+                message["content"] = content
+                return
+
+    def set_ranking(self, ranking: Dict):
+        """
+        Remember the ranking behind the latest recommendations
+        
+        Args:
+            ranking: Dict with the ranked products, attribute fingerprint and catalog version
+        """
+        self.ranking = ranking
+
+    def get_ranking(self) -> Optional[Dict]:
+        """Get the ranking behind the latest recommendations, if any"""
+        return self.ranking
 
     def should_ask_followup(self) -> bool:
         """Check if we should ask a followup question"""
@@ -218,7 +276,7 @@ class ConversationManager:
     def increment_followup_count(self):
         """Increment the followup count"""
         self.state["followup_count"] += 1
-        logger.debug(f"Incremented followup count to {self.state['followup_count']}")
+        logger.debug("Incremented followup count to %s", self.state['followup_count'])
 
     def has_enough_info(self) -> bool:
         """Check if we have enough information to make recommendations"""
@@ -226,7 +284,7 @@ class ConversationManager:
         current_attrs = self.get_attributes()
         matching_attrs = [attr for attr in required_attributes if attr in current_attrs]
         has_enough = len(matching_attrs) >= 2
-        logger.debug(f"Has enough info: {has_enough} (found {len(matching_attrs)} required attributes)")
+        logger.debug("Has enough info: %s (found %s required attributes)", has_enough, len(matching_attrs))
         return has_enough
 
     def clear_attributes(self):
@@ -235,5 +293,6 @@ class ConversationManager:
         self.extracted_attrs = {}
         self.inferred_attrs = {}
         self.combined_attrs = {}
+        self.ranking_hints = {}
         self.state["attributes"] = {}
         logger.debug("All attributes cleared") 
\ No newline at end of file
@@ -1,12 +1,22 @@
 import logging
-from typing import Dict
+from typing import AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
 import pandas as pd
+from .catalog_index import CatalogIndex
+from .catalog_manager import CatalogSnapshot
 from .conversation_manager import ConversationManager
 from .product_recommender import ProductRecommender
 from .response_formatter import ResponseFormatter
 import json
 from .attribute_values import AttributeValues
 from .ai_response_handler import AIResponseHandler
+from .response_cache import ResponseCache
+from .attribute_extractor import LocalAttributeExtractor
+from .prompt_builder import PromptBuilder
+from .llm_client import LLMClient
+from .vector_index import VectorIndex
+from .vibe_engine import VibeEngine
+from .stage_timer import stage
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +26,68 @@ class FashionAgent:
     Handles the interaction between product recommendations and conversation flow.
     """
     
-    def __init__(self, products_df: pd.DataFrame, api_key: str):
+    def __init__(
+        self,
+        products_df: pd.DataFrame,
+        api_key: str,
+        catalog_index: Optional[CatalogIndex] = None,
+        response_cache: Optional[ResponseCache] = None,
+        local_extractor: Optional[LocalAttributeExtractor] = None,
+        recommendation_cache_size: int = 256,
+        ranking_depth: int = 100,
+        prompt_builder: Optional[PromptBuilder] = None,
+        llm_client: Optional[LLMClient] = None,
+        vector_index: Optional[VectorIndex] = None,
+        vibe_engine: Optional[VibeEngine] = None
+    ):
         """
         Initialize the FashionAgent with required components.
         
         Args:
             products_df: DataFrame containing product information
             api_key: API key for external services (e.g., Gemini)
+            catalog_index: Prebuilt index over products_df, built if not given
+            response_cache: Optional cache of parsed AI responses
+            local_extractor: Optional extractor that answers fully specified queries without the LLM
+            recommendation_cache_size: Number of memoized rankings, 0 disables the cache
+            ranking_depth: Number of ranked products kept per recommendation for paging
+            prompt_builder: Optional prompt builder with a custom history token budget
+            llm_client: Optional model backend, Gemini if not given
+            vector_index: Optional embedding index used as a ranking signal for vibes
+            vibe_engine: Vibe phrase engine whose hints back up the model's inferred
+                attributes, one over VIBE_MAPPINGS if not given
         """
-        self.products_df = products_df  # Store products_df as instance variable
-        self.product_recommender = ProductRecommender(products_df)
-        self.conversation_manager = ConversationManager()
-        self.response_formatter = ResponseFormatter(self.conversation_manager, self.product_recommender)
-        self.ai_response_handler = AIResponseHandler(api_key)  # Initialize AI response handler
-        logger.info(f"Initialized FashionAgent with {len(products_df)} products")
+        self.product_recommender = ProductRecommender(
+            products_df, catalog_index, recommendation_cache_size, ranking_depth, vector_index
+        )
+        self.response_formatter = ResponseFormatter(self.product_recommender)
+        self.vibe_engine = vibe_engine or VibeEngine()
+        self.ai_response_handler = AIResponseHandler(  # Initialize AI response handler
+            api_key, response_cache, prompt_builder, llm_client, self.vibe_engine
+        )
+        self.local_extractor = local_extractor
+        logger.info("Initialized FashionAgent with %s products", len(products_df))
+
+    @property
+    def products_df(self) -> pd.DataFrame:
+        """Catalog currently recommended from"""
+        return self.product_recommender.products_df
+
+    def swap_catalog(self, snapshot: CatalogSnapshot):
+        """
+        Serve a new catalog, e.g. as a CatalogManager listener.
+
+        Args:
+            snapshot: Catalog and indexes to recommend from
+        """
+        self.product_recommender.swap_catalog(snapshot.products_df, snapshot.catalog_index, snapshot.vector_index)
+        if self.local_extractor is not None and self.local_extractor.vibe_resolver is not None:
+            self.local_extractor.vibe_resolver = snapshot.vector_index
 
     def _build_prompt(self, message: str, conversation_manager: ConversationManager) -> str:
         """Build the prompt for AI"""
-        logger.info(f"Conversation history: {conversation_manager.get_messages()}")
-        logger.info(f"Current attributes: {conversation_manager.get_attributes()}")
+        logger.debug("Conversation history: %s", conversation_manager.get_messages())
+        logger.debug("Current attributes: %s", conversation_manager.get_attributes())
         
         sample_products = self.products_df.head(5).to_dict('records')
         
@@ -160,73 +213,253 @@ RESPONSE FORMAT:
 JSON Response:
 """
         
-    async def process_message(self, message: str) -> Dict:
+    async def process_message(self, message: str, conversation_manager: ConversationManager) -> Dict:
         """
         Process a user message and generate appropriate response with recommendations.
         
+        The catalog, recommender and AI handler are shared across sessions and only read here;
+        all per-user state lives in the session's conversation manager.
+        
         Args:
             message: User's input message
+            conversation_manager: Conversation state of the current session
             
         Returns:
             Dict containing response message, type, and recommendations
         """
         try:
             # Add user message to conversation history
-            self.conversation_manager.add_message("user", message)
+            conversation_manager.add_message("user", message)
+            
+            # Fully specified queries are answered locally without the LLM
+            local_response = self._try_local_response(message, conversation_manager)
+            if local_response is not None:
+                return local_response
             
             # Get AI response
-            ai_response = await self.ai_response_handler.get_ai_response(message, self.conversation_manager)
-            logger.debug(f"AI Response: {ai_response}")
+            ai_response = await self.ai_response_handler.get_ai_response(message, conversation_manager)
+            logger.debug("AI Response: %s", ai_response)
             
-            # Update conversation state with extracted and inferred attributes
-            if isinstance(ai_response, dict):
-                # Get current attributes before updating
-                current_attrs = self.conversation_manager.get_attributes()
-                
-                # Extract new attributes
-                new_extracted = ai_response.get('extracted_attributes', {})
-                new_inferred = ai_response.get('inferred_attributes', {})
-                
-                # Update attributes
-                self.conversation_manager.update_attributes(new_extracted, new_inferred)
-                logger.debug(f"Updated attributes: {self.conversation_manager.get_attributes()}")
-                
-                # Handle different response types
-                response_type = ai_response.get('type')
-                
-                # Check if we've reached the followup limit
-                if not self.conversation_manager.should_ask_followup():
-                    logger.info("Followup limit reached, forcing recommendation response")
-                    response = self.response_formatter.create_recommendation_response()
-                    return response
+            return self._respond(message, ai_response, conversation_manager)
+            
+        except Exception as e:
+            logger.error("Error processing message: %s", e)
+            raise
+    
+    async def stream_message(self, message: str, conversation_manager: ConversationManager) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Process a user message, yielding each part of the response as soon as it is ready.
+        
+        Args:
+            message: User's input message
+            conversation_manager: Conversation state of the current session
+            
+        Yields:
+            ("attributes", ...) once the attributes are parsed, ("products", ...) for recommendations,
+            ("token", ...) for each piece of the conversational message and finally ("done", response)
+            where response is what process_message would have returned, with the message the
+            tokens spelled out when the model's message was streamed
+        """
+        conversation_manager.add_message("user", message)
+        
+        local_response = self._try_local_response(message, conversation_manager)
+        if local_response is not None:
+            yield "attributes", {"type": "recommendation", "attributes": conversation_manager.get_attributes()}
+            yield "products", self._products_event(local_response)
+            yield "token", {"text": local_response["message"]}
+            yield "done", local_response
+            return
+        
+        fields: Dict = {}
+        ai_response = None
+        recommendation_response = None
+        attributes_sent = False
+        streamed_tokens = []
+        pending_tokens = []
+        
+        async for kind, data in self.ai_response_handler.stream_ai_response(message, conversation_manager):
+            if kind == "field":
+                key, value = data
+                fields[key] = value
+            elif kind == "complete":
+                ai_response = data
+            
+            # Attributes are sent once both attribute fields are parsed, or when the message starts
+            ready = ('extracted_attributes' in fields and 'inferred_attributes' in fields) \
+                or kind in ("message_delta", "complete")
+            if ready and not attributes_sent:
+                source = ai_response if ai_response is not None else fields
+                self._update_attributes(source, conversation_manager, message)
+                attributes_sent = True
+                yield "attributes", {"type": source.get('type'), "attributes": conversation_manager.get_attributes()}
                 
-                if response_type == 'followup':
-                    logger.info(f"Creating followup response for followup count {self.conversation_manager.get_followup_count()}")
-                    self.conversation_manager.increment_followup_count()
-                    return self.response_formatter.create_followup_response(ai_response)
-                elif response_type == 'direct_conversation':
-                    # Add assistant message to conversation history
-                    self.conversation_manager.add_message("assistant", ai_response['message'])
-                    return {
-                        "type": "direct_conversation",
-                        "message": ai_response['message'],
-                        "followup_question": ai_response.get('followup_question', ''),
-                        "attributes_so_far": self.conversation_manager.get_attributes(),
-                        "recommendations": [],
-                        "messages": self.conversation_manager.get_messages()
-                    }
-                else:
-                    # Force recommendation response if it's already a recommendation
-                    logger.info("Creating recommendation response")
-                    response = self.response_formatter.create_recommendation_response()
-                    return response
+                if 'type' in source and self._will_recommend(source['type'], conversation_manager):
+                    recommendation_response = self.response_formatter.create_recommendation_response(conversation_manager)
+                    yield "products", self._products_event(recommendation_response)
+            
+            if kind == "message_delta":
+                pending_tokens.append(data)
+            if attributes_sent:
+                for text in pending_tokens:
+                    streamed_tokens.append(text)
+                    yield "token", {"text": text}
+                pending_tokens = []
+        
+        if ai_response is None:
+            ai_response = self.ai_response_handler._fallback_response(message)
+        
+        response = self._respond(message, ai_response, conversation_manager, recommendation_response)
+        if recommendation_response is None and response.get("type") == "recommendation":
+            yield "products", self._products_event(response)
+        if streamed_tokens:
+            # The client already shows the streamed message, so that is what is returned and saved
+            streamed = "".join(streamed_tokens)
+            if response["message"] != streamed:
+                response = {**response, "message": streamed}
+                conversation_manager.replace_reply(streamed)
+        else:
+            yield "token", {"text": response["message"]}
+        yield "done", response
+    
+    def _try_local_response(self, message: str, conversation_manager: ConversationManager) -> Optional[Dict]:
+        """Recommendation response built without the LLM, or None if the message needs the model"""
+        if self.local_extractor is None:
+            return None
+        with stage("extract"):
+            local_response = self.local_extractor.try_extract(message)
+        if local_response is None:
+            return None
+        metrics.count("local_extraction_short_circuit")
+        self._update_attributes(local_response, conversation_manager)
+        return self.response_formatter.create_recommendation_response(conversation_manager)
+    
+    def _update_attributes(self, ai_response: Dict, conversation_manager: ConversationManager,
+                           message: Optional[str] = None):
+        """
+        Update conversation state with extracted and inferred attributes.
+        
+        When the message is given, vibe hints fill in inferred attributes the response
+        leaves out; the response's own values win.
+        """
+        new_extracted = ai_response.get('extracted_attributes', {})
+        new_inferred = ai_response.get('inferred_attributes', {})
+        if message is not None:
+            hints = self.vibe_engine.infer(message)
+            new_inferred = {
+                **{attr: hint for attr, hint in hints.items() if attr not in new_extracted},
+                **(new_inferred or {})
+            }
+        conversation_manager.update_attributes(new_extracted, new_inferred)
+        conversation_manager.update_ranking_hints(ai_response.get('ranking_hints', {}))
+        logger.debug("Updated attributes: %s", conversation_manager.get_attributes())
+    
+    def more_recommendations(self, conversation_manager: ConversationManager, cursor: int, limit: int = 3) -> Dict:
+        """
+        Get the next page of the session's last recommendations without calling the model.
+        
+        Args:
+            conversation_manager: Conversation state of the current session
+            cursor: Position in the ranking to start from
+            limit: Maximum number of recommendations to return
             
-            # If we get here, something went wrong with the AI response
-            fallback_response = self.ai_response_handler._fallback_response(message)
-            # Add fallback message to conversation history
-            self.conversation_manager.add_message("assistant", fallback_response['message'])
-            return fallback_response
+        Returns:
+            Dict containing the recommendations and the cursor of the next page
+        """
+        return self.response_formatter.create_page_response(conversation_manager, cursor, limit)
+    
+    def recommend_batch(self, attribute_sets: Iterable[Dict], top_k: int = 3) -> Iterator[Dict]:
+        """
+        Recommend products for many attribute sets without the model or any session.
+        
+        Args:
+            attribute_sets: Attribute dicts, in the shape conversations collect them
+            top_k: Recommendations per attribute set
             
-        except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
-            raise
\ No newline at end of file
+        Yields:
+            Dict per attribute set, in input order, with its index and recommendations
+        """
+        attribute_sets = list(attribute_sets)
+        ranked_sets = self.product_recommender.rank_batch(attribute_sets, top_k)
+        for position, (attributes, ranked) in enumerate(zip(attribute_sets, ranked_sets)):
+            yield {
+                "index": position,
+                "attributes": attributes,
+                **self.response_formatter.create_batch_response(attributes, ranked, top_k)
+            }
+    
+    @staticmethod
+    def _will_recommend(response_type: str, conversation_manager: ConversationManager) -> bool:
+        """Whether _respond will answer this response type with recommendations"""
+        if not conversation_manager.should_ask_followup():
+            return True
+        return response_type not in ('followup', 'direct_conversation')
+    
+    @staticmethod
+    def _products_event(response: Dict) -> Dict:
+        """Products event payload for a recommendation response"""
+        return {
+            "recommendations": response.get("recommendations", []),
+            "is_fallback": response.get("is_fallback", False),
+            "next_cursor": response.get("next_cursor")
+        }
+    
+    def _respond(
+        self,
+        message: str,
+        ai_response: Dict,
+        conversation_manager: ConversationManager,
+        recommendation_response: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Turn a parsed AI response into the agent response.
+        
+        Args:
+            message: User's input message
+            ai_response: Parsed AI response
+            conversation_manager: Conversation state of the current session
+            recommendation_response: Recommendation response already built while streaming
+            
+        Returns:
+            Dict containing response message, type, and recommendations
+        """
+        if recommendation_response is not None:
+            return recommendation_response
+        
+        # Update conversation state with extracted and inferred attributes
+        if isinstance(ai_response, dict):
+            self._update_attributes(ai_response, conversation_manager, message)
+            
+            # Handle different response types
+            response_type = ai_response.get('type')
+            
+            # Check if we've reached the followup limit
+            if not conversation_manager.should_ask_followup():
+                logger.info("Followup limit reached, forcing recommendation response")
+                response = self.response_formatter.create_recommendation_response(conversation_manager)
+                return response
+            
+            if response_type == 'followup':
+                logger.info("Creating followup response for followup count %s", conversation_manager.get_followup_count())
+                conversation_manager.increment_followup_count()
+                return self.response_formatter.create_followup_response(ai_response, conversation_manager)
+            elif response_type == 'direct_conversation':
+                # Add assistant message to conversation history
+                conversation_manager.add_message("assistant", ai_response['message'])
+                return {
+                    "type": "direct_conversation",
+                    "message": ai_response['message'],
+                    "followup_question": ai_response.get('followup_question', ''),
+                    "attributes_so_far": conversation_manager.get_attributes(),
+                    "recommendations": []
+                }
+            else:
+                # Force recommendation response if it's already a recommendation
+                logger.info("Creating recommendation response")
+                response = self.response_formatter.create_recommendation_response(conversation_manager)
+                return response
+        
+        # If we get here, something went wrong with the AI response
+        fallback_response = self.ai_response_handler._fallback_response(message)
+        # Add fallback message to conversation history
+        conversation_manager.add_message("assistant", fallback_response['message'])
+        return fallback_response
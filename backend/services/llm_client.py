@@ -0,0 +1,255 @@
+import asyncio
+import copy
+import json
+import logging
+import random
+import re
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+import google.generativeai as genai
+from .attribute_extractor import LocalAttributeExtractor
+from .prompt_builder import estimate_tokens
+from .prompt_context import GeminiContextBackend, PromptContext
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponse(NamedTuple):
+    """A model response, or one piece of a streamed response"""
+    text: str
+    prompt_chars: int = 0  # Characters actually sent for this request, set once per request
+    usage: Optional[Dict[str, int]] = None  # Token counts reported by the backend
+
+
+class LLMClient:
+    """
+    Base class for language model backends.
+
+    A client is created with the static prompt prefix and decides itself how that prefix
+    reaches the model; each call only passes the per-turn prompt.
+    """
+
+    model_name = ""  # Identifies the model, part of the response cache key
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        """Generate a complete response for a per-turn prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> AsyncIterator[LLMResponse]:
+        """Generate a response as an async iterator of text pieces"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Get backend specific counters"""
+        return {}
+
+    def close(self):
+        """Release any resources held by the client"""
+
+
+class GeminiClient(LLMClient):
+    """Google Gemini backend, with the static prompt held by a PromptContext"""
+
+    MODEL_NAME = 'gemini-2.0-flash'
+
+    def __init__(self, api_key: str, static_prompt: str, model_name: str = MODEL_NAME,
+                 context_mode: str = 'auto', cache_ttl: float = 3600, backend=None):
+        """
+        Initialize the Gemini client.
+
+        Args:
+            api_key: Google Gemini API key
+            static_prompt: Prompt prefix that is the same for every request
+            model_name: Gemini model to call
+            context_mode: PromptContext mode for the static prompt
+            cache_ttl: Seconds cached prompt content lives after each create or refresh
+            backend: SDK adapter, GeminiContextBackend unless a fake is given
+        """
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.static_prompt = static_prompt
+        self.context = PromptContext(
+            static_prompt, backend or GeminiContextBackend(model_name), mode=context_mode, ttl=cache_ttl
+        )
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        model, prompt = await self._acquire(prompt)
+        try:
+            response = await model.generate_content_async(prompt)
+            return LLMResponse(response.text, len(prompt), self._usage(response))
+        except Exception:
+            self.context.invalidate()
+            raise
+
+    async def stream(self, prompt: str) -> AsyncIterator[LLMResponse]:
+        model, prompt = await self._acquire(prompt)
+        try:
+            response = await model.generate_content_async(prompt, stream=True)
+            yield LLMResponse("", len(prompt))
+            async for chunk in response:
+                yield LLMResponse(chunk.text)
+            yield LLMResponse("", usage=self._usage(response))
+        except Exception:
+            self.context.invalidate()
+            raise
+
+    def stats(self) -> Dict:
+        return {"backend": "gemini", **self.context.stats()}
+
+    def close(self):
+        self.context.close()
+
+    async def _acquire(self, prompt: str):
+        """Get the model to call and the prompt to send it"""
+        model, inline = await self.context.acquire()
+        return model, (self.static_prompt + prompt) if inline else prompt
+
+    @staticmethod
+    def _usage(response) -> Optional[Dict[str, int]]:
+        """Token counts from a response, when the SDK reports them"""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return None
+        return {
+            "prompt_tokens": getattr(usage, 'prompt_token_count', 0) or 0,
+            "response_tokens": getattr(usage, 'candidates_token_count', 0) or 0,
+            "cached_tokens": getattr(usage, 'cached_content_token_count', 0) or 0
+        }
+
+
+class MockLLMClient(LLMClient):
+    """
+    Deterministic local backend for load tests and offline development.
+
+    Latency is drawn from a seeded distribution, and responses are either canned JSON
+    objects (string values may use {message}) or built from the user's message with the
+    local attribute extractor, so the rest of the pipeline sees realistic attributes.
+    """
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+    model_name = "mock"
+
+    # Pulls the user message and followup count back out of the per-turn prompt
+    MESSAGE_PATTERN = re.compile(r'- User message: "(.*)"\n')
+    FOLLOWUP_PATTERN = re.compile(r'- Followup count: (\d+)/')
+
+    def __init__(self, latency_ms: float = 800, distribution: str = 'lognormal', sigma: float = 0.4,
+                 seed: int = 0, responses: Optional[List[Dict]] = None, chunk_size: int = 24,
+                 chunk_delay_ms: float = 15):
+        """
+        Initialize the mock client.
+
+        Args:
+            latency_ms: Fixed latency, uniform mean or lognormal median until the first piece
+            distribution: One of DISTRIBUTIONS
+            sigma: Shape of the lognormal distribution
+            seed: Random seed, the same seed and call order give the same latencies
+            responses: Canned response objects, used in rotation instead of extraction
+            chunk_size: Characters per streamed piece
+            chunk_delay_ms: Delay between streamed pieces
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.responses = responses
+        self.chunk_size = chunk_size
+        self.chunk_delay_ms = chunk_delay_ms
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._extractor = LocalAttributeExtractor() if responses is None else None
+        logger.info("Initialized mock LLM client (%s latency around %sms)", distribution, latency_ms)
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        text = self._respond(prompt)
+        await asyncio.sleep(self._latency() + self.chunk_delay_ms * len(self._chunks(text)) / 1000)
+        return LLMResponse(text, len(prompt), self._usage(prompt, text))
+
+    async def stream(self, prompt: str) -> AsyncIterator[LLMResponse]:
+        text = self._respond(prompt)
+        yield LLMResponse("", len(prompt))
+        await asyncio.sleep(self._latency())
+        for position, chunk in enumerate(self._chunks(text)):
+            if position:
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+            yield LLMResponse(chunk)
+        yield LLMResponse("", usage=self._usage(prompt, text))
+
+    def stats(self) -> Dict:
+        return {"backend": "mock", "calls": self.calls, "distribution": self.distribution, "latency_ms": self.latency_ms}
+
+    def _latency(self) -> float:
+        """Seconds until the first piece of a response"""
+        if self.distribution == 'fixed':
+            return self.latency_ms / 1000
+        if self.distribution == 'uniform':
+            return self._rng.uniform(0, 2 * self.latency_ms) / 1000
+        return self._rng.lognormvariate(0, self.sigma) * self.latency_ms / 1000
+
+    def _chunks(self, text: str) -> List[str]:
+        """Split a response into streamed pieces"""
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+
+    def _respond(self, prompt: str) -> str:
+        """Build the JSON response text for a prompt"""
+        self.calls += 1
+        match = self.MESSAGE_PATTERN.search(prompt)
+        message = match.group(1) if match else ""
+        if self.responses:
+            response = self._fill(copy.deepcopy(self.responses[(self.calls - 1) % len(self.responses)]), message)
+            return json.dumps(response)
+
+        extraction = self._extractor.extract(message)
+        extracted = extraction["extracted_attributes"]
+        followups = self.FOLLOWUP_PATTERN.search(prompt)
+        if 'category' in extracted or (followups and int(followups.group(1)) >= 2):
+            response = {
+                "type": "recommendation",
+                "extracted_attributes": extracted,
+                "inferred_attributes": extraction["inferred_attributes"],
+                "message": "Here are some pieces I think you'll love!"
+            }
+        else:
+            response = {
+                "type": "followup",
+                "extracted_attributes": extracted,
+                "inferred_attributes": extraction["inferred_attributes"],
+                "followup_question": "What are you shopping for: a dress, top, skirt or pants?",
+                "message": "Love it! Tell me a bit more so I can narrow things down."
+            }
+        return json.dumps(response)
+
+    def _fill(self, value, message: str):
+        """Substitute {message} into the string values of a canned response"""
+        if isinstance(value, str):
+            return value.replace("{message}", message)
+        if isinstance(value, dict):
+            return {k: self._fill(v, message) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._fill(v, message) for v in value]
+        return value
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> Dict[str, int]:
+        """Estimated token counts, shaped like the Gemini ones"""
+        return {"prompt_tokens": estimate_tokens(prompt), "response_tokens": estimate_tokens(text), "cached_tokens": 0}
+
+
+def create_llm_client(backend: str, api_key: str, static_prompt: str, **options) -> LLMClient:
+    """
+    Create an LLM client.
+
+    Args:
+        backend: "gemini" or "mock"
+        api_key: Google Gemini API key, unused by the mock
+        static_prompt: Prompt prefix that is the same for every request
+        options: Backend specific constructor arguments
+
+    Returns:
+        Configured LLMClient
+    """
+    if backend == "gemini":
+        return GeminiClient(api_key, static_prompt, **options)
+    if backend == "mock":
+        return MockLLMClient(**options)
+    raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,200 @@
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket bounds in seconds, from sub-millisecond catalog work up to slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    """Base for metrics with a fixed set of label names"""
+
+    TYPE = ''
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Label values in label name order"""
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = '') -> str:
+        """Render label values as {name="value",...}"""
+        parts = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            parts.append(extra)
+        return '{' + ','.join(parts) + '}' if parts else ''
+
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines for this metric"""
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    TYPE = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values)
+        return lines
+
+
+class Gauge(_Metric):
+    """Current value, read from a callback when the metrics are scraped"""
+
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        try:
+            lines.append(f"{self.name} {_number(self.read())}")
+        except Exception as e:
+            logger.warning("Failed to read gauge %s: %s", self.name, e)
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                labels = self._format_labels(key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics exposed in the Prometheus text format.
+    When disabled, recording calls return immediately so instrumented code pays almost nothing.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+    def __init__(self, prefix: str = 'fashion_', enabled: bool = True):
+        """
+        Initialize the registry.
+
+        Args:
+            prefix: Prefix added to every metric name
+            enabled: Whether recording calls are kept
+        """
+        self.prefix = prefix
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+        self.stage_seconds = self.histogram(
+            'stage_duration_seconds', "Time spent in each stage of a request", ['stage']
+        )
+        self.request_seconds = self.histogram(
+            'http_request_duration_seconds', "HTTP request latency", ['method', 'route', 'status']
+        )
+        self.events = self.counter('events_total', "Hot-path events such as cache hits and fallbacks", ['event'])
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help_text, read))
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record the duration of a request stage"""
+        if self.enabled:
+            self.stage_seconds.observe(seconds, stage=stage)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        """Record the latency of an HTTP request"""
+        if self.enabled:
+            self.request_seconds.observe(seconds, method=method, route=route, status=status)
+
+    def count(self, event: str, amount: float = 1):
+        """Count a hot-path event, e.g. llm_cache_hit or greeting_short_circuit"""
+        if self.enabled:
+            self.events.inc(amount, event=event)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: _Metric):
+        # Re-registering a name (e.g. a gauge when the app module is reloaded) replaces the earlier metric
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    """Format a sample value, integers without a trailing .0"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Shared registry the services record into; main.py switches it off with METRICS_ENABLED=0
+metrics = MetricsRegistry()
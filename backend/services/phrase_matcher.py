@@ -0,0 +1,115 @@
+import re
+from collections import deque
+from typing import Any, Dict, List, NamedTuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_APOSTROPHE_PATTERN = re.compile(r"['’]")
+
+
+class PhraseMatch(NamedTuple):
+    """A phrase found in a text, as token positions [start, end)"""
+    start: int
+    end: int
+    phrase: str
+    payloads: List[Any]
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over word tokens.
+    Finds every registered phrase in one pass over the text and resolves overlaps
+    with leftmost-longest semantics, so lookup cost does not grow with the phrase count.
+    """
+
+    def __init__(self):
+        """Initialize an empty automaton"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        self._phrase: List[str] = [""]
+        self._payloads: List[List[Any]] = [[]]
+        # Nearest node on the failure chain that ends a phrase
+        self._output: List[int] = [0]
+        self._compiled = False
+
+    def __len__(self) -> int:
+        return sum(1 for payloads in self._payloads if payloads)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Split text into lowercase word tokens; apostrophes are dropped so 70's matches 70s"""
+        return _TOKEN_PATTERN.findall(_APOSTROPHE_PATTERN.sub('', text.lower()))
+
+    def add(self, phrase: str, payload: Any):
+        """
+        Register a phrase. A phrase added more than once keeps every payload.
+
+        Args:
+            phrase: Phrase to match, compared token by token
+            payload: Value returned with every match of the phrase
+        """
+        tokens = self.tokenize(phrase)
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][token] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._phrase.append("")
+                self._payloads.append([])
+                self._output.append(0)
+            node = next_node
+        self._phrase[node] = " ".join(tokens)
+        self._payloads[node].append(payload)
+        self._compiled = False
+
+    def compile(self):
+        """Build failure and output links; called automatically before the first lookup"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                target = self._fail[child]
+                self._output[child] = target if self._payloads[target] else self._output[target]
+                queue.append(child)
+        self._compiled = True
+
+    def find_all(self, text: str) -> List[PhraseMatch]:
+        """Find every occurrence of every phrase, including overlapping ones"""
+        if not self._compiled:
+            self.compile()
+        matches = []
+        node = 0
+        for position, token in enumerate(self.tokenize(text)):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            hit = node if self._payloads[node] else self._output[node]
+            while hit:
+                start = position + 1 - self._depth[hit]
+                matches.append(PhraseMatch(start, position + 1, self._phrase[hit], self._payloads[hit]))
+                hit = self._output[hit]
+        return matches
+
+    def find(self, text: str) -> List[PhraseMatch]:
+        """Find non-overlapping phrases, preferring the leftmost and then the longest match"""
+        selected = []
+        covered_until = 0
+        for match in sorted(self.find_all(text), key=lambda m: (m.start, -(m.end - m.start))):
+            if match.start >= covered_until:
+                selected.append(match)
+                covered_until = match.end
+        return selected
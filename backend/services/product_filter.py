@@ -1,9 +1,30 @@
 import logging
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .catalog_index import CatalogIndex
+from .vector_index import VectorIndex
+from .metrics import metrics
+from .stage_timer import stage
 
 logger = logging.getLogger(__name__)
 
+# Distinct similarity values _top_k tells apart when breaking score ties
+SIMILARITY_LEVELS = 1024
+
+# Profile x product bits rank_batch holds per matrix, bounding its working memory
+BATCH_CELLS = 1 << 26
+
+
+class RankedProducts(NamedTuple):
+    """Ranked filter results as compact arrays, best match first"""
+    positions: np.ndarray  # Catalog row positions
+    scores: np.ndarray  # Score per ranked row
+    total: int  # Number of products that passed the filters
+    removed_filters: List[str]  # Filters dropped by the fallback logic
+    version: str = ''  # Version of the catalog the positions refer to
+
+
 class ProductFilter:
     """Handles product filtering and scoring"""
     
@@ -21,124 +42,454 @@ class ProductFilter:
         'occasion': 1       # Lowest priority - optional context
     }
     
+    # Search sort name -> (column, descending), None column for the relevance ranking
+    SEARCH_SORTS = {
+        'relevance': (None, False),
+        'price_asc': ('price', False),
+        'price_desc': ('price', True),
+        'name': ('name', False)
+    }
+    
     @staticmethod
-    def filter_products(products_df: pd.DataFrame, attributes: Dict, top_k: int = 5) -> pd.DataFrame:
+    def filter_products(
+        products_df: pd.DataFrame,
+        attributes: Dict,
+        top_k: int = 5,
+        index: Optional[CatalogIndex] = None
+    ) -> pd.DataFrame:
         """Filter products based on attributes with smart fallback logic"""
-        logger.info(f"Starting product filtering with attributes: {attributes}")
-        logger.debug(f"Initial product count: {len(products_df)}")
+        index = ProductFilter._index_for(products_df, index)
+        ranked = ProductFilter.rank_products(products_df, attributes, top_k, limit=top_k, index=index)
+        return ProductFilter.page_frame(index, ranked, attributes, 0, top_k)
+    
+    @staticmethod
+    def rank_products(
+        products_df: pd.DataFrame,
+        attributes: Dict,
+        top_k: int = 5,
+        limit: Optional[int] = None,
+        index: Optional[CatalogIndex] = None,
+        vector_index: Optional[VectorIndex] = None,
+        hints: Optional[Dict] = None
+    ) -> RankedProducts:
+        """
+        Filter and rank products with the same fallback logic as filter_products.
+        
+        Args:
+            products_df: DataFrame containing product information
+            attributes: User preferences and requirements
+            top_k: Number of results the fallback logic tries to reach
+            limit: Number of ranked products to keep, all matches if None
+            index: Prebuilt index over products_df
+            vector_index: Embedding index that breaks score ties by similarity to the
+                soft attributes (vibe, style), when built for the same catalog
+            hints: Guessed attributes, e.g. from vibe resolution, that only order products
+                with equal scores and never filter them
+            
+        Returns:
+            RankedProducts holding the best limit matches in order
+        """
+        with stage("filter"):
+            logger.info("Starting product filtering with attributes: %s", attributes)
+            logger.debug("Initial product count: %s", len(products_df))
+            index = ProductFilter._index_for(products_df, index)
+        
+            removed_filters = []
+        
+            # Try filtering with all attributes first
+            matched = index.match(attributes)
+            count = index.count(matched)
+        
+            # If no results or not enough results, relax the non-essential filters
+            if count == 0 or count < top_k:
+                logger.info("Not enough results (%s), applying fallback logic", count)
+                metrics.count("filter_fallback_relaxation")
+            
+                # First try: Drop the cheapest set of non-essential filters (priority < 4)
+                matched, count, removed_filters = ProductFilter._plan_relaxation(index, attributes, top_k)
+            
+                # Second try: If still no results, try with only category and size
+                if count == 0:
+                    logger.info("No results after first fallback, trying with only category and size")
+                    essential_filters = {
+                        k: v for k, v in attributes.items() 
+                        if k in ['category', 'size'] and k in attributes
+                    }
+                    if essential_filters:
+                        metrics.count("filter_fallback_category_size")
+                        matched = index.match(essential_filters)
+                        count = index.count(matched)
+                        removed_filters = [k for k in attributes.keys() if k not in essential_filters]
+                        logger.info("Trying with only essential filters. New count: %s", count)
+            
+                # Final fallback: If still no results, try with just category
+                if count == 0 and 'category' in attributes:
+                    logger.info("No results after second fallback, trying with only category")
+                    metrics.count("filter_fallback_category")
+                    matched = index.match({'category': attributes['category']})
+                    count = index.count(matched)
+                    removed_filters = [k for k in attributes.keys() if k != 'category']
+                    logger.info("Trying with only category. New count: %s", count)
+        
+            # Score remaining products and keep the best limit of them
+            positions = index.positions(matched)
+            scores, _ = ProductFilter._score_products(index, positions, attributes)
+            keep = len(scores) if limit is None else limit
+            boosts = None
+            if hints:
+                boosts, _ = ProductFilter._score_products(
+                    index, positions, {k: v for k, v in hints.items() if k not in attributes}
+                )
+            similarity = ProductFilter._similarity(
+                vector_index, index, positions, scores, keep, {**(hints or {}), **attributes}
+            )
+            top = ProductFilter._top_k(scores, keep, similarity, boosts)
+        
+            logger.info("Final filtered product count: %s", count)
+            logger.debug("Removed filters: %s", removed_filters)
+        
+            return RankedProducts(positions[top].astype(np.int32), scores[top], count, removed_filters, index.version)
+    
+    @staticmethod
+    def rank_batch(
+        products_df: pd.DataFrame,
+        attribute_sets: List[Dict],
+        top_k: int = 5,
+        limit: Optional[int] = None,
+        index: Optional[CatalogIndex] = None,
+        vector_index: Optional[VectorIndex] = None
+    ) -> List[RankedProducts]:
+        """
+        Rank products for many attribute sets, with the same results as rank_products.
+        
+        Sets are matched together as a packed profiles x products bitset matrix, built
+        from one bitset per distinct requested value. Sets that need the fallback logic,
+        lower-scoring matches or a similarity tie-break go through rank_products.
+        
+        Args:
+            products_df: DataFrame containing product information
+            attribute_sets: Attribute dicts to rank for
+            top_k: Number of results the fallback logic tries to reach
+            limit: Number of ranked products to keep per set, all matches if None
+            index: Prebuilt index over products_df
+            vector_index: Embedding index used by rank_products for similarity tie-breaks
+            
+        Returns:
+            RankedProducts per attribute set, in input order
+        """
+        index = ProductFilter._index_for(products_df, index)
+        results: List[Optional[RankedProducts]] = [None] * len(attribute_sets)
+        chunk = max(1, BATCH_CELLS // max(index.size, 1))
+        for start in range(0, len(attribute_sets), chunk):
+            ranked = ProductFilter._rank_matrix(index, attribute_sets[start:start + chunk], top_k, limit, vector_index)
+            results[start:start + len(ranked)] = ranked
+        
+        scalar = [position for position, ranked in enumerate(results) if ranked is None]
+        metrics.count("batch_profile_vectorized", len(attribute_sets) - len(scalar))
+        metrics.count("batch_profile_scalar", len(scalar))
+        for position in scalar:
+            results[position] = ProductFilter.rank_products(
+                products_df, attribute_sets[position], top_k, limit, index=index, vector_index=vector_index
+            )
+        logger.info("Ranked %s attribute sets, %s through the single-set path", len(attribute_sets), len(scalar))
+        return results
+    
+    @staticmethod
+    def _rank_matrix(index: CatalogIndex, attribute_sets: List[Dict], top_k: int, limit: Optional[int],
+                     vector_index: Optional[VectorIndex]) -> List[Optional[RankedProducts]]:
+        """
+        Match and rank a chunk of attribute sets as one packed profiles x products bitset matrix.
+        
+        Every scored attribute is also a filter, so the best score among a set's matches
+        belongs to the matches that hit each scored value exactly. When those cover the
+        requested depth, the ranking is their first rows in catalog order, read off the
+        matrix without scoring any product.
+        
+        Returns:
+            RankedProducts per set, None for sets rank_products has to handle
+        """
+        matched = np.repeat(index.match({})[None, :], len(attribute_sets), axis=0)
+        best = matched.copy()
+        top_scores = np.zeros(len(attribute_sets), dtype=np.int32)
+        
+        for attr in sorted({attr for attributes in attribute_sets for attr in attributes}):
+            rows = [row for row, attributes in enumerate(attribute_sets) if attr in attributes]
+            # Bitsets of each distinct requested value, shared by the rows asking for it
+            distinct: Dict[str, int] = {}
+            filters: List[Optional[np.ndarray]] = []
+            exact: List[Optional[np.ndarray]] = []
+            ids = []
+            for row in rows:
+                value = attribute_sets[row][attr]
+                key = repr(value)
+                if key not in distinct:
+                    distinct[key] = len(filters)
+                    filters.append(index.attribute_bitset(attr, value))
+                    exact.append(index.exact_bitset(attr, value))
+                ids.append(distinct[key])
+            ids = np.array(ids)
+            ProductFilter._and_rows(matched, rows, ids, filters)
+            ProductFilter._and_rows(best, rows, ids, exact)
+            scored = np.array([exact[i] is not None for i in ids])
+            top_scores[np.array(rows)[scored]] += ProductFilter.ATTRIBUTE_PRIORITIES.get(attr, 1)
+        
+        np.bitwise_and(best, matched, out=best)
+        counts = index.count_rows(matched)
+        keep = np.minimum(counts, index.size if limit is None else limit)
+        positions = index.first_positions(best, keep)
+        # Rows whose exact matches do not fill the depth need lower scores, i.e. rank_products
+        covered = np.array([len(found) for found in positions]) >= keep
         
+        results: List[Optional[RankedProducts]] = []
+        for row, attributes in enumerate(attribute_sets):
+            count = int(counts[row])
+            if count == 0 or count < top_k or not covered[row] or (
+                vector_index is not None and vector_index.version == index.version and vector_index.query_text(attributes)
+            ):
+                results.append(None)
+                continue
+            results.append(RankedProducts(
+                positions[row], np.full(len(positions[row]), top_scores[row], dtype=np.int32), count, [], index.version
+            ))
+        return results
+    
+    @staticmethod
+    def _and_rows(matrix: np.ndarray, rows: List[int], ids: np.ndarray, bitsets: List[Optional[np.ndarray]]):
+        """AND bitsets[ids[i]] into matrix[rows[i]]; None bitsets leave their rows unconstrained"""
+        present = np.array([bitsets[i] is not None for i in ids])
+        if not present.any():
+            return
+        stacked = np.stack([bits if bits is not None else np.zeros_like(matrix[0]) for bits in bitsets])
+        targets = np.array(rows)[present]
+        matrix[targets] &= stacked[ids[present]]
+    
+    @staticmethod
+    def search(
+        products_df: pd.DataFrame,
+        attributes: Dict,
+        sort: str = 'relevance',
+        offset: int = 0,
+        limit: int = 20,
+        index: Optional[CatalogIndex] = None,
+        vector_index: Optional[VectorIndex] = None
+    ) -> Tuple[pd.DataFrame, RankedProducts]:
+        """
+        Structured product search: filter, sort and paginate without a conversation.
+        
+        Filters are only relaxed when nothing matches, so browsing a narrow selection
+        shows that selection rather than padding it with looser matches.
+        
+        Args:
+            products_df: DataFrame containing product information
+            attributes: Attribute filters
+            sort: One of SEARCH_SORTS; relevance is the recommendation ranking
+            offset: Number of sorted products to skip
+            limit: Maximum number of products to return
+            index: Prebuilt index over products_df
+            vector_index: Embedding index that breaks relevance ties by vibe similarity
+            
+        Returns:
+            Tuple of (page frame like page_frame's, RankedProducts for all the matches
+            the page was cut from)
+        """
+        if sort not in ProductFilter.SEARCH_SORTS:
+            raise ValueError(f"Unknown sort {sort!r}, expected one of {list(ProductFilter.SEARCH_SORTS)}")
+        index = ProductFilter._index_for(products_df, index)
+        # Relevance pages only need the ranking up to the page end; other orders need every match
+        depth = offset + limit if sort == 'relevance' else None
+        ranked = ProductFilter.rank_products(products_df, attributes, 1, depth, index=index, vector_index=vector_index)
+        
+        column, descending = ProductFilter.SEARCH_SORTS[sort]
+        if column is not None:
+            values = products_df[column].iloc[ranked.positions]
+            if column == 'price':
+                keys = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+                keys = -keys if descending else keys
+            else:
+                keys = values.astype(str).str.lower().to_numpy()
+            # Stable sort keeps relevance order among equal values
+            order = np.argsort(keys, kind='stable')
+            ranked = ranked._replace(positions=ranked.positions[order], scores=ranked.scores[order])
+        
+        return ProductFilter.page_frame(index, ranked, attributes, offset, offset + limit), ranked
+    
+    @staticmethod
+    def page_frame(index: CatalogIndex, ranked: RankedProducts, attributes: Dict, start: int, stop: int) -> pd.DataFrame:
+        """
+        Build the result frame for a slice of a ranking, slicing the DataFrame only for those rows.
+        
+        Args:
+            index: Catalog index the ranking was computed against
+            ranked: Ranking from rank_products
+            attributes: Attributes the ranking was computed for
+            start: First ranked row to include
+            stop: Row after the last one to include
+            
+        Returns:
+            DataFrame of the products with score and filtering metadata
+        """
+        positions = ranked.positions[start:stop]
+        # Re-derive the match masks for just this page to explain each match
+        _, matches = ProductFilter._score_products(index, positions, attributes)
+        matched_attributes = [
+            [attr for attr, mask in matches.items() if mask[row]] for row in range(len(positions))
+        ]
+        return index.products_df.iloc[positions].assign(
+            score=ranked.scores[start:stop],
+            matched_attributes=matched_attributes,
+            is_fallback=len(ranked.removed_filters) > 0,
+            removed_filters=str(ranked.removed_filters) if len(ranked.removed_filters) > 0 else ''
+        )
+    
+    @staticmethod
+    def _index_for(products_df: pd.DataFrame, index: Optional[CatalogIndex]) -> CatalogIndex:
+        """Check the catalog has the required columns and get an index built for it"""
         # Verify required columns exist
         required_columns = ['id', 'name', 'category', 'price', 'available_sizes']
         missing_columns = [col for col in required_columns if col not in products_df.columns]
         if missing_columns:
-            logger.error(f"Missing required columns: {missing_columns}")
+            logger.error("Missing required columns: %s", missing_columns)
             raise ValueError(f"DataFrame missing required columns: {missing_columns}")
         
-        filtered = products_df.copy()
-        removed_filters = []
-        
-        # Sort attributes by priority (lowest priority first)
-        sorted_attrs = sorted(
-            attributes.items(),
-            key=lambda x: ProductFilter.ATTRIBUTE_PRIORITIES.get(x[0], 0)
-        )
+        # Reuse the precompiled index when it was built for this catalog
+        if index is None or index.products_df is not products_df:
+            index = CatalogIndex(products_df)
+        return index
+    
+    @staticmethod
+    def _plan_relaxation(index: CatalogIndex, attributes: Dict, top_k: int):
+        """
+        Pick the non-essential filters to drop in a single pass over the catalog.
         
-        # Try filtering with all attributes first
-        filtered = ProductFilter._apply_filters(filtered, dict(sorted_attrs))
+        Each filter's bitset is computed once. Every candidate row is then encoded as the
+        set of non-essential filters it fails, so the result count of every relaxation
+        subset follows from a subset-sum over those codes without touching the catalog again.
+        Subsets are ranked by the ATTRIBUTE_PRIORITIES they give up, then by how many
+        filters they remove.
         
-        # If no results or not enough results, try removing filters one by one
-        if len(filtered) == 0 or len(filtered) < top_k:
-            logger.info(f"Not enough results ({len(filtered)}), applying fallback logic")
-            
-            # First try: Remove non-essential filters (priority < 4)
-            for attr, value in sorted_attrs:
-                if len(filtered) >= top_k:
-                    break
-                    
-                # Skip essential filters (priority >= 4)
-                if ProductFilter.ATTRIBUTE_PRIORITIES.get(attr, 0) >= 4:
-                    continue
-                
-                # Create new filter set without this attribute
-                current_filters = dict(sorted_attrs)
-                del current_filters[attr]
-                
-                # Try filtering with reduced set
-                new_filtered = ProductFilter._apply_filters(products_df.copy(), current_filters)
-                
-                if len(new_filtered) > len(filtered):
-                    filtered = new_filtered
-                    removed_filters.append(attr)
-                    logger.info(f"Removed filter '{attr}' to get more results. New count: {len(filtered)}")
+        Args:
+            index: Catalog index to match against
+            attributes: Requested attribute filters
+            top_k: Number of results wanted
             
-            # Second try: If still no results, try with only category and size
-            if len(filtered) == 0:
-                logger.info("No results after first fallback, trying with only category and size")
-                essential_filters = {
-                    k: v for k, v in attributes.items() 
-                    if k in ['category', 'size'] and k in attributes
-                }
-                if essential_filters:
-                    filtered = ProductFilter._apply_filters(products_df.copy(), essential_filters)
-                    removed_filters = [k for k in attributes.keys() if k not in essential_filters]
-                    logger.info(f"Trying with only essential filters. New count: {len(filtered)}")
-            
-            # Final fallback: If still no results, try with just category
-            if len(filtered) == 0 and 'category' in attributes:
-                logger.info("No results after second fallback, trying with only category")
-                filtered = ProductFilter._apply_filters(
-                    products_df.copy(), 
-                    {'category': attributes['category']}
-                )
-                removed_filters = [k for k in attributes.keys() if k != 'category']
-                logger.info(f"Trying with only category. New count: {len(filtered)}")
+        Returns:
+            Tuple of (matched bitset, result count, removed filter names)
+        """
+        essential = {}
+        removable = []
+        for attr, value in attributes.items():
+            if ProductFilter.ATTRIBUTE_PRIORITIES.get(attr, 0) >= 4:
+                essential[attr] = value
+                continue
+            bits = index.attribute_bitset(attr, value)
+            if bits is not None:
+                removable.append((attr, bits))
+        
+        # Lowest priority first, so ties resolve towards dropping the least important filters
+        removable.sort(key=lambda item: ProductFilter.ATTRIBUTE_PRIORITIES.get(item[0], 0))
+        base = index.match(essential)
+        positions = index.positions(base)
         
-        # Score remaining products
-        filtered = ProductFilter._score_products(filtered, attributes)
+        # Bit i of a row's code is set when the row fails removable filter i
+        codes = np.zeros(len(positions), dtype=np.int64)
+        for bit, (attr, bits) in enumerate(removable):
+            codes |= (~index.to_mask(bits)[positions]).astype(np.int64) << bit
         
-        # Add metadata about filtering process
-        filtered['is_fallback'] = len(removed_filters) > 0
-        filtered['removed_filters'] = str(removed_filters) if len(removed_filters) > 0 else ''
+        # counts[s] = rows whose failed filters are all inside subset s (subset-sum transform)
+        subsets = 1 << len(removable)
+        counts = np.bincount(codes, minlength=subsets)
+        costs = np.zeros(subsets, dtype=np.int64)
+        sizes = np.zeros(subsets, dtype=np.int64)
+        for bit, (attr, _) in enumerate(removable):
+            half = 1 << bit
+            counts.reshape(-1, 2, half)[:, 1, :] += counts.reshape(-1, 2, half)[:, 0, :]
+            costs.reshape(-1, 2, half)[:, 1, :] += ProductFilter.ATTRIBUTE_PRIORITIES.get(attr, 1)
+            sizes.reshape(-1, 2, half)[:, 1, :] += 1
         
-        logger.info(f"Final filtered product count: {len(filtered)}")
-        logger.debug(f"Removed filters: {removed_filters}")
+        # Cheapest subset that reaches top_k, otherwise the one with the most results
+        order = np.lexsort((sizes, costs, -np.minimum(counts, max(top_k, 1))))
+        best = int(order[0])
         
-        return filtered.head(top_k)
+        removed = [attr for bit, (attr, _) in enumerate(removable) if best >> bit & 1]
+        matched = base
+        for bit, (attr, bits) in enumerate(removable):
+            if not best >> bit & 1:
+                matched = np.bitwise_and(matched, bits)
+        count = int(counts[best])
+        if removed:
+            logger.info("Removed filters %s to get more results. New count: %s", removed, count)
+        return matched, count, removed
     
     @staticmethod
-    def _apply_filters(products_df: pd.DataFrame, filters: Dict) -> pd.DataFrame:
-        """Apply filters to products DataFrame"""
-        filtered = products_df.copy()
-        
-        for attr, value in filters.items():
-            if attr == 'price_max':
-                filtered = filtered[filtered['price'] <= value]
-            elif attr == 'size':
-                # Check if size is in available_sizes
-                filtered = filtered[filtered['available_sizes'].str.contains(value, case=False, na=False)]
-            elif attr in filtered.columns:
-                if isinstance(value, list):
-                    # For lists, check if any value matches
-                    mask = filtered[attr].str.lower().isin([v.lower() for v in value])
-                    filtered = filtered[mask]
-                else:
-                    # For single values, use contains for better matching
-                    filtered = filtered[filtered[attr].str.contains(value, case=False, na=False)]
-        
-        return filtered
+    def _score_products(index: CatalogIndex, positions: np.ndarray, attributes: Dict):
+        """
+        Score products based on attribute matches.
+        
+        Each matching attribute adds its ATTRIBUTE_PRIORITIES weight, computed over the
+        integer-coded attribute columns of the candidate rows.
+        
+        Args:
+            index: Catalog index holding the coded attribute columns
+            positions: Row positions of the candidate products
+            attributes: User preferences and requirements
+            
+        Returns:
+            Tuple of (score per candidate, attribute -> boolean match mask), aligned with positions
+        """
+        scores = np.zeros(len(positions), dtype=np.int32)
+        matches: Dict[str, np.ndarray] = {}
+        for attr, value in attributes.items():
+            wanted = index.value_codes(attr, value)
+            if not wanted:
+                continue
+            matches[attr] = np.isin(index.codes[attr][positions], wanted)
+            scores += ProductFilter.ATTRIBUTE_PRIORITIES.get(attr, 1) * matches[attr]
+        return scores, matches
     
     @staticmethod
-    def _score_products(products_df: pd.DataFrame, attributes: Dict) -> pd.DataFrame:
-        """Score products based on attribute matches"""
-        scored = products_df.copy()
-        scored['score'] = 0
+    def _similarity(vector_index: Optional[VectorIndex], index: CatalogIndex, positions: np.ndarray,
+                    scores: np.ndarray, keep: int, attributes: Dict) -> Optional[np.ndarray]:
+        """
+        Similarity of the candidates to the soft attributes, None when there is nothing to compare.
         
-        for attr, value in attributes.items():
-            if attr in scored.columns:
-                if isinstance(value, list):
-                    scored['score'] += scored[attr].isin(value).astype(int)
-                else:
-                    scored['score'] += (scored[attr] == value).astype(int)
-        
-        # Sort by score in descending order
-        return scored.sort_values('score', ascending=False)
\ No newline at end of file
+        Similarity only orders candidates with equal scores, so it is computed just for those
+        that can still make the top keep; the rest get the lowest similarity.
+        """
+        if vector_index is None or vector_index.version != index.version or len(positions) == 0 or keep <= 0:
+            return None
+        text = vector_index.query_text(attributes)
+        if not text:
+            return None
+        cutoff = np.partition(scores, len(scores) - keep)[len(scores) - keep] if keep < len(scores) else scores.min()
+        contenders = np.flatnonzero(scores >= cutoff)
+        similarity = np.full(len(positions), -np.inf, dtype=np.float32)
+        similarity[contenders] = vector_index.score(text, positions[contenders])
+        similarity[~np.isfinite(similarity)] = similarity[contenders].min()
+        return similarity
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, top_k: int, similarity: Optional[np.ndarray] = None,
+               boosts: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Select the indices of the top_k scores, highest first.
+        
+        Ties go to the candidate matching more hint weight when boosts are given, then to
+        the more similar one when similarity is given, then keep catalog order, so results
+        are deterministic.
+        """
+        if len(scores) == 0 or top_k <= 0:
+            return np.empty(0, dtype=np.int64)
+        # Unique sort key: higher score first, then boost, then higher similarity, then earlier candidate
+        keys = (scores.max() - scores).astype(np.int64)
+        if boosts is not None and boosts.max() > boosts.min():
+            keys = keys * (int(boosts.max() - boosts.min()) + 1) + (boosts.max() - boosts).astype(np.int64)
+        if similarity is not None and similarity.max() > similarity.min():
+            span = similarity.max() - similarity.min()
+            rank = np.round((similarity.max() - similarity) / span * (SIMILARITY_LEVELS - 1)).astype(np.int64)
+            keys = keys * SIMILARITY_LEVELS + rank
+        keys = keys * len(scores) + np.arange(len(scores))
+        if len(keys) > top_k:
+            top = np.argpartition(keys, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(keys))
+        return top[np.argsort(keys[top])]
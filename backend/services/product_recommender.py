@@ -1,6 +1,13 @@
+import hashlib
 import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional
 import pandas as pd
-from typing import Dict, List
+from .catalog_index import CatalogIndex
+from .product_filter import ProductFilter, RankedProducts
+from .vector_index import VectorIndex
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -8,28 +15,259 @@ class ProductRecommender:
     """
     Handles product recommendations and filtering.
     Works with ProductFilter to provide smart recommendations.
+    Rankings are memoized per canonical attribute set and catalog version.
     """
     
-    def __init__(self, products_df: pd.DataFrame):
+    def __init__(self, products_df: pd.DataFrame, catalog_index: Optional[CatalogIndex] = None,
+                 cache_size: int = 256, ranking_depth: int = 100, vector_index: Optional[VectorIndex] = None):
         """
         Initialize the product recommender.
         
         Args:
             products_df: DataFrame containing product information
+            catalog_index: Prebuilt index over products_df, built here if not given
+            cache_size: Maximum number of memoized rankings, 0 disables the cache
+            ranking_depth: Number of ranked products kept per attribute set for paging
+            vector_index: Optional embedding index used to break ranking ties by vibe similarity
         """
-        self.products_df = products_df
-        logger.info(f"Initialized ProductRecommender with {len(products_df)} products")
+        catalog_index = catalog_index or CatalogIndex(products_df)
+        # Catalog, index and vector index are replaced together by swap_catalog, so every
+        # operation reads this tuple once and never mixes two catalogs
+        self._catalog = (products_df, catalog_index, vector_index)
+        self.cache_size = cache_size
+        self.ranking_depth = ranking_depth
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stale_rankings = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_version = catalog_index.version
+        self._lock = threading.Lock()
+        logger.info("Initialized ProductRecommender with %s products", len(products_df))
+    
+    @property
+    def products_df(self) -> pd.DataFrame:
+        """Catalog currently recommended from"""
+        return self._catalog[0]
+    
+    @property
+    def catalog_index(self) -> CatalogIndex:
+        """Index over the current catalog"""
+        return self._catalog[1]
+    
+    @property
+    def vector_index(self) -> Optional[VectorIndex]:
+        """Embedding index over the current catalog, if any"""
+        return self._catalog[2]
+    
+    def swap_catalog(self, products_df: pd.DataFrame, catalog_index: CatalogIndex,
+                     vector_index: Optional[VectorIndex] = None):
+        """
+        Serve recommendations from a new catalog.
         
-    def get_recommendations(self, attributes: Dict, top_k: int = 3) -> pd.DataFrame:
+        Rankings already in flight finish against the catalog they started with;
+        memoized rankings of the old catalog are dropped on the next lookup.
+        """
+        self._catalog = (products_df, catalog_index, vector_index)
+        logger.info("Switched recommendations to catalog version %s (%s products)",
+                    catalog_index.version, len(products_df))
+    
+    def get_recommendations(self, attributes: Dict, top_k: int = 3, hints: Optional[Dict] = None) -> pd.DataFrame:
         """
         Get product recommendations based on attributes.
         
         Args:
             attributes: User preferences and requirements
             top_k: Number of recommendations to return
+            hints: Guessed attributes that only order equally scored products
             
         Returns:
             DataFrame containing recommended products
         """
-        from .product_filter import ProductFilter
-        return ProductFilter.filter_products(self.products_df, attributes, top_k)
\ No newline at end of file
+        return self.get_page(self.rank(attributes, top_k, hints), attributes, 0, top_k, hints)
+    
+    def rank(self, attributes: Dict, top_k: int = 3, hints: Optional[Dict] = None) -> RankedProducts:
+        """
+        Rank the best ranking_depth products for attributes.
+        
+        Args:
+            attributes: User preferences and requirements
+            top_k: Number of results the filter fallback logic tries to reach
+            hints: Guessed attributes that only order equally scored products, never filter
+            
+        Returns:
+            RankedProducts, shared with the cache so it must not be modified
+        """
+        return self._rank_in(self._catalog, attributes, top_k, hints)
+    
+    def rank_batch(self, attribute_sets: Iterable[Dict], top_k: int = 3, chunk_size: int = 256) -> Iterator[RankedProducts]:
+        """
+        Rank many attribute sets, chunk_size of them per vectorized pass.
+        
+        Identical sets within a chunk are ranked once. Results skip the memo cache,
+        which is sized for conversational repeats rather than bulk jobs.
+        
+        Args:
+            attribute_sets: Attribute dicts, e.g. saved searches or campaign segments
+            top_k: Number of ranked products per set
+            chunk_size: Sets ranked per pass; results stream out after each pass
+            
+        Yields:
+            RankedProducts per attribute set, in input order
+        """
+        chunk: List[Dict] = []
+        for attributes in attribute_sets:
+            chunk.append(attributes)
+            if len(chunk) >= chunk_size:
+                yield from self._rank_chunk(chunk, top_k)
+                chunk = []
+        if chunk:
+            yield from self._rank_chunk(chunk, top_k)
+    
+    def get_page(self, ranked: RankedProducts, attributes: Dict, start: int, stop: int,
+                 hints: Optional[Dict] = None) -> pd.DataFrame:
+        """
+        Get one page of a ranking as a DataFrame, without filtering again.
+        
+        A ranking of a catalog that has since been swapped out is ranked again
+        against the current one, since its positions no longer point at the same products.
+        
+        Args:
+            ranked: Ranking from rank()
+            attributes: Attributes the ranking was computed for
+            start: First ranked product to include
+            stop: Product after the last one to include
+            hints: Hints the ranking was computed with
+            
+        Returns:
+            DataFrame containing the page of recommended products
+        """
+        catalog = self._catalog
+        index = catalog[1]
+        if ranked.version and ranked.version != index.version:
+            logger.info("Ranking is for catalog version %s, ranking again against %s", ranked.version, index.version)
+            self.stale_rankings += 1
+            metrics.count("recommendation_stale_ranking")
+            ranked = self._rank_in(catalog, attributes, max(stop - start, 1), hints)
+        return ProductFilter.page_frame(index, ranked, attributes, start, stop)
+    
+    def warm_up(self, attribute_sets: Iterable[Dict], limit: int = 50, top_k: int = 3) -> int:
+        """
+        Precompute recommendations for the most frequent attribute sets.
+        
+        Args:
+            attribute_sets: Attribute dicts seen in past conversations, repeats included
+            limit: Maximum number of distinct attribute sets to precompute
+            top_k: Number of recommendations per set
+            
+        Returns:
+            Number of attribute sets precomputed
+        """
+        counts = Counter()
+        examples = {}
+        for attributes in attribute_sets:
+            if not attributes:
+                continue
+            key = self.canonical_attributes(attributes)
+            counts[key] += 1
+            examples.setdefault(key, attributes)
+        
+        warmed = 0
+        for key, _ in counts.most_common(min(limit, self.cache_size)):
+            try:
+                self.get_recommendations(examples[key], top_k)
+                warmed += 1
+            except Exception as e:
+                logger.warning("Skipping warm-up for attributes %s: %s", examples[key], e)
+        logger.info("Warmed recommendation cache with %s of %s distinct attribute sets", warmed, len(counts))
+        return warmed
+    
+    def cache_stats(self) -> Dict:
+        """Get recommendation cache hit/miss counters"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "stale_rankings": self.stale_rankings,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "catalog_version": self._cache_version
+        }
+    
+    @staticmethod
+    def attribute_fingerprint(attributes: Dict, hints: Optional[Dict] = None) -> str:
+        """Short hash of the canonical attribute set and ranking hints"""
+        canonical = repr(ProductRecommender.canonical_attributes(attributes))
+        if hints:
+            canonical += repr(ProductRecommender.canonical_attributes(hints))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    def canonical_attributes(attributes: Dict) -> tuple:
+        """
+        Build a hashable, order-independent key for an attribute dict.
+        
+        Strings are stripped and lowercased and list values are deduplicated and sorted,
+        matching the case-insensitive, any-of semantics of the catalog filter.
+        """
+        def normalize(value):
+            if isinstance(value, str):
+                return value.strip().lower()
+            if isinstance(value, (list, tuple, set)):
+                return tuple(sorted({normalize(v) for v in value}, key=repr))
+            if isinstance(value, dict):
+                return ProductRecommender.canonical_attributes(value)
+            return value
+        return tuple(sorted((str(attr), normalize(value)) for attr, value in attributes.items()))
+    
+    def _rank_in(self, catalog: tuple, attributes: Dict, top_k: int, hints: Optional[Dict] = None) -> RankedProducts:
+        """rank() against one (products_df, catalog_index, vector_index) catalog"""
+        products_df, index, vector_index = catalog
+        limit = max(self.ranking_depth, top_k)
+        if self.cache_size <= 0:
+            return ProductFilter.rank_products(
+                products_df, attributes, top_k, limit, index=index, vector_index=vector_index, hints=hints
+            )
+        
+        # Keyed by catalog version too, so a ranking that finishes after a swap is never served for the new catalog
+        key = (index.version, self.canonical_attributes(attributes), self.canonical_attributes(hints or {}), top_k, limit)
+        with self._lock:
+            self._check_version()
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                metrics.count("recommendation_cache_hit")
+                return cached
+            self.cache_misses += 1
+            metrics.count("recommendation_cache_miss")
+        
+        ranked = ProductFilter.rank_products(
+            products_df, attributes, top_k, limit, index=index, vector_index=vector_index, hints=hints
+        )
+        with self._lock:
+            self._check_version()
+            if index.version == self._cache_version:
+                self._cache[key] = ranked
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return ranked
+    
+    def _rank_chunk(self, attribute_sets: List[Dict], top_k: int) -> List[RankedProducts]:
+        """Rank a chunk of attribute sets, each distinct set once"""
+        products_df, index, vector_index = self._catalog
+        keys = [self.canonical_attributes(attributes) for attributes in attribute_sets]
+        distinct: Dict[tuple, Dict] = {}
+        for key, attributes in zip(keys, attribute_sets):
+            distinct.setdefault(key, attributes)
+        ranked = ProductFilter.rank_batch(
+            products_df, list(distinct.values()), top_k, top_k, index=index, vector_index=vector_index
+        )
+        by_key = dict(zip(distinct, ranked))
+        return [by_key[key] for key in keys]
+    
+    def _check_version(self):
+        """Drop memoized results computed against an older catalog; caller holds the lock"""
+        if self.catalog_index.version != self._cache_version:
+            logger.info("Catalog changed to version %s, clearing recommendation cache", self.catalog_index.version)
+            self._cache.clear()
+            self._cache_version = self.catalog_index.version
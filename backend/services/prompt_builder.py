@@ -0,0 +1,192 @@
+import logging
+from typing import Dict, List
+from .attribute_values import AttributeValues
+from .conversation_manager import ConversationManager
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Gemini models, about four characters per token"""
+    return (len(text) + 3) // 4
+
+
+class PromptBuilder:
+    """
+    Builds model prompts from a static instruction prefix and a small per-turn suffix.
+    The prefix is rendered once; each turn only formats the current situation, with the
+    conversation history trimmed to a token budget.
+    """
+
+    # Attribute -> valid values listed in the prompt
+    VALID_VALUES = {
+        'category': AttributeValues.CATEGORIES,
+        'size': AttributeValues.SIZES,
+        'fit': AttributeValues.FITS,
+        'fabric': AttributeValues.FABRICS,
+        'sleeve_length': AttributeValues.SLEEVE_LENGTHS,
+        'color_or_print': AttributeValues.COLORS_AND_PRINTS,
+        'occasion': AttributeValues.OCCASIONS,
+        'neckline': AttributeValues.NECKLINES,
+        'length': AttributeValues.LENGTHS,
+        'pant_type': AttributeValues.PANT_TYPES
+    }
+
+    # Characters kept from a message that only partly fits the history budget
+    MIN_TRUNCATED_CHARS = 40
+
+    def __init__(self, history_token_budget: int = 400):
+        """
+        Initialize the prompt builder.
+
+        Args:
+            history_token_budget: Estimated tokens the conversation history may use per prompt
+        """
+        self.history_token_budget = history_token_budget
+        self.static_prefix = self._render_static_prefix()
+        self.static_tokens = estimate_tokens(self.static_prefix)
+        logger.info("Rendered static prompt prefix (%s chars, ~%s tokens)", len(self.static_prefix), self.static_tokens)
+
+    def build(self, message: str, conversation_manager: ConversationManager) -> str:
+        """
+        Build the full prompt for a turn.
+
+        Args:
+            message: User's input message
+            conversation_manager: Current conversation state manager
+
+        Returns:
+            Static prefix followed by the current situation
+        """
+        return self.static_prefix + self.build_turn(message, conversation_manager)
+
+    def build_turn(self, message: str, conversation_manager: ConversationManager) -> str:
+        """Build only the per-turn part of the prompt"""
+        history = self.format_history(conversation_manager.get_messages())
+        return f"""
+CURRENT SITUATION:
+- User message: "{message}"
+- Conversation history:
+{history}
+- Followup count: {conversation_manager.get_followup_count()}/2
+- Current attributes: {self._format_attributes(conversation_manager.get_attributes())}
+
+JSON Response:
+"""
+
+    def format_history(self, messages: List[Dict]) -> str:
+        """
+        Format the newest messages that fit the history token budget.
+
+        A message that only partly fits is truncated, and anything older is
+        summarized as a count, since the current attributes already carry it forward.
+        """
+        lines: List[str] = []
+        remaining = self.history_token_budget
+        kept = 0
+        for message in reversed(messages):
+            content = " ".join(str(message.get("content", "")).split())
+            line = f"  {message.get('role', 'user')}: {content}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                room = remaining * 4 - len(line) + len(content) - 3
+                if room >= self.MIN_TRUNCATED_CHARS:
+                    lines.append(f"  {message.get('role', 'user')}: {content[:room]}...")
+                    kept += 1
+                break
+            lines.append(line)
+            remaining -= cost
+            kept += 1
+
+        if kept < len(messages):
+            lines.append(f"  ({len(messages) - kept} earlier messages omitted; their preferences are in Current attributes)")
+        if not lines:
+            return "  (none)"
+        return "\n".join(reversed(lines))
+
+    @staticmethod
+    def _format_attributes(attributes: Dict) -> str:
+        """Format attributes as compact key=value pairs"""
+        if not attributes:
+            return "none"
+        parts = []
+        for attr, value in attributes.items():
+            if isinstance(value, list):
+                value = " | ".join(map(str, value))
+            parts.append(f"{attr}={value}")
+        return "; ".join(parts)
+
+    def _render_static_prefix(self) -> str:
+        """Render the instructions that are the same for every turn"""
+        valid_values = "\n".join(f"{attr}: {' | '.join(values)}" for attr, values in self.VALID_VALUES.items())
+        return f"""
+You are a friendly and knowledgeable fashion shopping assistant. You have great fashion sense and you are able to understand the user's request and provide them with the best recommendations.
+You can also engage in natural conversations with users about fashion, style, and shopping in general.
+
+Your primary capabilities:
+1. Provide fashion recommendations based on user preferences
+2. Engage in natural conversations about fashion and style
+3. Ask followup questions to better understand user needs
+4. Infer missing information from user's vibe and context
+5. Have casual conversations about fashion trends, style advice, and shopping tips
+
+AVAILABLE PRODUCT ATTRIBUTES AND VALID VALUES (one attribute per line, values separated by |):
+{valid_values}
+
+VIBE TO ATTRIBUTE MAPPING:
+- casual/relaxed → fit: "Relaxed"
+- summer → fabric: ["Cotton", "Linen"], sleeve_length: "Sleeveless"
+- brunch → occasion: "Everyday"
+- cute → style: "feminine"
+- elevated → fit: "Tailored"
+- budget mentions → extract number as price_max
+
+CONVERSATION TYPES:
+1. Direct Conversation (type: "direct_conversation")
+   - Greetings and small talk (hi, hello, how are you, etc.)
+   - General fashion questions
+   - Style advice requests
+   - Shopping tips
+   - Fashion trend discussions
+   - Personal style questions
+   - Outfit planning help
+   - Fashion terminology explanations
+
+2. Followup Questions (type: "followup")
+   - When missing key info (category, size, budget)
+   - When need clarification on preferences
+   - When need more details about style
+   - When need to narrow down options
+
+3. Product Recommendations (type: "recommendation")
+   - When user asks for specific items
+   - When user describes what they're looking for
+   - When user needs outfit suggestions
+
+RULES:
+1. If the message is a greeting, small talk, or general fashion discussion → type: "direct_conversation"
+2. If followup_count < 2 AND missing key info (category, size, budget) → type: "followup"
+3. If user is asking for specific product recommendations → type: "recommendation"
+4. Extract explicit attributes mentioned by user
+5. Infer attributes from vibe words
+6. Ask focused questions about missing essentials
+7. Keep direct conversations natural and engaging
+8. Provide helpful fashion advice even in casual conversations
+9. Only use attribute values from the provided valid values list
+10. Match attribute values exactly as they appear in the valid values list
+
+IMPORTANT: Before making recommendations, you MUST:
+1. Have at least 2 of these key attributes: category, size, budget, occasion
+2. Ask followup questions if missing key information
+3. Only proceed with recommendations when you have enough information
+4. Use only valid attribute values from the provided list
+
+RESPONSE FORMAT (keep the keys in this order):
+{{
+  "type": "followup" | "recommendation" | "direct_conversation",
+  "extracted_attributes": {{"category": "dress", "size": "M"}},
+  "inferred_attributes": {{"fit": "Relaxed", "fabric": "Cotton"}},
+  "followup_question": "specific question if type=followup",
+  "message": "conversational response to user"
+}}
+"""
@@ -0,0 +1,232 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+import google.generativeai as genai
+from .prompt_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Smallest context, in tokens, Gemini accepts as cached content, by model name prefix;
+# creating cached content from anything shorter fails
+MIN_CACHE_TOKENS = {
+    'gemini-2.5-flash': 1024,
+    'gemini-2.5-pro': 2048,
+}
+DEFAULT_MIN_CACHE_TOKENS = 4096
+
+
+def min_cache_tokens(model_name: str) -> int:
+    """Minimum cached content size for a model"""
+    for prefix, tokens in MIN_CACHE_TOKENS.items():
+        if model_name.startswith(prefix):
+            return tokens
+    return DEFAULT_MIN_CACHE_TOKENS
+
+
+class GeminiContextBackend:
+    """
+    Thin adapter over the google-generativeai SDK for static prompt context.
+    Feature-detects context caching and system instructions so older SDKs still work.
+    """
+
+    def __init__(self, model_name: str):
+        """
+        Initialize the backend.
+
+        Args:
+            model_name: Gemini model every model object is created for
+        """
+        self.model_name = model_name
+        self.min_cache_tokens = min_cache_tokens(model_name)
+        self.supports_caching = hasattr(genai, 'caching')
+        self.supports_system_instruction = \
+            'system_instruction' in inspect.signature(genai.GenerativeModel.__init__).parameters
+
+    def plain_model(self) -> Any:
+        """Model without any static context"""
+        return genai.GenerativeModel(self.model_name)
+
+    def system_model(self, system_instruction: str) -> Any:
+        """Model with the static prompt as its system instruction"""
+        return genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+
+    def create_cache(self, system_instruction: str, ttl: float) -> Any:
+        """Create cached content holding the static prompt"""
+        return genai.caching.CachedContent.create(
+            model=self.model_name,
+            display_name="fashion-assistant-static-prompt",
+            system_instruction=system_instruction,
+            ttl=int(ttl)
+        )
+
+    def refresh_cache(self, cache: Any, ttl: float):
+        """Extend the cached content's expiry"""
+        cache.update(ttl=int(ttl))
+
+    def delete_cache(self, cache: Any):
+        """Delete the cached content"""
+        cache.delete()
+
+    def cached_model(self, cache: Any) -> Any:
+        """Model that uses the cached content as its context"""
+        return genai.GenerativeModel.from_cached_content(cached_content=cache)
+
+
+class PromptContext:
+    """
+    Keeps the static part of the prompt on the model side, so each request only sends the turn.
+
+    Modes, tried in order under "auto":
+        cached - the static prompt lives in Gemini cached content, created, refreshed and
+                 deleted here, and billed at the cached-token rate; only used when the
+                 prompt reaches the model's minimum cached content size, which today's
+                 ~1.4k-token prompt does only on models listed in MIN_CACHE_TOKENS
+        system - the static prompt is sent as the model's system instruction; it is still
+                 billed as input tokens on every request, only the request body shrinks
+        inline - the static prompt is prepended to every request, as before
+    """
+
+    MODES = ('auto', 'cached', 'system', 'inline')
+
+    def __init__(self, static_prompt: str, backend: Any, mode: str = 'auto', ttl: float = 3600,
+                 refresh_margin: float = 300, retry_after: float = 600):
+        """
+        Initialize the prompt context.
+
+        Args:
+            static_prompt: Prompt text that is the same for every request
+            backend: GeminiContextBackend or a fake with the same methods
+            mode: One of MODES
+            ttl: Seconds cached content lives after each create or refresh
+            refresh_margin: Refresh cached content this many seconds before it expires
+            retry_after: Seconds to wait before retrying a failed cache creation
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown prompt context mode: {mode}")
+        self.static_prompt = static_prompt
+        self.backend = backend
+        self.mode = mode
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self.cache_creates = 0
+        self.cache_refreshes = 0
+        self.static_tokens = estimate_tokens(static_prompt)
+        self.min_cache_tokens = getattr(backend, 'min_cache_tokens', 0)
+
+        self._cache = None
+        self._cache_model = None
+        self._expires_at = 0.0
+        self._cache_failed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._plain_model = backend.plain_model()
+        self._system_model = None
+        if mode in ('auto', 'system') and getattr(backend, 'supports_system_instruction', False):
+            self._system_model = backend.system_model(static_prompt)
+        if mode in ('auto', 'cached') and not self.cache_eligible:
+            logger.info("Static prompt is ~%s tokens, below the %s-token cached content minimum; not caching it",
+                        self.static_tokens, self.min_cache_tokens)
+        logger.info("Initialized prompt context in %s mode (%s until first request)", mode, self.active_mode)
+
+    @property
+    def cache_eligible(self) -> bool:
+        """Whether the static prompt is large enough to be cached content"""
+        return self.static_tokens >= self.min_cache_tokens
+
+    @property
+    def active_mode(self) -> str:
+        """Mode the next request will use"""
+        if self._cache_model is not None:
+            return 'cached'
+        if self._system_model is not None:
+            return 'system'
+        return 'inline'
+
+    async def acquire(self) -> Tuple[Any, bool]:
+        """
+        Get the model to call, creating or refreshing cached content when due.
+
+        Returns:
+            Tuple of (model, whether the static prompt must be sent inline)
+        """
+        if self._wants_cache():
+            async with self._lock:
+                await self._ensure_cache()
+        if self._cache_model is not None:
+            return self._cache_model, False
+        if self._system_model is not None:
+            return self._system_model, False
+        return self._plain_model, True
+
+    def invalidate(self):
+        """Forget the cached content, e.g. after a request using it failed; it is recreated next time"""
+        if self._cache is not None:
+            logger.warning("Dropping cached prompt context")
+        self._cache = None
+        self._cache_model = None
+        self._expires_at = 0.0
+
+    def close(self):
+        """Delete the cached content, if any"""
+        if self._cache is None:
+            return
+        try:
+            self.backend.delete_cache(self._cache)
+            logger.info("Deleted cached prompt context")
+        except Exception as e:
+            logger.warning("Failed to delete cached prompt context: %s", e)
+        self._cache = None
+        self._cache_model = None
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict:
+        """Get the active mode and cache lifecycle counters"""
+        return {
+            "mode": self.active_mode,
+            "cache_creates": self.cache_creates,
+            "cache_refreshes": self.cache_refreshes,
+            "cache_eligible": self.cache_eligible,
+            "static_tokens": self.static_tokens,
+            "min_cache_tokens": self.min_cache_tokens,
+            "cache_expires_in": max(self._expires_at - time.time(), 0.0) if self._cache is not None else None
+        }
+
+    def _wants_cache(self) -> bool:
+        """Whether cached content should be used and needs creating or refreshing"""
+        if self.mode not in ('auto', 'cached') or not getattr(self.backend, 'supports_caching', False):
+            return False
+        if not self.cache_eligible:
+            return False
+        if self._cache is not None:
+            return time.time() >= self._expires_at - self.refresh_margin
+        return self._cache_failed_at is None or time.time() - self._cache_failed_at >= self.retry_after
+
+    async def _ensure_cache(self):
+        """Create, refresh or recreate the cached content; caller holds the lock"""
+        if not self._wants_cache():
+            return
+        if self._cache is not None and time.time() < self._expires_at:
+            try:
+                await asyncio.to_thread(self.backend.refresh_cache, self._cache, self.ttl)
+                self._expires_at = time.time() + self.ttl
+                self.cache_refreshes += 1
+                logger.info("Refreshed cached prompt context for %ss", self.ttl)
+                return
+            except Exception as e:
+                logger.warning("Failed to refresh cached prompt context, recreating it: %s", e)
+        self.invalidate()
+
+        try:
+            cache = await asyncio.to_thread(self.backend.create_cache, self.static_prompt, self.ttl)
+            self._cache_model = self.backend.cached_model(cache)
+        except Exception as e:
+            self._cache_failed_at = time.time()
+            logger.warning("Failed to create cached prompt context, using %s mode: %s", self.active_mode, e)
+            return
+        self._cache = cache
+        self._expires_at = time.time() + self.ttl
+        self._cache_failed_at = None
+        self.cache_creates += 1
+        logger.info("Created cached prompt context for %ss", self.ttl)
@@ -0,0 +1,185 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache for parsed AI responses.
+    Optionally backed by a SQLite file so cached responses survive restarts. Disk writes
+    happen behind the caller on a single writer thread; get_async() reads disk on a worker
+    thread, so neither blocks the event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, db_path: Optional[str] = None,
+                 history_window: int = 3):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_size: Maximum number of responses kept in memory
+            ttl: Seconds a cached response stays valid
+            db_path: Optional SQLite file for the on-disk tier
+            history_window: Number of recent messages that are part of the cache key
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.history_window = history_window
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes use of the SQLite connection, held off the event loop
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-writer")
+        logger.info("Initialized response cache (size %s, ttl %ss, disk tier %s)",
+                    max_size, ttl, 'on' if db_path else 'off')
+
+    def make_key(self, message: str, attributes: Dict, followup_count: int, history: List[Dict],
+                 version: str = "") -> str:
+        """
+        Build a canonical cache key for a model call.
+
+        Args:
+            message: User's input message
+            attributes: Current conversation attributes
+            followup_count: Current followup count
+            history: Conversation history, only the last history_window messages are used
+            version: Identifies the prompt and model, so responses to an older prompt are not served
+
+        Returns:
+            Hex digest identifying the normalized inputs
+        """
+        window = history[-self.history_window:] if self.history_window else []
+        canonical = json.dumps({
+            "version": version,
+            "message": self._normalize(message),
+            "attributes": attributes,
+            "followup_count": followup_count,
+            "history": [[m.get("role"), self._normalize(str(m.get("content", "")))] for m in window]
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached response, or None on a miss; the disk tier is read in the calling thread"""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._disk_get(key)
+        return self._counted(value)
+
+    async def get_async(self, key: str) -> Optional[Dict]:
+        """Get a cached response, or None on a miss; the disk tier is read on a worker thread"""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        return self._counted(value)
+
+    def set(self, key: str, value: Dict):
+        """Cache a parsed response; the disk tier is written behind the caller"""
+        expires_at = time.time() + self.ttl
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value, expires_at)
+        if self._writer is not None:
+            self._writer.submit(self._disk_set, key, json.dumps(value, default=str), expires_at)
+
+    def stats(self) -> Dict:
+        """Get cache hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        """Finish pending disk writes and close the on-disk tier"""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _memory_get(self, key: str) -> Optional[Dict]:
+        """Look a key up in memory, dropping it if expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _disk_get(self, key: str) -> Optional[Dict]:
+        """Look a key up on disk and keep a hit in memory"""
+        with self._db_lock:
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value, row[1])
+        return value
+
+    def _disk_set(self, key: str, payload: str, expires_at: float):
+        """Write one entry to disk; runs on the writer thread"""
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error("Failed to write response cache entry: %s", e)
+
+    def _counted(self, value: Optional[Dict]) -> Optional[Dict]:
+        """Count a lookup as a hit or miss and copy a hit for the caller"""
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def _remember(self, key: str, value: Dict, expires_at: float):
+        """Store an entry in memory, evicting the least recently used ones"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize free text so trivial variations share a key"""
+        return " ".join(text.lower().split())
@@ -1,8 +1,11 @@
+import copy
 import logging
-from typing import Dict, List
+import pandas as pd
+from typing import Dict, List, Optional
 from .conversation_manager import ConversationManager
+from .product_filter import RankedProducts
 from .product_recommender import ProductRecommender
-from .product_filter import ProductFilter
+from .stage_timer import stage
 
 logger = logging.getLogger(__name__)
 
@@ -12,42 +15,47 @@ class ResponseFormatter:
     Manages the creation of followup, recommendation, and direct conversation responses.
     """
     
-    def __init__(self, conversation_manager: ConversationManager, product_recommender: ProductRecommender):
+    # Product columns copied into every recommendation, in response order
+    RECOMMENDATION_FIELDS = ('id', 'name', 'price', 'category', 'available_sizes')
+    
+    # Recommendations shown per response
+    PAGE_SIZE = 3
+    
+    def __init__(self, product_recommender: ProductRecommender):
         """
         Initialize the response formatter.
         
         Args:
-            conversation_manager: Manager for conversation state
             product_recommender: Recommender for product suggestions
         """
-        self.conversation_manager = conversation_manager
         self.product_recommender = product_recommender
         logger.info("Initialized Response Formatter")
     
-    def create_followup_response(self, ai_response: Dict) -> Dict:
+    def create_followup_response(self, ai_response: Dict, conversation_manager: ConversationManager) -> Dict:
         """
         Create followup question response.
         
         Args:
             ai_response: Response from AI containing followup information
+            conversation_manager: Conversation state of the current session
             
         Returns:
             Dict containing formatted followup response
         """
         # Check if we've reached the followup limit
-        if not self.conversation_manager.should_ask_followup():
+        if not conversation_manager.should_ask_followup():
             logger.info("Followup limit reached, creating recommendation response instead")
-            return self.create_recommendation_response()
+            return self.create_recommendation_response(conversation_manager)
             
         # Add the assistant's message to the conversation state with metadata
-        self.conversation_manager.add_message(
+        conversation_manager.add_message(
             "assistant", 
             ai_response['message'],
             {
                 "response_type": "followup",
                 "followup_question": ai_response.get('followup_question', ''),
-                "attributes": self.conversation_manager.get_attributes(),
-                "followup_count": self.conversation_manager.get_followup_count()
+                "attributes": conversation_manager.get_attributes(),
+                "followup_count": conversation_manager.get_followup_count()
             }
         )
         
@@ -56,111 +64,211 @@ class ResponseFormatter:
             "type": "followup",
             "message": ai_response['message'],
             "followup_question": ai_response.get('followup_question', ''),
-            "attributes_so_far": self.conversation_manager.get_attributes(),
+            "attributes_so_far": conversation_manager.get_attributes(),
             "recommendations": [],
-            "messages": self.conversation_manager.get_messages(),
         }
         
         return response
     
-    def create_recommendation_response(self) -> Dict:
+    def create_recommendation_response(self, conversation_manager: ConversationManager) -> Dict:
         """
         Create product recommendations response.
         
+        Args:
+            conversation_manager: Conversation state of the current session
+            
         Returns:
             Dict containing formatted recommendation response
         """
         logger.info("Creating recommendation response")
         
-        # Get product recommendations
-        recommendations = ProductFilter.filter_products(
-            self.product_recommender.products_df,
-            self.conversation_manager.get_attributes(),
-            top_k=3
-        )
+        # Rank products once, memoized per attribute set, and keep the ranking for paging
+        ranking = self._rank(conversation_manager)
+        with stage("format"):
+            recommendations = self.product_recommender.get_page(
+                ranking["ranked"], ranking["attributes"], 0, self.PAGE_SIZE, ranking["hints"]
+            )
         
-        logger.debug(f"Found {len(recommendations)} recommendations")
-        logger.debug(f"Recommendations DataFrame:\n{recommendations}")
+        logger.debug("Found %s recommendations", len(recommendations))
+        logger.debug("Recommendations DataFrame:\n%s", recommendations)
         
         # Check if these are fallback recommendations
         is_fallback = bool(recommendations['is_fallback'].iloc[0]) if len(recommendations) > 0 else False
         
         # Format recommendations
-        rec_list = []
-        for _, product in recommendations.iterrows():
-            try:
-                rec = {
-                    "id": str(product['id']),
-                    "name": str(product['name']),
-                    "price": float(product['price']),
-                    "category": str(product['category']),
-                    "available_sizes": str(product['available_sizes']),
-                    "match_reason": self._generate_match_reason(product.to_dict())
-                }
-                logger.debug(f"Formatted recommendation: {rec}")
-                rec_list.append(rec)
-            except KeyError as e:
-                logger.error(f"Missing required field in product data: {e}")
-                continue
+        with stage("format"):
+            rec_list = self._serialize_recommendations(recommendations)
         
         # Create justification
-        justification = self._generate_justification()
+        justification = self._generate_justification(conversation_manager)
         
         if is_fallback:
             response_message = f"I couldn't find an exact match for your request, but here are some similar items you might like:\n\n"
         else:
             response_message = f"{justification}\n\nHere are my top recommendations:\n\n"
         
-        self.conversation_manager.add_message("assistant", response_message)
+        conversation_manager.add_message("assistant", response_message)
         
         # Reset followup count but don't clear attributes to maintain chat history
-        self.conversation_manager.state["followup_count"] = 0
+        conversation_manager.state["followup_count"] = 0
         
         return {
             "type": "recommendation", 
             "message": response_message,
             "recommendations": rec_list,
-            "final_attributes": self.conversation_manager.get_attributes(),
+            "final_attributes": conversation_manager.get_attributes(),
             "justification": justification,
             "is_fallback": is_fallback,
-            "messages": self.conversation_manager.get_messages()
+            "next_cursor": self._next_cursor(ranking, self.PAGE_SIZE)
         }
     
-    def _generate_match_reason(self, product: Dict) -> str:
+    def create_page_response(self, conversation_manager: ConversationManager, cursor: int, limit: int) -> Dict:
+        """
+        Create a page of further recommendations from the session's stored ranking.
+        
+        The ranking is only recomputed when the attributes or the catalog changed since it was stored.
+        
+        Args:
+            conversation_manager: Conversation state of the current session
+            cursor: Position in the ranking to start from
+            limit: Maximum number of recommendations to return
+            
+        Returns:
+            Dict containing the page of recommendations, the cursor of the next page, how many
+            products matched (total) and how many of them the stored ranking holds (depth)
+        """
+        ranking = conversation_manager.get_ranking()
+        if ranking is None \
+                or ranking["fingerprint"] != self.product_recommender.attribute_fingerprint(
+                    conversation_manager.get_attributes(), conversation_manager.get_ranking_hints()) \
+                or ranking["catalog_version"] != self.product_recommender.catalog_index.version:
+            logger.info("No current ranking for this session, ranking products again")
+            ranking = self._rank(conversation_manager)
+        
+        ranked = ranking["ranked"]
+        page = self.product_recommender.get_page(ranked, ranking["attributes"], cursor, cursor + limit, ranking["hints"])
+        return {
+            "recommendations": self._serialize_recommendations(page),
+            "cursor": cursor,
+            "next_cursor": self._next_cursor(ranking, cursor + limit),
+            "total": ranked.total,
+            "depth": len(ranked.positions),
+            "is_fallback": len(ranked.removed_filters) > 0,
+            "removed_filters": ranked.removed_filters
+        }
+    
+    def create_batch_response(self, attributes: Dict, ranked: RankedProducts, limit: int) -> Dict:
+        """
+        Create the recommendations for one attribute set of a batch request.
+        
+        Args:
+            attributes: Attribute set the ranking was computed for
+            ranked: Ranking from ProductRecommender.rank_batch
+            limit: Maximum number of recommendations to return
+            
+        Returns:
+            Dict containing the recommendations and how many products matched
+        """
+        page = self.product_recommender.get_page(ranked, attributes, 0, limit)
+        return {
+            "recommendations": self._serialize_recommendations(page),
+            "total": ranked.total,
+            "is_fallback": len(ranked.removed_filters) > 0,
+            "removed_filters": ranked.removed_filters
+        }
+    
+    def _rank(self, conversation_manager: ConversationManager) -> Dict:
+        """Rank products for the current attributes and store the ranking on the conversation"""
+        attributes = copy.deepcopy(conversation_manager.get_attributes())
+        hints = copy.deepcopy(conversation_manager.get_ranking_hints())
+        ranked = self.product_recommender.rank(attributes, top_k=self.PAGE_SIZE, hints=hints)
+        ranking = {
+            "ranked": ranked,
+            "attributes": attributes,
+            "hints": hints,
+            "fingerprint": self.product_recommender.attribute_fingerprint(attributes, hints),
+            "catalog_version": ranked.version
+        }
+        conversation_manager.set_ranking(ranking)
+        return ranking
+    
+    @staticmethod
+    def _next_cursor(ranking: Dict, end: int) -> Optional[int]:
+        """Cursor of the page after one ending at end, or None when the ranking is exhausted"""
+        return end if end < len(ranking["ranked"].positions) else None
+    
+    def _serialize_recommendations(self, recommendations: pd.DataFrame) -> List[Dict]:
+        """
+        Turn the recommendations frame into response dicts in one columnar pass.
+        
+        Args:
+            recommendations: Frame returned by ProductFilter.filter_products
+            
+        Returns:
+            List of recommendation dicts
+        """
+        missing = [col for col in self.RECOMMENDATION_FIELDS if col not in recommendations.columns]
+        if missing:
+            logger.error("Missing required field in product data: %s", missing)
+            return []
+        
+        # Only the attribute columns named in a match reason are needed
+        matched = recommendations['matched_attributes'].tolist() \
+            if 'matched_attributes' in recommendations.columns else [[] for _ in range(len(recommendations))]
+        reason_columns = sorted(
+            {attr for attrs in matched for attr in attrs[:2]} & set(recommendations.columns) - set(self.RECOMMENDATION_FIELDS)
+        )
+        columns = recommendations[list(self.RECOMMENDATION_FIELDS) + reason_columns]
+        columns = columns.assign(
+            id=columns['id'].astype(str),
+            name=columns['name'].astype(str),
+            price=columns['price'].astype(float),
+            category=columns['category'].astype(str),
+            available_sizes=columns['available_sizes'].astype(str)
+        )
+        
+        rec_list = []
+        for product, attrs in zip(columns.to_dict('records'), matched):
+            rec = {field: product[field] for field in self.RECOMMENDATION_FIELDS}
+            rec["match_reason"] = self._generate_match_reason(product, attrs)
+            rec_list.append(rec)
+        return rec_list
+    
+    @staticmethod
+    def _generate_match_reason(product: Dict, matched_attributes: List[str]) -> str:
         """
         Generate reason why product matches user's preferences.
         
         Args:
             product: Product information dictionary
+            matched_attributes: Requested attributes the product matched during scoring
             
         Returns:
             String explaining why the product matches
         """
-        reasons = []
-        
-        for attr, value in self.conversation_manager.get_attributes().items():
-            if attr in product and product[attr] == value:
-                reasons.append(f"matches {attr}: {value}")
-        
-        return f"Perfect for your request: {', '.join(reasons[:2])}" if reasons else "Great match for your style"
+        reasons = [f"matches {attr}: {product[attr]}" for attr in matched_attributes[:2] if attr in product]
+        return f"Perfect for your request: {', '.join(reasons)}" if reasons else "Great match for your style"
     
-    def _generate_justification(self) -> str:
+    def _generate_justification(self, conversation_manager: ConversationManager) -> str:
         """
         Generate justification for recommendations.
         
+        Args:
+            conversation_manager: Conversation state of the current session
+            
         Returns:
             String explaining the recommendation rationale
         """
         extracted_parts = []
         inferred_parts = []
         
-        for attr, value in self.conversation_manager.get_extracted_attributes().items():
+        for attr, value in conversation_manager.get_extracted_attributes().items():
             if isinstance(value, list):
                 extracted_parts.append(f"{attr}: {', '.join(map(str, value))}")
             else:
                 extracted_parts.append(f"{attr}: {value}")
         
-        for attr, value in self.conversation_manager.get_inferred_attributes().items():
+        for attr, value in conversation_manager.get_inferred_attributes().items():
             if isinstance(value, list):
                 inferred_parts.append(f"{attr}: {', '.join(map(str, value))}")
             else:
@@ -0,0 +1,52 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from .metrics import metrics
+
+# Stage durations (ms) of the request being handled, None outside a timed request
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+def start_request() -> Dict[str, float]:
+    """
+    Start timing stages for the current request.
+
+    Returns:
+        Dict that collects stage name -> milliseconds as stages finish
+    """
+    stages: Dict[str, float] = {}
+    _stages.set(stages)
+    return stages
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block as a stage of the current request.
+
+    The duration goes into the stage histogram when metrics are enabled, and into the
+    request's Server-Timing stages when the request is being timed; otherwise it is a no-op.
+    """
+    stages = _stages.get()
+    if stages is None and not metrics.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe_stage(name, elapsed)
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + elapsed * 1000
+
+
+def current_stages() -> Dict[str, float]:
+    """Get the stage durations recorded so far for the current request"""
+    return dict(_stages.get() or {})
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Format stage durations as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={duration:.2f}" for name, duration in stages.items())
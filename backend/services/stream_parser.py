@@ -0,0 +1,170 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalResponseParser:
+    """
+    Incremental parser for the JSON object streamed back by the model.
+
+    Emits each top-level field (type, extracted_attributes, ...) as soon as its value
+    is complete, and the decoded text of the "message" field as it arrives.
+    Markdown code fences around the object are ignored.
+    """
+
+    # Top-level string field that is streamed character by character
+    STREAMED_FIELD = "message"
+
+    def __init__(self):
+        """Initialize an empty parser"""
+        self.buffer = ""
+        self.fields: Dict = {}
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._expect = "key"  # "key", "colon", "value" or "comma"
+        self._token_start = 0
+        self._value_start: Optional[int] = None
+        self._streamed_until = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the top-level object has been seen"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        """
+        Feed the next chunk of model output.
+
+        Args:
+            chunk: Raw text received from the model
+
+        Returns:
+            Events as ("field", (key, value)) or ("message_delta", text) tuples
+        """
+        self.buffer += chunk
+        events = []
+        while self._pos < len(self.buffer) and not self._done:
+            char = self.buffer[self._pos]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                self._pos += 1
+                continue
+            self._step(char, events)
+            self._pos += 1
+
+        if self._streaming_message():
+            delta = self._message_delta()
+            if delta:
+                events.append(("message_delta", delta))
+        return events
+
+    def result(self) -> Dict:
+        """Parse the complete object; raises json.JSONDecodeError if it is not valid JSON"""
+        start = self.buffer.find("{")
+        end = self.buffer.rfind("}")
+        if start == -1 or end == -1:
+            raise json.JSONDecodeError("No JSON object in response", self.buffer, 0)
+        return json.loads(self.buffer[start:end + 1])
+
+    def _step(self, char: str, events: List):
+        """Advance the state machine by one character"""
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    if self._expect == "key":
+                        self._key = json.loads(self.buffer[self._token_start:self._pos + 1])
+                        self._expect = "colon"
+                    elif self._expect == "value":
+                        if self._key == self.STREAMED_FIELD:
+                            delta = self._message_delta(self._pos)
+                            if delta:
+                                events.append(("message_delta", delta))
+                        self._finish_value(self._pos + 1, events)
+            return
+
+        if char == '"':
+            self._in_string = True
+            if self._depth == 1:
+                self._token_start = self._pos
+                if self._expect == "value" and self._value_start is None:
+                    self._value_start = self._pos
+                    self._streamed_until = self._pos + 1
+            return
+
+        if self._depth == 1:
+            if char == ":" and self._expect == "colon":
+                self._expect = "value"
+                self._value_start = None
+            elif char in ",}" and self._expect == "value" and self._value_start is not None:
+                # End of a bare literal such as a number, true or null
+                self._finish_value(self._pos, events)
+            elif self._expect == "value" and self._value_start is None and not char.isspace():
+                self._value_start = self._pos
+            if char == ",":
+                self._expect = "key"
+            elif char == "}":
+                self._done = True
+
+        if char in "{[":
+            self._depth += 1
+        elif char in "}]" and self._depth > 1:
+            self._depth -= 1
+            if self._depth == 1 and self._expect == "value":
+                self._finish_value(self._pos + 1, events)
+
+    def _finish_value(self, end: int, events: List):
+        """Decode a completed top-level value and emit it"""
+        raw = self.buffer[self._value_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.debug("Could not decode streamed field %s: %s", self._key, raw)
+        else:
+            self.fields[self._key] = value
+            events.append(("field", (self._key, value)))
+        self._expect = "comma"
+        self._value_start = None
+
+    def _streaming_message(self) -> bool:
+        """Whether the parser is currently inside the streamed string field"""
+        return (
+            self._in_string and self._depth == 1 and self._expect == "value"
+            and self._key == self.STREAMED_FIELD and self._value_start is not None
+        )
+
+    def _message_delta(self, end: Optional[int] = None) -> str:
+        """Decode the part of the streamed field received since the last delta"""
+        end = self._pos if end is None else end
+        raw = self.buffer[self._streamed_until:end]
+        # Never split an escape sequence across deltas
+        cut = raw.rfind("\\")
+        if cut != -1:
+            run = len(raw[:cut + 1]) - len(raw[:cut + 1].rstrip("\\"))
+            escape_len = 6 if raw[cut + 1:cut + 2] == "u" else 2
+            if run % 2 == 1 and len(raw) - cut < escape_len:
+                raw = raw[:cut]
+        if not raw:
+            return ""
+        try:
+            text = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return ""
+        if text and "\ud800" <= text[-1] <= "\udbff":
+            # First half of a surrogate pair escape; wait for the second so they decode together
+            raw, text = raw[:-6], text[:-1]
+        self._streamed_until += len(raw)
+        return text
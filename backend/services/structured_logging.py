@@ -0,0 +1,132 @@
+import json
+import logging
+import random
+import uuid
+import zlib
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Id of the request being handled, attached to every log record it produces
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(request_id)s] %(name)s - %(message)s'
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """
+    Set the request id for the current context.
+
+    Args:
+        incoming: Id sent by the client (e.g. X-Request-ID), used when present
+
+    Returns:
+        The request id now in effect
+    """
+    request_id = (incoming or "").strip()[:64] or uuid.uuid4().hex[:16]
+    _request_id.set(request_id)
+    return request_id
+
+
+def current_request_id() -> str:
+    """Request id of the current context, '-' outside a request"""
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request id to every record as record.request_id"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING, per logger name prefix.
+
+    Sampling is decided per request id, so a sampled request keeps all of its records
+    and can still be followed end to end; warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialize the filter.
+
+        Args:
+            rates: Logger name prefix -> fraction of records kept, the longest prefix wins
+        """
+        super().__init__()
+        self.rates = dict(sorted(rates.items(), key=lambda item: -len(item[0])))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        request_id = _request_id.get()
+        if request_id == "-":
+            return random.random() < rate
+        return zlib.crc32(request_id.encode('utf-8')) % 10000 < rate * 10000
+
+    def rate_for(self, name: str) -> float:
+        """Sampling rate for a logger name"""
+        for prefix, rate in self.rates.items():
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1.0
+
+    @staticmethod
+    def parse_rates(spec: str) -> Dict[str, float]:
+        """Parse "services.product_filter=0.1,services.conversation_manager=0.5" into rates"""
+        rates = {}
+        for entry in filter(None, (part.strip() for part in spec.split(','))):
+            name, _, rate = entry.partition('=')
+            try:
+                rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+            except ValueError:
+                logging.getLogger(__name__).warning("Ignoring invalid log sample rate: %s", entry)
+        return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any fields passed through extra={"fields": {...}}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, 'request_id', '-'),
+            "message": record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'text', sample_rates: Optional[Dict[str, float]] = None):
+    """
+    Configure the root logger with request id correlation and optional sampling.
+
+    Args:
+        level: Root log level name
+        fmt: "text" for the plain format, "json" for one JSON object per line
+        sample_rates: Logger name prefix -> fraction of sub-WARNING records kept
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler.addFilter(RequestIdFilter())
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
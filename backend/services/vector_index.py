@@ -0,0 +1,276 @@
+import logging
+import re
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from .catalog_index import CatalogIndex
+from .constants import QUERY_STOP_WORDS, VIBE_MAPPINGS
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    CPU-only text embedder: signed feature hashing of words and character trigrams.
+
+    Words carry most of the weight; trigrams of each word give partial credit to
+    related forms ("flowy"/"flow", "florals"/"floral"). Vectors are L2-normalized,
+    so dot products are cosine similarities.
+    """
+
+    def __init__(self, dim: int = 512, trigram_weight: float = 0.5):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Vector dimension
+            trigram_weight: Weight of each trigram feature relative to a whole word
+        """
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+        self._feature_cache: Dict[str, tuple] = {}
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text into a normalized float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD_PATTERN.findall(str(text).lower()):
+            indices, weights = self._features(word)
+            np.add.at(vector, indices, weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix"""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self.embed(text) for text in texts])
+
+    def _features(self, word: str) -> tuple:
+        """Hashed feature indices and signed weights of one word, memoized"""
+        cached = self._feature_cache.get(word)
+        if cached is not None:
+            return cached
+        padded = f"<{word}>"
+        features = [(f"w:{word}", 1.0)] + [
+            (f"c:{padded[i:i + 3]}", self.trigram_weight) for i in range(len(padded) - 2)
+        ]
+        indices = np.empty(len(features), dtype=np.int64)
+        weights = np.empty(len(features), dtype=np.float32)
+        for position, (feature, weight) in enumerate(features):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            indices[position] = digest % self.dim
+            # The top hash bit picks the sign so collisions cancel out on average
+            weights[position] = weight if digest & 0x80000000 else -weight
+        cached = (indices, weights)
+        if len(self._feature_cache) < 100000:
+            self._feature_cache[word] = cached
+        return cached
+
+
+class VibeResolution(NamedTuple):
+    """Attributes inferred from free text by VectorIndex.resolve"""
+    attributes: Dict  # Attribute -> value or list of values
+    vibes: List[str]  # Vibe phrases the text matched, best first
+    scores: Dict[str, float]  # Attribute -> similarity of the value chosen for it
+
+
+class VectorIndex:
+    """
+    Embedding index over the catalog's attribute values, product names and vibe phrases.
+
+    A product's text is its name plus its attribute values, and those values come from
+    small vocabularies, so product similarity is assembled from one dot product per
+    distinct value and per name token instead of one per product. The same value vectors
+    resolve vibe text to attributes without a model call.
+    """
+
+    # Attributes that describe a product's look rather than filter the catalog; their values
+    # are the free text the ranking signal is computed from
+    SOFT_ATTRIBUTES = ('vibe', 'style')
+
+    # Longest word window resolve compares against values and vibe phrases
+    MAX_WINDOW_WORDS = 4
+
+    def __init__(self, catalog_index: CatalogIndex, vibes: Optional[Dict[str, Dict]] = None,
+                 embedder: Optional[HashingEmbedder] = None, name_weight: float = 0.5,
+                 value_threshold: float = 0.8, vibe_threshold: float = 0.7):
+        """
+        Build the index.
+
+        Args:
+            catalog_index: Catalog index whose coded attribute columns are embedded
+            vibes: Vibe phrase -> attribute hints, VIBE_MAPPINGS by default
+            embedder: Text embedder, a 512-dimension HashingEmbedder by default
+            name_weight: Weight of the name similarity relative to one attribute field
+            value_threshold: Minimum similarity for resolve to pick an attribute value
+            vibe_threshold: Minimum similarity for resolve to apply a vibe phrase
+        """
+        start = time.perf_counter()
+        self.catalog_index = catalog_index
+        self.version = catalog_index.version
+        self.embedder = embedder or HashingEmbedder()
+        self.name_weight = name_weight
+        self.value_threshold = value_threshold
+        self.vibe_threshold = vibe_threshold
+
+        # Per attribute column: display value per code and its vector
+        self.values: Dict[str, List[str]] = {}
+        self.value_vectors: Dict[str, np.ndarray] = {}
+        for column, codes in catalog_index.codes.items():
+            self.values[column] = self._display_values(catalog_index.products_df[column], codes,
+                                                       len(catalog_index.code_lookup[column]))
+            self.value_vectors[column] = self.embedder.embed_many(self.values[column])
+
+        self._build_name_tokens(catalog_index.products_df['name'])
+
+        vibes = VIBE_MAPPINGS if vibes is None else vibes
+        self.vibe_phrases = list(vibes)
+        self.vibe_hints = [vibes[phrase] for phrase in self.vibe_phrases]
+        # Curated phrases name what they apply to ("beachy vacay dress"); only their descriptive
+        # words are embedded, so a query mentioning the category does not match the phrase
+        self.vibe_vectors = self.embedder.embed_many([
+            " ".join(self._descriptive_words(phrase)) or phrase for phrase in self.vibe_phrases
+        ])
+
+        logger.info(
+            "Built vector index over %s products (%s attribute values, %s name tokens, %s vibes) in %.3fs",
+            catalog_index.size, sum(len(v) for v in self.values.values()), len(self.token_vocabulary),
+            len(self.vibe_phrases), time.perf_counter() - start
+        )
+
+    def query_text(self, attributes: Dict) -> str:
+        """Free text of the soft attributes in an attribute dict, '' if there is none"""
+        parts = []
+        for attr in self.SOFT_ATTRIBUTES:
+            value = attributes.get(attr)
+            if isinstance(value, list):
+                parts.extend(map(str, value))
+            elif value:
+                parts.append(str(value))
+        return " ".join(parts)
+
+    def score(self, text: str, positions: np.ndarray) -> np.ndarray:
+        """
+        Similarity of text to the products at positions.
+
+        Returns:
+            float32 score per position: summed field cosines plus the weighted name cosine
+        """
+        query = self.embedder.embed(text)
+        scores = np.zeros(len(positions), dtype=np.float32)
+        if not query.any() or len(positions) == 0:
+            return scores
+        for column, vectors in self.value_vectors.items():
+            if len(vectors) == 0:
+                continue
+            similarity = np.append(vectors @ query, np.float32(0))  # code -1 (missing) -> last slot
+            scores += similarity[self.catalog_index.codes[column][positions]]
+        if self.name_weight and len(self.token_vocabulary):
+            scores += self.name_weight * self._name_scores(query, positions)
+        return scores
+
+    def search(self, text: str, top_k: int = 10) -> List[int]:
+        """Row positions of the top_k products most similar to text, by brute force"""
+        scores = self.score(text, np.arange(self.catalog_index.size))
+        if len(scores) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind='stable')].tolist()
+
+    def resolve(self, text: str) -> VibeResolution:
+        """
+        Resolve free text to attribute hints without a model call.
+
+        Every window of up to MAX_WINDOW_WORDS words is compared, so a short value or
+        phrase inside a long message still matches closely. Matching vibe phrases contribute
+        their hints, most similar first; catalog values close enough to a window fill in
+        attributes no vibe covered.
+        """
+        attributes: Dict = {}
+        scores: Dict[str, float] = {}
+        vibes: List[str] = []
+        windows = self._windows(text)
+        if not windows:
+            return VibeResolution(attributes, vibes, scores)
+        queries = self.embedder.embed_many(windows).T
+
+        if len(self.vibe_phrases):
+            similarity = (self.vibe_vectors @ queries).max(axis=1)
+            for position in np.argsort(-similarity, kind='stable'):
+                if similarity[position] < self.vibe_threshold:
+                    break
+                vibes.append(self.vibe_phrases[position])
+                for attr, hint in self.vibe_hints[position].items():
+                    if attr not in attributes:
+                        attributes[attr] = hint
+                        scores[attr] = float(similarity[position])
+
+        for column, vectors in self.value_vectors.items():
+            if column in attributes or len(vectors) == 0:
+                continue
+            similarity = (vectors @ queries).max(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= self.value_threshold:
+                attributes[column] = self.values[column][best]
+                scores[column] = float(similarity[best])
+        return VibeResolution(attributes, vibes, scores)
+
+    def _windows(self, text: str) -> List[str]:
+        """Every run of 1 to MAX_WINDOW_WORDS consecutive descriptive words in text"""
+        words = self._descriptive_words(text)
+        return [
+            " ".join(words[start:start + size])
+            for size in range(1, min(self.MAX_WINDOW_WORDS, len(words)) + 1)
+            for start in range(len(words) - size + 1)
+        ]
+
+    @staticmethod
+    def _descriptive_words(text: str) -> List[str]:
+        """Words of text without QUERY_STOP_WORDS and numbers"""
+        return [
+            word for word in _WORD_PATTERN.findall(str(text).lower())
+            if word not in QUERY_STOP_WORDS and not word.isdigit()
+        ]
+
+    def _name_scores(self, query: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Cosine of the query with each product name, from per-token similarities"""
+        token_similarity = self.token_vectors @ query
+        starts = self.name_offsets[positions]
+        lengths = self.name_offsets[positions + 1] - starts
+        total = np.zeros(len(positions), dtype=np.float32)
+        has_tokens = lengths > 0
+        if has_tokens.any():
+            # Gather the tokens of the selected names into one run, then sum each name's slice
+            lengths = lengths[has_tokens]
+            offsets = np.cumsum(lengths) - lengths
+            token_positions = np.repeat(starts[has_tokens] - offsets, lengths) + np.arange(lengths.sum())
+            sums = np.add.reduceat(token_similarity[self.name_tokens[token_positions]], offsets)
+            # Treats name tokens as orthogonal, which is close enough for short names
+            total[has_tokens] = sums / np.sqrt(lengths)
+        return total
+
+    def _build_name_tokens(self, names: pd.Series):
+        """Tokenize product names into a flat token-id array with per-product offsets"""
+        tokens = names.astype('string').str.lower().str.findall(_WORD_PATTERN.pattern)
+        flat = tokens.explode()
+        # Numbers in names (SKUs, sizes) carry no vibe, and would make the vocabulary grow with the catalog
+        flat = flat.where(~flat.str.isdigit().fillna(True))
+        lengths = flat.notna().groupby(level=0).sum().to_numpy(dtype=np.int64)
+        codes, vocabulary = pd.factorize(flat.dropna())
+        self.token_vocabulary = list(vocabulary)
+        self.token_vectors = self.embedder.embed_many(self.token_vocabulary)
+        self.name_tokens = codes.astype(np.int32)
+        self.name_offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    @staticmethod
+    def _display_values(column: pd.Series, codes: np.ndarray, count: int) -> List[str]:
+        """Original spelling of each coded value, taken from its first product"""
+        present = codes >= 0
+        _, first = np.unique(codes[present], return_index=True)
+        rows = np.flatnonzero(present)[first]
+        return [str(value).strip() for value in column.iloc[rows]][:count]
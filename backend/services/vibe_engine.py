@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from .attribute_values import AttributeValues
+from .constants import QUERY_STOP_WORDS, VIBE_MAPPINGS
+from .phrase_matcher import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+# Attribute -> valid values, used to restore the canonical spelling of hint values
+KNOWN_VALUES = {
+    'category': AttributeValues.CATEGORIES,
+    'fit': AttributeValues.FITS,
+    'fabric': AttributeValues.FABRICS,
+    'sleeve_length': AttributeValues.SLEEVE_LENGTHS,
+    'color_or_print': AttributeValues.COLORS_AND_PRINTS,
+    'occasion': AttributeValues.OCCASIONS,
+    'neckline': AttributeValues.NECKLINES,
+    'length': AttributeValues.LENGTHS,
+    'pant_type': AttributeValues.PANT_TYPES
+}
+
+# Free-form attributes that have no fixed value list
+FREE_ATTRIBUTES = ('style',)
+
+# Attribute names written in vibe files -> attribute they mean
+ATTRIBUTE_ALIASES = {
+    'type': 'pant_type',
+    'color': 'color_or_print',
+    'print': 'color_or_print',
+    'sleeves': 'sleeve_length'
+}
+
+# Words that describe what a vibe applies to rather than the vibe itself
+FILLER_WORDS = QUERY_STOP_WORDS
+
+_VERSION_PATTERN = re.compile(r'^\s*#\s*version\s*[:=]\s*(\d+)', re.IGNORECASE | re.MULTILINE)
+_FILE_VERSION_PATTERN = re.compile(r'\.v(\d+)\.[^.]+$')
+_BLOCK_PATTERN = re.compile(r'"([^"]+)"\s*:\s*\{([^{}]*)\}')
+_FIELD_PATTERN = re.compile(r'"([^"]+)"\s*:\s*(\[[^\]]*\]|"[^"]*")')
+_ARROW_PATTERN = re.compile(r'→|->')
+_QUOTED_PATTERN = re.compile(r'"([^"]*)"')
+
+_CANONICAL = {attr: {value.lower(): value for value in values} for attr, values in KNOWN_VALUES.items()}
+
+
+def merge_hint(attributes: Dict, attr: str, value):
+    """Add a value to an attribute, turning repeated distinct values into a list"""
+    values = value if isinstance(value, list) else [value]
+    current = attributes.get(attr)
+    if current is None:
+        attributes[attr] = value
+        return
+    merged = current if isinstance(current, list) else [current]
+    merged = merged + [v for v in values if v not in merged]
+    attributes[attr] = merged[0] if len(merged) == 1 else merged
+
+
+def parse_vibe_file(text: str) -> Dict[str, Dict]:
+    """
+    Parse the curated vibe hints format into phrase -> attribute hints.
+
+    Two entry forms are accepted, and the parser tolerates the hand-edited state of
+    the file (comments, missing or trailing commas, stray indentation):
+
+        "beachy vacay dress": {"fit": "Relaxed", "fabric": ["Linen", "Cotton"]},
+        "luxurious" / "party"  → fabric: velvet / satin
+
+    A phrase defined more than once keeps the values of every definition.
+    """
+    text = "\n".join(line for line in text.splitlines() if not line.lstrip().startswith('#'))
+    mappings: Dict[str, Dict] = {}
+
+    def add(phrase: str, attr: str, values: List[str]):
+        values = [value.strip() for value in values if value.strip()]
+        if phrase.strip() and values:
+            merge_hint(mappings.setdefault(phrase.strip().lower(), {}), attr.strip().lower(), values)
+
+    for block in _BLOCK_PATTERN.finditer(text):
+        for field in _FIELD_PATTERN.finditer(block.group(2)):
+            add(block.group(1), field.group(1), _QUOTED_PATTERN.findall(field.group(2)))
+
+    for line in _BLOCK_PATTERN.sub('', text).splitlines():
+        if not _ARROW_PATTERN.search(line):
+            continue
+        phrases, hint = _ARROW_PATTERN.split(line, maxsplit=1)
+        attr, _, values = hint.partition(':')
+        for phrase in _QUOTED_PATTERN.findall(phrases):
+            add(phrase, attr, values.split('/'))
+
+    # Single values are stored as scalars, like the built-in mappings
+    return {
+        phrase: {attr: values[0] if len(values) == 1 else values for attr, values in hints.items()}
+        for phrase, hints in mappings.items()
+    }
+
+
+class VibeEngine:
+    """
+    Maps vibe phrases in a message to attribute hints.
+
+    Phrases come from the built-in VIBE_MAPPINGS plus curated vibe files, compiled into
+    one PhraseMatcher so lookup stays linear in the message length however many vibes
+    are loaded. Overlapping phrases resolve to the leftmost-longest match, and hints of
+    several matched vibes are merged in message order.
+    """
+
+    def __init__(self, mappings: Optional[Dict[str, Dict]] = None, version: str = "builtin"):
+        """
+        Initialize the engine.
+
+        Args:
+            mappings: Vibe phrase -> attribute hints, VIBE_MAPPINGS by default
+            version: Identifier of the vibe data, reported in logs and stats
+        """
+        self.version = version
+        self.mappings: Dict[str, Dict] = {}
+        for phrase, hints in (VIBE_MAPPINGS if mappings is None else mappings).items():
+            canonical = self._canonical_hints(phrase, hints)
+            if canonical:
+                self.mappings[phrase] = canonical
+
+        self.matcher = PhraseMatcher()
+        for phrase in self.mappings:
+            for alias in self.aliases(phrase):
+                self.matcher.add(alias, phrase)
+        self.matcher.compile()
+        logger.info("Compiled %s vibes into %s phrases (version %s)", len(self.mappings), len(self.matcher), version)
+
+    def __len__(self) -> int:
+        return len(self.mappings)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], base: Optional[Dict[str, Dict]] = None) -> 'VibeEngine':
+        """
+        Build an engine from vibe files layered over the built-in mappings.
+
+        Files apply in version order, taken from a "# version: N" comment or a .vN
+        file suffix (0 if neither is present). A later file overrides the attributes it
+        names for a phrase and keeps the rest.
+
+        Args:
+            paths: Vibe files; missing or unreadable files are skipped with a warning
+            base: Mappings the files are layered over, VIBE_MAPPINGS by default
+
+        Returns:
+            Engine whose version combines the highest file version and a content hash
+        """
+        layers: List[Tuple[int, str, Dict[str, Dict]]] = []
+        digest = hashlib.sha1()
+        for path in sorted(paths):
+            try:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError as e:
+                logger.warning("Skipping vibe file %s: %s", path, e)
+                continue
+            digest.update(text.encode('utf-8'))
+            layers.append((cls.file_version(path, text), path, parse_vibe_file(text)))
+
+        mappings = {phrase: dict(hints) for phrase, hints in (VIBE_MAPPINGS if base is None else base).items()}
+        for version, path, layer in sorted(layers, key=lambda entry: entry[:2]):
+            logger.info("Loaded %s vibes from %s (version %s)", len(layer), path, version)
+            for phrase, hints in layer.items():
+                mappings.setdefault(phrase, {}).update(hints)
+
+        top = max((version for version, _, _ in layers), default=0)
+        return cls(mappings, version=f"v{top}-{digest.hexdigest()[:8]}" if layers else "builtin")
+
+    @staticmethod
+    def file_version(path: str, text: str) -> int:
+        """Version of a vibe file from its "# version: N" comment or .vN suffix"""
+        match = _VERSION_PATTERN.search(text) or _FILE_VERSION_PATTERN.search(os.path.basename(path))
+        return int(match.group(1)) if match else 0
+
+    @staticmethod
+    def aliases(phrase: str) -> List[str]:
+        """
+        Phrases a vibe is matched by, built from its distinctive words only.
+
+        Curated phrases name what they apply to ("flowy dresses for garden-party"), and
+        matching on those words would let "dress" alone pull in the phrase. The phrase's
+        non-filler words ("flowy garden party") are matched, plus runs of two or more of
+        them ("garden party"). Phrases made only of filler words match as written.
+        """
+        tokens = PhraseMatcher.tokenize(phrase)
+        distinctive = [token for token in tokens if token not in FILLER_WORDS]
+        aliases = [" ".join(distinctive or tokens)]
+        run: List[str] = []
+        for token in tokens + ['for']:
+            if token not in FILLER_WORDS:
+                run.append(token)
+                continue
+            if len(run) > 1 and " ".join(run) not in aliases:
+                aliases.append(" ".join(run))
+            run = []
+        return aliases
+
+    def match(self, message: str) -> List[str]:
+        """Vibe phrases found in a message, in message order without repeats"""
+        phrases: List[str] = []
+        for match in self.matcher.find(message):
+            for phrase in match.payloads:
+                if phrase not in phrases:
+                    phrases.append(phrase)
+        return phrases
+
+    def hints(self, phrases: List[str]) -> Dict:
+        """Merged attribute hints of vibe phrases, earlier phrases first"""
+        attributes: Dict = {}
+        for phrase in phrases:
+            for attr, hint in self.mappings.get(phrase, {}).items():
+                merge_hint(attributes, attr, hint)
+        return attributes
+
+    def infer(self, message: str) -> Dict:
+        """Attribute hints for every vibe in a message"""
+        return self.hints(self.match(message))
+
+    @staticmethod
+    def _canonical_hints(phrase: str, hints: Dict) -> Dict:
+        """Hints with known attribute names and the catalog's spelling of known values"""
+        canonical: Dict = {}
+        for attr, value in hints.items():
+            attr = ATTRIBUTE_ALIASES.get(attr, attr)
+            if attr not in KNOWN_VALUES and attr not in FREE_ATTRIBUTES:
+                logger.warning("Ignoring unknown attribute %r in vibe %r", attr, phrase)
+                continue
+            for item in value if isinstance(value, list) else [value]:
+                item = str(item).strip()
+                if attr in _CANONICAL:
+                    item = _CANONICAL[attr].get(item.lower(), item[:1].upper() + item[1:])
+                merge_hint(canonical, attr, item)
+        return canonical
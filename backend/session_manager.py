@@ -1,68 +1,252 @@
-import json
-import os
+import copy
 import logging
-from datetime import datetime
-from typing import Dict
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from models import ChatSession
+from services.conversation_manager import ConversationManager
+from session_store import SessionStore, WriteBehindWriter, create_session_store
 
 logger = logging.getLogger(__name__)
 
 class SessionManager:
-    """Manages chat sessions and their persistence"""
-    
-    def __init__(self, sessions_file: str = "chat_sessions.json"):
-        self.sessions_file = sessions_file
-        self.sessions: Dict[str, ChatSession] = self._load_sessions()
-
-    def _load_sessions(self) -> Dict[str, ChatSession]:
-        """Load chat sessions from file"""
-        if os.path.exists(self.sessions_file):
-            try:
-                with open(self.sessions_file, 'r') as f:
-                    sessions_data = json.load(f)
-                    sessions = {}
-                    for sid, data in sessions_data.items():
-                        session = ChatSession()
-                        session.session_id = sid
-                        session.created_at = datetime.fromisoformat(data['created_at'])
-                        session.messages = data['messages']
-                        session.attributes = data['attributes']
-                        session.followup_count = data['followup_count']
-                        sessions[sid] = session
-                    return sessions
-            except Exception as e:
-                logger.error(f"Error loading chat sessions: {str(e)}")
-        return {}
+    """
+    Manages chat sessions and their persistence.
 
-    def save_sessions(self):
-        """Save chat sessions to file"""
-        try:
-            sessions_data = {
-                sid: {
-                    'created_at': session.created_at.isoformat(),
-                    'messages': session.messages,
-                    'attributes': session.attributes,
-                    'followup_count': session.followup_count
-                }
-                for sid, session in self.sessions.items()
-            }
-            with open(self.sessions_file, 'w') as f:
-                json.dump(sessions_data, f)
-        except Exception as e:
-            logger.error(f"Error saving chat sessions: {str(e)}")
+    Records are written behind the request, so right after a turn another worker sharing
+    the store may not see it yet. Either route each session to one worker (sticky sessions)
+    or enable sync_writes and call wait_persisted() before answering. Two turns of the same
+    session running at once on different workers are never merged.
+    """
+
+    def __init__(self, sessions_file: str = "chat_sessions.json", store: Optional[SessionStore] = None,
+                 flush_interval: float = 0.5, batch_size: int = 200, max_sessions: int = 1000,
+                 sync_writes: bool = False):
+        """
+        Initialize the session manager.
+
+        Args:
+            sessions_file: Legacy chat_sessions.json imported into a fresh default store
+            store: Session persistence backend, defaults to the append-only log
+            flush_interval: Seconds between write-behind flushes once start() is called
+            batch_size: Maximum records per write-behind flush
+            max_sessions: Sessions kept in memory; the least recently used are dropped and
+                re-read from the store when they come back
+            sync_writes: Make wait_persisted() block until queued records are written, for
+                stores shared by workers without sticky session routing
+        """
+        self.store = store or create_session_store("log", legacy_file=sessions_file)
+        self.writer = WriteBehindWriter(self.store, flush_interval=flush_interval, batch_size=batch_size)
+        self.max_sessions = max(max_sessions, 1)
+        self.sync_writes = sync_writes
+        # Recently used sessions, least recent first; others are read lazily from the store
+        self.sessions: OrderedDict = OrderedDict()
+        # Live conversation state per cached session, saved into the session on every update
+        self.conversations: Dict[str, ConversationManager] = {}
+        # What has already been persisted per cached session, so updates only write deltas
+        self._persisted_messages: Dict[str, int] = {}
+        self._persisted_state: Dict[str, tuple] = {}
+        # Handlers on the event loop and in the threadpool both touch the cache
+        self._cache_lock = threading.RLock()
 
     def get_session(self, session_id: str) -> ChatSession:
         """Get a chat session by ID"""
-        return self.sessions.get(session_id)
+        if not session_id:
+            return None
+        self._refresh()
+        with self._cache_lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                return session
+        # Records of an evicted session may still be queued
+        if self.writer.depth:
+            self.writer.flush()
+        try:
+            with self.writer.lock:
+                session = self.store.load_session(session_id)
+        except Exception as e:
+            logger.error("Error loading chat session %s: %s", session_id, e)
+            return None
+        if session:
+            session.assign_message_ids()
+            with self._cache_lock:
+                self._cache(session)
+                self._mark_persisted(session)
+        return session
 
     def create_session(self) -> ChatSession:
         """Create a new chat session"""
         session = ChatSession()
-        self.sessions[session.session_id] = session
-        self.save_sessions()
+        self._persist([{
+            'op': 'create',
+            'session_id': session.session_id,
+            'created_at': session.created_at.isoformat()
+        }])
+        with self._cache_lock:
+            self._cache(session)
+            self._mark_persisted(session)
         return session
 
-    def update_session(self, session_id: str, session: ChatSession):
-        """Update an existing chat session"""
-        self.sessions[session_id] = session
-        self.save_sessions() 
\ No newline at end of file
+    def update_session(self, session_id: str, session: ChatSession,
+                       conversation: Optional[ConversationManager] = None):
+        """
+        Update an existing chat session, persisting only what changed since the last update.
+
+        Args:
+            session_id: Id of the session
+            session: The updated session
+            conversation: Conversation state of the turn, defaults to the cached one
+        """
+        with self._cache_lock:
+            if session_id not in self._persisted_messages:
+                # Evicted while its turn was in flight; diff against what the store holds
+                self._mark_stored(session_id)
+            self._cache(session)
+            if conversation is None:
+                conversation = self.conversations.get(session_id)
+            else:
+                self.conversations[session_id] = conversation
+        if conversation is not None:
+            session.conversation_state = conversation.export_state()
+        records = [
+            {'op': 'message', 'session_id': session_id, 'message': message}
+            for message in session.messages[self._persisted_messages.get(session_id, 0):]
+        ]
+        if self._persisted_state.get(session_id) != self._state_of(session):
+            records.append({
+                'op': 'state',
+                'session_id': session_id,
+                'attributes': copy.deepcopy(session.attributes),
+                'followup_count': session.followup_count,
+                'conversation_state': copy.deepcopy(session.conversation_state)
+            })
+        if records:
+            self._persist(records)
+        self._mark_persisted(session)
+
+    def _refresh(self):
+        """Drop cached sessions another worker has written to, so they are re-read from the store"""
+        with self.writer.lock:
+            changed = self.store.refresh() & self.sessions.keys()
+        if not changed:
+            return
+        # Our own queued records for these sessions must reach the store before they are re-read
+        self.writer.flush()
+        with self._cache_lock:
+            for session_id in changed:
+                self._forget(session_id)
+        logger.info("Reloading %s sessions updated by another worker", len(changed))
+
+    def _cache(self, session: ChatSession):
+        """Cache a session as the most recently used, evicting the least recently used beyond max_sessions"""
+        self.sessions[session.session_id] = session
+        self.sessions.move_to_end(session.session_id)
+        while len(self.sessions) > self.max_sessions:
+            self._forget(next(iter(self.sessions)))
+
+    def _forget(self, session_id: str):
+        """Drop a session and its conversation state from memory; the store still holds it"""
+        self.sessions.pop(session_id, None)
+        self.conversations.pop(session_id, None)
+        self._persisted_messages.pop(session_id, None)
+        self._persisted_state.pop(session_id, None)
+
+    def _mark_stored(self, session_id: str):
+        """Remember what the store holds for a session that is no longer cached"""
+        self.writer.flush()
+        try:
+            with self.writer.lock:
+                stored = self.store.load_session(session_id)
+        except Exception as e:
+            logger.error("Error loading chat session %s: %s", session_id, e)
+            return
+        if stored:
+            self._mark_persisted(stored)
+
+    def _persist(self, records: List[Dict]):
+        """Hand records to the write-behind writer"""
+        self.writer.submit(records)
+
+    def wait_persisted(self):
+        """With sync_writes, block until every queued record is in the store so any worker can serve the next turn"""
+        if self.sync_writes:
+            self.writer.flush()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of session records waiting to be written"""
+        return self.writer.depth
+
+    def start(self):
+        """Start writing sessions in the background instead of inline"""
+        self.writer.start()
+
+    def stop(self):
+        """Flush every pending session record and close the store"""
+        self.writer.stop()
+        self.close()
+
+    def _mark_persisted(self, session: ChatSession):
+        """Remember how much of a session the store already holds"""
+        self._persisted_messages[session.session_id] = len(session.messages)
+        self._persisted_state[session.session_id] = self._state_of(session)
+
+    @staticmethod
+    def _state_of(session: ChatSession) -> tuple:
+        """Comparable snapshot of the session's mutable state"""
+        return (copy.deepcopy(session.attributes), session.followup_count,
+                copy.deepcopy(session.conversation_state))
+
+    def get_conversation(self, session_id: str) -> ConversationManager:
+        """Get the conversation state for a session, restoring it from the session if needed"""
+        with self._cache_lock:
+            conversation = self.conversations.get(session_id)
+        if conversation is None:
+            conversation = ConversationManager()
+            session = self.get_session(session_id)
+            if session:
+                for message in session.messages:
+                    role = "assistant" if message["role"] == "bot" else message["role"]
+                    conversation.add_message(role, message["content"])
+                if session.conversation_state:
+                    conversation.restore_state(session.conversation_state)
+                else:
+                    # Sessions saved before conversation state was persisted
+                    conversation.update_attributes(session.attributes, {})
+                    conversation.state["followup_count"] = session.followup_count
+                with self._cache_lock:
+                    # Only cached sessions keep their conversation, so unknown ids add nothing
+                    if session_id in self.sessions:
+                        conversation = self.conversations.setdefault(session_id, conversation)
+        return conversation
+
+    def recommendation_attributes(self) -> List[Dict]:
+        """
+        Collect the attribute sets past recommendations were made for.
+
+        Returns:
+            One attribute dict per recommendation in the session history, repeats included
+        """
+        attribute_sets = []
+        with self.writer.lock:
+            session_ids = self.store.session_ids()
+        for session_id in session_ids:
+            # Read straight from the store so the scan does not fill the session cache
+            try:
+                with self.writer.lock:
+                    session = self.sessions.get(session_id) or self.store.load_session(session_id)
+            except Exception as e:
+                logger.error("Error loading chat session %s: %s", session_id, e)
+                continue
+            if not session:
+                continue
+            for message in session.messages:
+                response = message.get("response_data") or {}
+                if response.get("type") == "recommendation" and response.get("final_attributes"):
+                    attribute_sets.append(response["final_attributes"])
+        return attribute_sets
+
+    def close(self):
+        """Close the underlying session store"""
+        self.store.close()
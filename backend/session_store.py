@@ -0,0 +1,495 @@
+import json
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from models import ChatSession
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, so run a single worker per log
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Base class for session persistence backends.
+
+    Backends persist sessions as a stream of small records so a chat turn costs
+    O(message size) to save. Record shapes:
+        {"op": "create", "session_id", "created_at"}
+        {"op": "message", "session_id", "message"}
+        {"op": "state", "session_id", "attributes", "followup_count", "conversation_state"}
+        {"op": "snapshot", "session_id", "created_at", "messages", "attributes", "followup_count",
+         "conversation_state"}
+    Records written before conversation_state existed simply lack it.
+    """
+
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        """Load a single session, or None if it does not exist"""
+        raise NotImplementedError
+
+    def session_ids(self) -> List[str]:
+        """List the ids of all persisted sessions"""
+        raise NotImplementedError
+
+    def append(self, records: List[Dict]):
+        """Persist a batch of session records"""
+        raise NotImplementedError
+
+    def refresh(self) -> Set[str]:
+        """Pick up records written by other processes, returning the ids of the sessions they touched"""
+        return set()
+
+    def compact(self):
+        """Fold the persisted records down to one snapshot per session"""
+
+    def close(self):
+        """Release any resources held by the store"""
+
+    def import_legacy(self, legacy_file: str):
+        """Import sessions from the old single-file chat_sessions.json format"""
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                sessions_data = json.load(f)
+        except Exception as e:
+            logger.error("Error importing legacy chat sessions: %s", e)
+            return
+        self.append([
+            {
+                'op': 'snapshot',
+                'session_id': sid,
+                'created_at': data['created_at'],
+                'messages': data['messages'],
+                'attributes': data['attributes'],
+                'followup_count': data['followup_count']
+            }
+            for sid, data in sessions_data.items()
+        ])
+        logger.info("Imported %s sessions from %s", len(sessions_data), legacy_file)
+
+    @staticmethod
+    def _apply(session: Optional[ChatSession], record: Dict) -> Optional[ChatSession]:
+        """Apply one record to a session being rebuilt"""
+        op = record['op']
+        if op in ('create', 'snapshot'):
+            session = ChatSession()
+            session.session_id = record['session_id']
+            session.created_at = datetime.fromisoformat(record['created_at'])
+            if op == 'snapshot':
+                session.messages = record['messages']
+                session.attributes = record['attributes']
+                session.followup_count = record['followup_count']
+                session.conversation_state = record.get('conversation_state', {})
+        elif session is None:
+            return None
+        elif op == 'message':
+            session.messages.append(record['message'])
+        elif op == 'state':
+            session.attributes = record['attributes']
+            session.followup_count = record['followup_count']
+            session.conversation_state = record.get('conversation_state', {})
+        return session
+
+    @staticmethod
+    def _snapshot(session: ChatSession) -> Dict:
+        """Build a snapshot record for a session"""
+        return {
+            'op': 'snapshot',
+            'session_id': session.session_id,
+            'created_at': session.created_at.isoformat(),
+            'messages': session.messages,
+            'attributes': session.attributes,
+            'followup_count': session.followup_count,
+            'conversation_state': session.conversation_state
+        }
+
+
+class JsonLogSessionStore(SessionStore):
+    """
+    Append-only JSON lines log of session records.
+
+    Each line is "<session_id>\\t<record json>" so startup only indexes byte offsets
+    per session; sessions are parsed lazily when first requested.
+
+    Several worker processes can share one log. Every access holds a lock on
+    "<log_file>.lock" (shared to read, exclusive to append or compact) and first
+    indexes the records other processes appended since the last access. Compaction
+    replaces the file, so a process that finds a new inode at the path reopens it
+    and reindexes from scratch.
+    """
+
+    def __init__(self, log_file: str = "chat_sessions.log", legacy_file: Optional[str] = None,
+                 compact_every: int = 10000):
+        """
+        Initialize the log store.
+
+        Args:
+            log_file: Path of the append-only log
+            legacy_file: Old chat_sessions.json to import when the log does not exist yet
+            compact_every: Number of appended records after which the log is compacted
+        """
+        self.log_file = log_file
+        self.compact_every = compact_every
+        self.offsets: Dict[str, List[int]] = {}
+        self._appended = 0
+        # Sessions other processes wrote to since the last refresh()
+        self._changed: Set[str] = set()
+        self._lock_file = open(f"{log_file}.lock", 'a')
+        self._lock_depth = 0
+
+        with self._locked(exclusive=True):
+            is_new = not os.path.exists(log_file)
+            self._file = open(log_file, 'ab')
+            self._index()
+            if is_new and legacy_file:
+                self.import_legacy(legacy_file)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Hold the cross-process lock; nested calls run under the outermost lock"""
+        outer = self._lock_depth == 0 and fcntl is not None
+        if outer:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if outer:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _index(self):
+        """Build the session id -> byte offsets index by scanning the whole log"""
+        self.offsets = {}
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._indexed_size = 0
+        self._scan()
+        logger.info("Indexed %s sessions from %s", len(self.offsets), self.log_file)
+
+    def _scan(self) -> Set[str]:
+        """Index the records past the indexed size, returning their session ids"""
+        seen = set()
+        with open(self.log_file, 'rb') as f:
+            f.seek(self._indexed_size)
+            offset = self._indexed_size
+            for line in f:
+                sid, sep, _ = line.partition(b'\t')
+                if sep:
+                    sid = sid.decode('utf-8')
+                    self.offsets.setdefault(sid, []).append(offset)
+                    seen.add(sid)
+                offset += len(line)
+        self._indexed_size = offset
+        return seen
+
+    def _catch_up(self):
+        """Index what other processes appended, or reopen the log after another process compacted it"""
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode:
+            known = set(self.offsets)
+            self._file.close()
+            self._file = open(self.log_file, 'ab')
+            self._index()
+            self._changed |= known | set(self.offsets)
+        elif stat.st_size > self._indexed_size:
+            self._changed |= self._scan()
+
+    def refresh(self) -> Set[str]:
+        with self._locked(exclusive=False):
+            self._catch_up()
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        with self._locked(exclusive=False):
+            self._catch_up()
+            offsets = self.offsets.get(session_id)
+            if not offsets:
+                return None
+            session = None
+            with open(self.log_file, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    _, _, payload = f.readline().partition(b'\t')
+                    try:
+                        session = self._apply(session, json.loads(payload))
+                    except (ValueError, KeyError) as e:
+                        logger.error("Skipping corrupt session record for %s: %s", session_id, e)
+        return session
+
+    def session_ids(self) -> List[str]:
+        with self._locked(exclusive=False):
+            self._catch_up()
+        return list(self.offsets)
+
+    def append(self, records: List[Dict]):
+        with self._locked(exclusive=True):
+            self._catch_up()
+            self._file.seek(0, os.SEEK_END)
+            for record in records:
+                sid = record['session_id']
+                self.offsets.setdefault(sid, []).append(self._file.tell())
+                self._file.write(f"{sid}\t{json.dumps(record, default=str)}\n".encode('utf-8'))
+            self._file.flush()
+            self._indexed_size = self._file.tell()
+            self._appended += len(records)
+            if self._appended >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Rewrite the log with one snapshot line per session"""
+        with self._locked(exclusive=True):
+            self._catch_up()
+            temp_file = f"{self.log_file}.compact"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for sid in self.offsets:
+                    session = self.load_session(sid)
+                    if session:
+                        f.write(f"{sid}\t{json.dumps(self._snapshot(session), default=str)}\n")
+            self._file.close()
+            os.replace(temp_file, self.log_file)
+            self._file = open(self.log_file, 'ab')
+            self._index()
+            self._appended = 0
+        logger.info("Compacted session log to %s sessions", len(self.offsets))
+
+    def close(self):
+        self._file.close()
+        self._lock_file.close()
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session records stored in SQLite, one row per message"""
+
+    def __init__(self, db_file: str = "chat_sessions.db", legacy_file: Optional[str] = None):
+        """
+        Initialize the SQLite store.
+
+        Args:
+            db_file: Path of the SQLite database
+            legacy_file: Old chat_sessions.json to import when the database is empty
+        """
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                attributes TEXT NOT NULL DEFAULT '{}',
+                followup_count INTEGER NOT NULL DEFAULT 0,
+                conversation_state TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+        if 'conversation_state' not in columns:
+            # Databases created before conversation state was persisted
+            with self.conn:
+                self.conn.execute("ALTER TABLE sessions ADD COLUMN conversation_state TEXT NOT NULL DEFAULT '{}'")
+        is_empty = self.conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is None
+        if is_empty and legacy_file:
+            self.import_legacy(legacy_file)
+
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        row = self.conn.execute(
+            "SELECT created_at, attributes, followup_count, conversation_state FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        session = ChatSession()
+        session.session_id = session_id
+        session.created_at = datetime.fromisoformat(row[0])
+        session.attributes = json.loads(row[1])
+        session.followup_count = row[2]
+        session.conversation_state = json.loads(row[3])
+        session.messages = [
+            json.loads(payload) for (payload,) in self.conn.execute(
+                "SELECT payload FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            )
+        ]
+        return session
+
+    def session_ids(self) -> List[str]:
+        return [sid for (sid,) in self.conn.execute("SELECT session_id FROM sessions")]
+
+    def append(self, records: List[Dict]):
+        with self.conn:
+            for record in records:
+                op = record['op']
+                sid = record['session_id']
+                if op in ('create', 'snapshot'):
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO sessions "
+                        "(session_id, created_at, attributes, followup_count, conversation_state) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (sid, record['created_at'], json.dumps(record.get('attributes', {}), default=str),
+                         record.get('followup_count', 0),
+                         json.dumps(record.get('conversation_state', {}), default=str))
+                    )
+                    if op == 'snapshot':
+                        self.conn.execute("DELETE FROM messages WHERE session_id = ?", (sid,))
+                        self.conn.executemany(
+                            "INSERT INTO messages (session_id, payload) VALUES (?, ?)",
+                            [(sid, json.dumps(m, default=str)) for m in record['messages']]
+                        )
+                elif op == 'message':
+                    self.conn.execute(
+                        "INSERT INTO messages (session_id, payload) VALUES (?, ?)",
+                        (sid, json.dumps(record['message'], default=str))
+                    )
+                elif op == 'state':
+                    self.conn.execute(
+                        "UPDATE sessions SET attributes = ?, followup_count = ?, conversation_state = ? "
+                        "WHERE session_id = ?",
+                        (json.dumps(record['attributes'], default=str), record['followup_count'],
+                         json.dumps(record.get('conversation_state', {}), default=str), sid)
+                    )
+
+    def compact(self):
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        self.conn.close()
+
+
+class WriteBehindWriter:
+    """
+    Write-behind queue in front of a SessionStore.
+
+    Records are queued by the request path and appended to the store in batches
+    by a background thread, so chat handlers never wait on disk I/O.
+    """
+
+    def __init__(self, store: SessionStore, flush_interval: float = 0.5, batch_size: int = 200):
+        """
+        Initialize the writer.
+
+        Args:
+            store: Store the records are eventually written to
+            flush_interval: Seconds the writer waits to fill a batch before flushing it
+            batch_size: Maximum number of records appended to the store at once
+        """
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # Serializes store access between the writer thread and lazy session loads
+        self.lock = threading.RLock()
+        self._queue: queue.Queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background writer thread is active"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def depth(self) -> int:
+        """Number of records waiting to be written"""
+        return self._queue.qsize()
+
+    def start(self):
+        """Start the background writer thread"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+        logger.info("Started session writer (flush every %ss, batch %s)", self.flush_interval, self.batch_size)
+
+    def submit(self, records: List[Dict]):
+        """Queue records for writing, or write them inline when the writer is not running"""
+        if self.running:
+            for record in records:
+                self._queue.put(record)
+        else:
+            self._write(records)
+
+    def flush(self):
+        """Block until every record queued so far has been written"""
+        if self.running:
+            self._queue.join()
+        else:
+            self._drain()
+
+    def stop(self):
+        """Stop the writer after every queued record has been written"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._drain()
+        logger.info("Stopped session writer")
+
+    def _run(self):
+        """Writer loop: collect a batch, append it, repeat until stopped and drained"""
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _drain(self):
+        """Write whatever is left in the queue from the calling thread"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, records: List[Dict]):
+        """Append records to the store"""
+        try:
+            with self.lock:
+                self.store.append(records)
+        except Exception as e:
+            logger.error("Error saving chat sessions: %s", e)
+
+
+def create_session_store(backend: str = "log", legacy_file: Optional[str] = "chat_sessions.json",
+                         path: Optional[str] = None) -> SessionStore:
+    """
+    Create a session store by backend name.
+
+    Args:
+        backend: "log" for the append-only JSON log or "sqlite"
+        legacy_file: Old chat_sessions.json to import into a fresh store
+        path: Store location, defaults to chat_sessions.log / chat_sessions.db
+    """
+    if backend == "sqlite":
+        return SQLiteSessionStore(path or "chat_sessions.db", legacy_file=legacy_file)
+    if backend == "log":
+        return JsonLogSessionStore(path or "chat_sessions.log", legacy_file=legacy_file)
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -1,19 +1,21 @@
-import pandas as pd
 import asyncio
 import os
 from dotenv import load_dotenv
 from services.fashion_agent import FashionAgent
+from services.conversation_manager import ConversationManager
+from services.catalog_loader import load_catalog
 
 # Load environment variables from .env file
 load_dotenv()
 
 async def simple_cli():
-    products_df = pd.read_csv('Apparels_shared.csv')
+    products_df = load_catalog('Apparels_shared.csv')
     api_key = os.getenv('GOOGLE_GEMINI_API_KEY')
     if not api_key:
         raise ValueError("GOOGLE_GEMINI_API_KEY not found in .env file")
     
     agent = FashionAgent(products_df, api_key)
+    conversation = ConversationManager()
     
     print("Fashion Agent Ready! Type 'quit' to exit.")
     
@@ -22,7 +24,7 @@ async def simple_cli():
         if user_input.lower() == 'quit':
             break
             
-        response = await agent.process_message(user_input)
+        response = await agent.process_message(user_input, conversation)
         print(f"Agent: {response['message']}")
         
         if response['type'] == 'recommendation':
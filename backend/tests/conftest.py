@@ -0,0 +1,38 @@
+import glob
+import os
+import shutil
+import pytest
+from services.catalog_index import CatalogIndex
+from services.catalog_loader import load_catalog
+from services.vector_index import VectorIndex
+from services.vibe_engine import VibeEngine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_CSV = os.path.join(BACKEND_DIR, 'Apparels_shared.csv')
+
+
+@pytest.fixture(scope='session')
+def products_df():
+    return load_catalog(CATALOG_CSV, use_snapshot=False)
+
+
+@pytest.fixture(scope='session')
+def catalog_index(products_df):
+    return CatalogIndex(products_df)
+
+
+@pytest.fixture(scope='session')
+def vibe_engine():
+    return VibeEngine.from_files(glob.glob(os.path.join(BACKEND_DIR, 'vibe_to_attribute*.txt')))
+
+
+@pytest.fixture(scope='session')
+def vector_index(catalog_index, vibe_engine):
+    return VectorIndex(catalog_index, vibes=vibe_engine.mappings)
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    path = tmp_path / "catalog.csv"
+    shutil.copy(CATALOG_CSV, path)
+    return path
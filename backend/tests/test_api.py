@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import shutil
+import httpx
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    data = tmp_path_factory.mktemp("api")
+    shutil.copy(os.path.join(BACKEND_DIR, 'Apparels_shared.csv'), data / "catalog.csv")
+    env = {
+        "LLM_BACKEND": "mock", "LLM_MOCK_LATENCY_MS": "0", "LLM_MOCK_LATENCY_DIST": "fixed",
+        "CATALOG_PATH": str(data / "catalog.csv"), "CATALOG_SNAPSHOT": "0", "CATALOG_WATCH_INTERVAL": "0",
+        "VIBE_FILES": os.path.join(BACKEND_DIR, "vibe_to_attribute*.txt"),
+        "SESSION_STORE_PATH": str(data / "sessions.log"), "ADMIN_TOKEN": "secret"
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in env.items():
+            patch.setenv(name, value)
+        import main
+    yield main
+    main.session_manager.stop()
+
+
+def call(main, method, url, **kwargs):
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(send())
+
+
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_search_revalidates_with_etag(app):
+    query = {"category": "dress", "limit": 3}
+    first = call(app, "POST", "/api/products/search", json=query)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith(f'W/"{app.catalog_manager.current.version}-')
+    assert first.headers["cache-control"] == "public, max-age=300"
+
+    revalidated = call(app, "POST", "/api/products/search", json=query,
+                       headers={"If-None-Match": f'W/"other", {etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b"" and revalidated.headers["etag"] == etag
+
+    other_page = call(app, "POST", "/api/products/search", json={**query, "offset": 3}, headers={"If-None-Match": etag})
+    assert other_page.status_code == 200 and other_page.headers["etag"] != etag
+
+
+def test_search_by_query_parameters_matches_post(app):
+    query = {"category": "dress", "limit": 3}
+    posted = call(app, "POST", "/api/products/search", json=query)
+    fetched = call(app, "GET", "/api/products/search", params=query)
+    assert fetched.status_code == 200
+    assert fetched.json() == posted.json()
+    assert fetched.headers["etag"] == posted.headers["etag"]
+    revalidated = call(app, "GET", "/api/products/search", params=query, headers={"If-None-Match": posted.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert call(app, "GET", "/api/products/search", params={"limit": 0}).status_code == 422
+
+
+def test_cors_allows_etag_revalidation(app):
+    response = call(app, "GET", "/api/products/search", params={"category": "dress"},
+                    headers={"Origin": "http://localhost:5173"})
+    assert "If-None-Match" in response.headers["access-control-allow-headers"]
+    assert response.headers["access-control-expose-headers"] == "ETag"
+
+
+def test_catalog_reload_changes_the_etag(app):
+    query = {"category": "dress", "limit": 3}
+    before = call(app, "POST", "/api/products/search", json=query)
+    assert call(app, "POST", "/api/admin/catalog/reload?wait=true").status_code == 403
+
+    path = app.catalog_manager.csv_path
+    products = pd.read_csv(path)
+    products[products.index != products.index[products['category'].str.strip() == 'dress'][0]].to_csv(path, index=False)
+    reloaded = call(app, "POST", "/api/admin/catalog/reload?wait=true", headers={"Authorization": "Bearer secret"})
+    assert reloaded.status_code == 200 and reloaded.json()["generation"] == 2
+
+    after = call(app, "POST", "/api/products/search", json=query, headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json()["total_count"] == before.json()["total_count"] - 1
+
+
+def test_streamed_chat_saves_what_was_streamed(app):
+    response = call(app, "POST", "/api/chat/stream", json={"message": "a dress for a party please"})
+    events = read_events(response)
+    streamed = "".join(data["text"] for event, data in events if event == "token")
+    event, done = events[-1]
+    assert event == "done" and done["message"] == streamed
+
+    session_id = events[0][1]["session_id"]
+    history = call(app, "GET", f"/api/chat/{session_id}").json()
+    assert history["messages"][-1]["content"] == streamed
+
+
+@pytest.mark.parametrize('url', ["/api/chat", "/api/chat/stream"])
+def test_user_message_enters_the_conversation_once(app, url):
+    def send(message, session_id=None):
+        response = call(app, "POST", url, json={"message": message, "session_id": session_id})
+        assert response.status_code == 200
+        return read_events(response)[0][1]["session_id"] if url.endswith("stream") else response.json()["session_id"]
+
+    session_id = send("a dress for a party please")
+    roles = [m["role"] for m in app.session_manager.get_conversation(session_id).get_messages()]
+    assert roles == ["user", "assistant"]
+
+    # A restored session is rebuilt from its history without the new message
+    app.session_manager.conversations.pop(session_id)
+    send("something in satin", session_id)
+    roles = [m["role"] for m in app.session_manager.get_conversation(session_id).get_messages()]
+    assert roles == ["user", "assistant", "user", "assistant"]
+
+
+def test_chat_returns_only_new_messages_and_history_pages(app):
+    first = call(app, "POST", "/api/chat", json={"message": "a dress for a party please"}).json()
+    session_id = first["session_id"]
+    assert [m["id"] for m in first["messages"]] == [1, 2]
+    second = call(app, "POST", "/api/chat", json={
+        "message": "in satin", "session_id": session_id, "last_message_id": first["last_message_id"]
+    }).json()
+    assert [m["id"] for m in second["messages"]] == [3, 4]
+    assert second["messages"][0]["content"] == "in satin"
+    # A client that missed a turn gets it too
+    third = call(app, "POST", "/api/chat", json={"message": "size M", "session_id": session_id, "last_message_id": 2}).json()
+    assert [m["id"] for m in third["messages"]] == [3, 4, 5, 6]
+
+    pages, params = [], {"limit": 4}
+    while True:
+        page = call(app, "GET", f"/api/chat/{session_id}", params=params).json()
+        pages.append([m["id"] for m in page["messages"]])
+        if not page["has_more"]:
+            break
+        params["before"] = page["messages"][0]["id"]
+    assert pages == [[3, 4, 5, 6], [1, 2]]
+    assert page["last_message_id"] == 6
+
+
+def test_metrics_endpoint_serves_prometheus_text(app):
+    call(app, "GET", "/api/products/search", params={"category": "dress"})
+    response = call(app, "GET", "/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE fashion_http_request_duration_seconds histogram" in response.text
+    assert 'route="/api/products/search",status="200"' in response.text
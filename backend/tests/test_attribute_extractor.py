@@ -0,0 +1,15 @@
+from services.attribute_extractor import LocalAttributeExtractor
+
+
+def test_vibe_phrases_are_ranking_hints_not_attributes(vibe_engine):
+    result = LocalAttributeExtractor(vibe_engine=vibe_engine).extract("a summer brunch dress")
+    assert result["extracted_attributes"] == {'category': 'dress'}
+    assert 'vibe' not in result["inferred_attributes"]
+    assert result["ranking_hints"]["vibe"] == "summer brunch"
+
+
+def test_stats_count_bypassed_requests(vibe_engine):
+    extractor = LocalAttributeExtractor(vibe_engine=vibe_engine)
+    assert extractor.try_extract("a dress in M under $80") is not None
+    assert extractor.try_extract("something for a party") is None
+    assert extractor.stats() == {"requests": 2, "bypassed": 1, "bypass_rate": 0.5}
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.catalog_index import CatalogIndex
+
+
+def reference_mask(products_df, filters):
+    """Row mask computed directly with pandas, the semantics the bitsets must reproduce"""
+    mask = np.ones(len(products_df), dtype=bool)
+    for attr, value in filters.items():
+        if attr == 'price_max':
+            mask &= products_df['price'].to_numpy(dtype=float) <= float(value)
+        elif attr == 'size':
+            sizes = {s.upper() for s in (value if isinstance(value, list) else [value])}
+            mask &= products_df['available_sizes'].astype(str).map(
+                lambda cell: bool(sizes & {s.strip().upper() for s in cell.split(',')})).to_numpy()
+        else:
+            column = products_df[attr].astype(str).str.strip().str.lower().where(products_df[attr].notna(), None)
+            if isinstance(value, list):
+                wanted = {str(v).lower() for v in value}
+                mask &= column.map(lambda cell: cell in wanted).to_numpy()
+            else:
+                needle = str(value).lower()
+                mask &= column.map(lambda cell: cell is not None and needle in cell).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'category': 'dress'},
+    {'category': 'top', 'size': 'M'},
+    {'category': 'skirt', 'price_max': 80},
+    {'fabric': ['Satin', 'silk'], 'size': ['XS', 'XL']},
+    {'fit': 'relax', 'price_max': 100},
+    {'occasion': 'Party', 'category': 'dress', 'size': 'S', 'price_max': 150},
+    {'category': 'dress', 'color_or_print': 'Nonexistent'},
+])
+def test_bitsets_match_pandas(products_df, catalog_index, filters):
+    bits = catalog_index.match(filters)
+    expected = reference_mask(products_df, filters)
+    assert np.array_equal(catalog_index.to_mask(bits), expected)
+    assert catalog_index.count(bits) == expected.sum()
+    assert np.array_equal(catalog_index.positions(bits), np.flatnonzero(expected))
+
+
+def test_stacked_counts_and_first_positions(catalog_index):
+    filter_sets = [{'category': 'dress'}, {'category': 'top', 'size': 'M'}, {'price_max': 10}, {'fabric': 'Linen'}]
+    stacked = np.stack([catalog_index.match(filters) for filters in filter_sets])
+    counts = catalog_index.count_rows(stacked)
+    assert counts.tolist() == [catalog_index.count(row) for row in stacked]
+
+    wanted = np.array([3, 100, 2, 1])
+    for row, positions, k in zip(stacked, catalog_index.first_positions(stacked, wanted), wanted):
+        assert positions.tolist() == catalog_index.positions(row)[:k].tolist()
+
+
+def test_all_missing_column_is_indexed():
+    products_df = pd.DataFrame({
+        'name': ['A', 'B'], 'category': ['top', 'dress'], 'available_sizes': ['S,M', 'L'],
+        'price': [20, 30], 'neckline': pd.Series([None, None], dtype='category')
+    })
+    index = CatalogIndex(products_df)
+    assert index.count(index.match({'neckline': 'V-neck'})) == 0
+    assert index.positions(index.match({'category': 'dress'})).tolist() == [1]
@@ -0,0 +1,31 @@
+import pandas as pd
+from services.catalog_loader import CatalogLoader
+
+
+def test_snapshot_round_trip_equals_the_csv_parse(catalog_csv, tmp_path):
+    snapshots = str(tmp_path / "snapshots")
+    parsed = CatalogLoader(str(catalog_csv), use_snapshot=False).load()
+
+    writer = CatalogLoader(str(catalog_csv), snapshot_dir=snapshots)
+    assert writer.load().equals(parsed) and writer.source == "csv"
+    reader = CatalogLoader(str(catalog_csv), snapshot_dir=snapshots)
+    loaded = reader.load()
+    assert reader.source == "snapshot"
+    pd.testing.assert_frame_equal(loaded, parsed)
+
+
+def test_changed_csv_invalidates_the_snapshot(catalog_csv, tmp_path):
+    snapshots = str(tmp_path / "snapshots")
+    CatalogLoader(str(catalog_csv), snapshot_dir=snapshots).load()
+
+    products = pd.read_csv(catalog_csv)
+    products.loc[0, 'price'] = 1234
+    products.to_csv(catalog_csv, index=False)
+    loader = CatalogLoader(str(catalog_csv), snapshot_dir=snapshots)
+    reloaded = loader.load()
+    assert loader.source == "csv"
+    assert reloaded.loc[0, 'price'] == 1234
+    # The rebuilt snapshot serves the new contents
+    again = CatalogLoader(str(catalog_csv), snapshot_dir=snapshots)
+    pd.testing.assert_frame_equal(again.load(), reloaded)
+    assert again.source == "snapshot"
@@ -0,0 +1,53 @@
+import asyncio
+import pandas as pd
+from services.catalog_manager import CatalogManager
+from services.conversation_manager import ConversationManager
+from services.fashion_agent import FashionAgent
+from services.llm_client import MockLLMClient
+
+
+def test_reload_swaps_in_a_new_snapshot(catalog_csv):
+    manager = CatalogManager(str(catalog_csv), use_snapshot=False, vector_index=False)
+    first = manager.load()
+    swapped = []
+    manager.subscribe(swapped.append)
+
+    # Touching the file without changing it keeps the snapshot and its caches
+    assert manager.reload(force=True) is None
+
+    products = pd.read_csv(catalog_csv)
+    products[products['category'].str.strip().str.lower() != 'pants'].to_csv(catalog_csv, index=False)
+    second = manager.reload()
+    assert second is manager.current and swapped == [second]
+    assert second.generation == first.generation + 1
+    assert second.version != first.version
+    assert len(second.products_df) == len(first.products_df) - 10
+    # Readers holding the old snapshot keep a complete, consistent catalog
+    assert len(first.products_df) == first.catalog_index.size == 70
+
+
+def test_failed_reload_keeps_the_current_catalog(catalog_csv):
+    manager = CatalogManager(str(catalog_csv), use_snapshot=False, vector_index=False)
+    first = manager.load()
+    catalog_csv.write_text("not,a\ncatalog")
+    assert manager.reload() is None
+    assert manager.current is first
+    assert manager.status()["last_error"]
+
+
+def test_agent_pages_stale_rankings_against_the_new_catalog(catalog_csv):
+    manager = CatalogManager(str(catalog_csv), use_snapshot=False, vector_index=False)
+    snapshot = manager.load()
+    agent = FashionAgent(snapshot.products_df, "", catalog_index=snapshot.catalog_index,
+                         llm_client=MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0))
+    manager.subscribe(agent.swap_catalog)
+    conversation = ConversationManager()
+    asyncio.run(agent.process_message("a dress please", conversation))
+
+    products = pd.read_csv(catalog_csv)
+    products[products['name'] != products.loc[products['category'].str.strip().str.lower() == 'dress', 'name'].iloc[0]].to_csv(
+        catalog_csv, index=False)
+    reloaded = manager.reload()
+    page = agent.more_recommendations(conversation, 0, 50)
+    assert page["total"] == int((reloaded.products_df['category'] == 'dress').sum()) == 19
+    assert {r["name"] for r in page["recommendations"]} <= set(reloaded.products_df['name'])
@@ -0,0 +1,42 @@
+import asyncio
+import json
+import pytest
+from services.llm_client import MockLLMClient
+
+PROMPT = '- User message: "a satin dress for a party"\n- Followup count: 0/2\n'
+
+
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal'])
+def test_same_seed_gives_the_same_latencies(distribution):
+    def latencies(seed):
+        client = MockLLMClient(latency_ms=800, distribution=distribution, seed=seed)
+        return [client._latency() for _ in range(20)]
+
+    assert latencies(3) == latencies(3)
+    assert latencies(3) != latencies(4)
+
+
+def test_responses_are_deterministic_and_streams_match():
+    async def run(client):
+        whole = await client.generate(PROMPT)
+        pieces = [response.text async for response in client.stream(PROMPT)]
+        return whole.text, "".join(pieces)
+
+    first = asyncio.run(run(MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0, chunk_size=5)))
+    second = asyncio.run(run(MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0, chunk_size=5)))
+    assert first == second
+    assert first[0] == first[1]
+    response = json.loads(first[0])
+    assert response["type"] == "recommendation"
+    assert response["extracted_attributes"]["category"] == "dress"
+
+
+def test_canned_responses_rotate_and_fill_in_the_message():
+    canned = [{"type": "followup", "message": "You said: {message}"}, {"type": "recommendation", "message": "Done"}]
+    client = MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0, responses=canned)
+    texts = [json.loads(asyncio.run(client.generate(PROMPT)).text) for _ in range(3)]
+    assert texts == [
+        {"type": "followup", "message": "You said: a satin dress for a party"},
+        {"type": "recommendation", "message": "Done"},
+        {"type": "followup", "message": "You said: a satin dress for a party"},
+    ]
@@ -0,0 +1,52 @@
+import re
+from services.metrics import MetricsRegistry
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def parse(text):
+    """Check the Prometheus text format and return {metric name: [sample lines]}"""
+    assert text.endswith("\n")
+    families, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            current = line.split()[2]
+            families[current] = []
+        elif line.startswith("# TYPE "):
+            assert line.split()[2] == current and line.split()[3] in ('counter', 'gauge', 'histogram')
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            assert match.group(1) == current or match.group(1).rsplit('_', 1)[0] == current, line
+            families[current].append(line)
+    return families
+
+
+def test_render_is_valid_prometheus_text():
+    registry = MetricsRegistry()
+    registry.count("llm_cache_hit")
+    registry.count("llm_cache_hit")
+    registry.count('odd "event"\\name')
+    registry.observe_stage("filter", 0.003)
+    registry.observe_stage("filter", 20.0)
+    registry.gauge("queue_depth", "Records waiting", lambda: 7)
+    families = parse(registry.render())
+
+    assert 'fashion_events_total{event="llm_cache_hit"} 2' in families['fashion_events_total']
+    assert 'fashion_events_total{event="odd \\"event\\"\\\\name"} 1' in families['fashion_events_total']
+    assert families['fashion_queue_depth'] == ['fashion_queue_depth 7']
+    stage = families['fashion_stage_duration_seconds']
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in stage if '_bucket' in line]
+    assert buckets == sorted(buckets) and buckets[-1] == 2
+    assert 'fashion_stage_duration_seconds_bucket{stage="filter",le="0.005"} 1' in stage
+    assert 'fashion_stage_duration_seconds_bucket{stage="filter",le="+Inf"} 2' in stage
+    assert 'fashion_stage_duration_seconds_count{stage="filter"} 2' in stage
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.count("llm_cache_hit")
+    registry.observe_stage("filter", 0.01)
+    registry.observe_request("GET", "/", 200, 0.01)
+    families = parse(registry.render())
+    assert all(samples == [] for samples in families.values())
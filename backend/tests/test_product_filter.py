@@ -0,0 +1,138 @@
+from itertools import combinations
+import numpy as np
+import pandas as pd
+import pytest
+from services.catalog_index import CatalogIndex
+from services.catalog_loader import load_catalog
+from services.metrics import metrics
+from services.product_filter import ProductFilter
+
+PRIORITIES = ProductFilter.ATTRIBUTE_PRIORITIES
+
+
+def brute_force_relaxation(index, attributes, top_k):
+    """Best (count, cost, size) over every subset of removable filters, matched against the catalog"""
+    removable = [attr for attr in attributes
+                 if PRIORITIES.get(attr, 0) < 4 and index.attribute_bitset(attr, attributes[attr]) is not None]
+    best = None
+    for size in range(len(removable) + 1):
+        for removed in combinations(removable, size):
+            count = index.count(index.match({k: v for k, v in attributes.items() if k not in removed}))
+            cost = sum(PRIORITIES.get(attr, 1) for attr in removed)
+            key = (-min(count, max(top_k, 1)), cost, size)
+            if best is None or key < best[0]:
+                best = (key, count)
+    return best
+
+
+@pytest.mark.parametrize('attributes, top_k', [
+    ({'category': 'dress', 'fabric': 'Satin', 'fit': 'Flowy', 'occasion': 'Party'}, 3),
+    ({'category': 'top', 'size': 'M', 'fabric': 'Velvet', 'color_or_print': 'Jet black', 'sleeve_length': 'Sleeveless'}, 5),
+    ({'category': 'skirt', 'price_max': 90, 'fit': 'Relaxed', 'occasion': 'Work', 'length': 'Midi'}, 3),
+    ({'category': 'pants', 'fabric': ['Linen', 'Cotton'], 'fit': 'Slim'}, 1),
+    ({'category': 'dress', 'fabric': 'Nonexistent'}, 3),
+])
+def test_relaxation_plan_is_optimal(catalog_index, attributes, top_k):
+    matched, count, removed = ProductFilter._plan_relaxation(catalog_index, attributes, top_k)
+    kept = {k: v for k, v in attributes.items() if k not in removed}
+    # The returned bitset and count are those of the filters kept
+    assert np.array_equal(matched, catalog_index.match(kept))
+    assert count == catalog_index.count(matched)
+    # And no other subset of removable filters ranks better
+    key = (-min(count, max(top_k, 1)), sum(PRIORITIES.get(attr, 1) for attr in removed), len(removed))
+    assert key == brute_force_relaxation(catalog_index, attributes, top_k)[0]
+
+
+def test_essential_filters_are_never_relaxed(catalog_index):
+    attributes = {'category': 'dress', 'price_max': 1, 'fabric': 'Satin'}
+    _, count, removed = ProductFilter._plan_relaxation(catalog_index, attributes, 3)
+    assert count == 0
+    assert 'category' not in removed and 'price_max' not in removed
+
+
+def test_rank_products_drops_the_lowest_priority_filters(tmp_path):
+    csv = tmp_path / "catalog.csv"
+    csv.write_text(
+        "id,name,category,available_sizes,fit,fabric,sleeve_length,color_or_print,occasion,neckline,length,pant_type,price\n"
+        'D1,Satin Party Dress,dress,"S,M",Bodycon,Satin,,Black,Party,,Midi,,120\n'
+        'D2,Satin Work Dress,dress,"S,M",Bodycon,Satin,,Black,Work,,Midi,,110\n'
+        'D3,Cotton Party Dress,dress,"S,M",Bodycon,Cotton,,Black,Party,,Midi,,90\n'
+        'T1,Satin Party Top,top,"S,M",Relaxed,Satin,,Black,Party,,,,60\n'
+    )
+    products_df = load_catalog(str(csv), use_snapshot=False)
+    index = CatalogIndex(products_df)
+    # Dropping occasion (priority 1) or fabric (priority 3) both reach top_k; occasion is cheaper
+    ranked = ProductFilter.rank_products(
+        products_df, {'category': 'dress', 'fabric': 'Satin', 'occasion': 'Party'}, top_k=2, index=index
+    )
+    assert ranked.removed_filters == ['occasion']
+    assert ranked.total == 2
+    assert sorted(products_df.iloc[ranked.positions]['id']) == ['D1', 'D2']
+
+
+@pytest.mark.parametrize('top_k', [0, 1, 3, 10, 50, 500])
+def test_top_k_orders_by_score_then_catalog_order(top_k):
+    rng = np.random.default_rng(7)
+    # Few distinct scores, so most candidates tie
+    scores = rng.integers(0, 4, size=200).astype(np.int32)
+    expected = np.argsort(-scores, kind='stable')[:top_k]
+    assert np.array_equal(ProductFilter._top_k(scores, top_k), expected)
+
+
+def test_top_k_breaks_score_ties_by_boost():
+    rng = np.random.default_rng(11)
+    scores = rng.integers(0, 3, size=100).astype(np.int32)
+    boosts = rng.integers(0, 3, size=100).astype(np.int32)
+    expected = np.lexsort((np.arange(100), -boosts, -scores))[:10]
+    assert np.array_equal(ProductFilter._top_k(scores, 10, boosts=boosts), expected)
+
+
+def test_scores_are_priority_weighted_exact_matches(products_df, catalog_index):
+    attributes = {'category': 'dress', 'fabric': ['Satin', 'silk'], 'fit': 'Relaxed', 'occasion': 'Party'}
+    positions = np.arange(len(products_df))
+    scores, _ = ProductFilter._score_products(catalog_index, positions, attributes)
+
+    expected = np.zeros(len(products_df), dtype=int)
+    for attr, value in attributes.items():
+        wanted = {v.lower() for v in (value if isinstance(value, list) else [value])}
+        column = products_df[attr].astype(str).str.strip().str.lower()
+        expected += PRIORITIES[attr] * (column.isin(wanted) & products_df[attr].notna()).to_numpy()
+    assert np.array_equal(scores, expected)
+
+
+def random_profiles(products_df, count, seed):
+    """Attribute sets drawn from catalog values, a mix of exact matches, lists and misses"""
+    rng = np.random.default_rng(seed)
+    columns = ['fabric', 'fit', 'color_or_print', 'occasion', 'sleeve_length']
+    profiles = []
+    for _ in range(count):
+        row = products_df.iloc[rng.integers(len(products_df))]
+        profile = {'category': str(row['category'])}
+        for column in rng.choice(columns, size=rng.integers(0, 4), replace=False):
+            if rng.random() < 0.2:
+                profile[column] = 'Nonexistent'
+            elif rng.random() < 0.3:
+                profile[column] = [str(v) for v in products_df[column].dropna().sample(2, random_state=int(rng.integers(1 << 30)))]
+            elif pd.notna(row[column]):
+                profile[column] = str(row[column])
+        if rng.random() < 0.3:
+            profile['size'] = str(rng.choice(['XS', 'S', 'M', 'L', 'XL']))
+        if rng.random() < 0.3:
+            profile['price_max'] = int(rng.integers(30, 200))
+        profiles.append(profile)
+    return profiles
+
+
+@pytest.mark.parametrize('use_vectors', [False, True])
+def test_rank_batch_equals_rank_products(products_df, catalog_index, vector_index, use_vectors):
+    profiles = random_profiles(products_df, 60, seed=5)
+    vectors = vector_index if use_vectors else None
+    vectorized = metrics.events.value(event="batch_profile_vectorized")
+    batch = ProductFilter.rank_batch(products_df, profiles, 3, 3, index=catalog_index, vector_index=vectors)
+    # Both the matrix path and the single-set fallback are exercised
+    assert 0 < metrics.events.value(event="batch_profile_vectorized") - vectorized < len(profiles)
+    for profile, ranked in zip(profiles, batch):
+        expected = ProductFilter.rank_products(products_df, profile, 3, 3, index=catalog_index, vector_index=vectors)
+        assert np.array_equal(ranked.positions, expected.positions), profile
+        assert np.array_equal(ranked.scores, expected.scores), profile
+        assert ranked.total == expected.total and ranked.removed_filters == expected.removed_filters, profile
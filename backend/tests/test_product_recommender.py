@@ -0,0 +1,33 @@
+from services.catalog_index import CatalogIndex
+from services.product_recommender import ProductRecommender
+
+
+def test_canonical_keys_ignore_order_case_and_repeats():
+    first = {'fabric': ['Satin', 'silk'], 'category': ' Dress', 'size': 'M'}
+    second = {'size': 'm', 'category': 'dress', 'fabric': ['SILK', 'satin', 'Satin']}
+    assert ProductRecommender.canonical_attributes(first) == ProductRecommender.canonical_attributes(second)
+    assert ProductRecommender.attribute_fingerprint(first) == ProductRecommender.attribute_fingerprint(second)
+    assert (ProductRecommender.canonical_attributes(first)
+            != ProductRecommender.canonical_attributes({**second, 'size': 'L'}))
+
+
+def test_equivalent_attributes_share_a_cached_ranking(products_df, catalog_index):
+    recommender = ProductRecommender(products_df, catalog_index)
+    ranked = recommender.rank({'category': 'dress', 'fabric': ['Satin', 'Silk']})
+    assert recommender.rank({'fabric': ['silk', 'satin'], 'category': 'DRESS'}) is ranked
+    assert (recommender.cache_hits, recommender.cache_misses) == (1, 1)
+
+
+def test_cache_misses_after_a_catalog_swap(products_df, catalog_index):
+    recommender = ProductRecommender(products_df, catalog_index)
+    attributes = {'category': 'dress', 'occasion': 'Party'}
+    before = recommender.rank(attributes)
+
+    smaller = products_df.iloc[1:].reset_index(drop=True)
+    smaller_index = CatalogIndex(smaller)
+    recommender.swap_catalog(smaller, smaller_index)
+    after = recommender.rank(attributes)
+    assert after is not before
+    assert after.version == smaller_index.version != before.version
+    assert (recommender.cache_hits, recommender.cache_misses) == (0, 2)
+    assert recommender.cache_stats()['size'] == 1
@@ -0,0 +1,36 @@
+from services.prompt_builder import PromptBuilder, estimate_tokens
+
+
+def history(count, words=12):
+    return [{'role': 'user' if n % 2 == 0 else 'assistant', 'content': f"message {n} " + "word " * words}
+            for n in range(count)]
+
+
+def test_short_history_is_kept_whole():
+    builder = PromptBuilder(history_token_budget=400)
+    lines = builder.format_history(history(3)).splitlines()
+    assert [line.split()[2] for line in lines] == ["0", "1", "2"]
+    assert "omitted" not in builder.format_history(history(3))
+    assert builder.format_history([]) == "  (none)"
+
+
+def test_long_history_keeps_the_newest_turns_within_budget():
+    builder = PromptBuilder(history_token_budget=100)
+    messages = history(40)
+    lines = builder.format_history(messages).splitlines()
+
+    kept = lines[1:]
+    assert 1 < len(kept) < 40
+    assert lines[0] == f"  ({40 - len(kept)} earlier messages omitted; their preferences are in Current attributes)"
+    # The newest messages survive, oldest first, and fit the budget
+    assert [int(line.split()[2]) for line in kept] == list(range(40 - len(kept), 40))
+    assert sum(estimate_tokens(line) for line in kept) <= 100
+
+
+def test_a_message_that_partly_fits_is_truncated():
+    builder = PromptBuilder(history_token_budget=60)
+    messages = [{'role': 'user', 'content': "word " * 200}, {'role': 'assistant', 'content': "short reply"}]
+    lines = builder.format_history(messages).splitlines()
+    assert lines[0].startswith("  user: word") and lines[0].endswith("...")
+    assert lines[1] == "  assistant: short reply"
+    assert "omitted" not in "\n".join(lines)
@@ -0,0 +1,46 @@
+import asyncio
+from services.prompt_context import PromptContext, min_cache_tokens
+
+
+class FakeBackend:
+    supports_caching = True
+    supports_system_instruction = True
+
+    def __init__(self, min_cache_tokens):
+        self.min_cache_tokens = min_cache_tokens
+        self.calls = []
+
+    def plain_model(self):
+        return 'plain'
+
+    def system_model(self, system_instruction):
+        return 'system'
+
+    def create_cache(self, system_instruction, ttl):
+        self.calls.append('create')
+        return 'cache'
+
+    def cached_model(self, cache):
+        return 'cached'
+
+
+def test_small_prompt_is_never_cached():
+    backend = FakeBackend(min_cache_tokens=4096)
+    context = PromptContext("x" * 4 * 1400, backend)
+    for _ in range(3):
+        assert asyncio.run(context.acquire()) == ('system', False)
+    assert backend.calls == []
+    assert context.stats()['cache_eligible'] is False
+
+
+def test_large_prompt_is_cached_once():
+    backend = FakeBackend(min_cache_tokens=1024)
+    context = PromptContext("x" * 4 * 1400, backend)
+    for _ in range(3):
+        assert asyncio.run(context.acquire()) == ('cached', False)
+    assert backend.calls == ['create']
+
+
+def test_min_cache_tokens_by_model():
+    assert min_cache_tokens('gemini-2.5-flash-lite') == 1024
+    assert min_cache_tokens('gemini-2.0-flash') == 4096
@@ -0,0 +1,23 @@
+import asyncio
+from services.response_cache import ResponseCache
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = ResponseCache(db_path=path)
+    key = cache.make_key("A red dress", {}, 0, [])
+    cache.set(key, {"type": "followup", "message": "What size?"})
+    cache.close()
+
+    reopened = ResponseCache(db_path=path)
+    assert reopened.make_key("a  RED dress", {}, 0, []) == key
+    assert asyncio.run(reopened.get_async(key)) == {"type": "followup", "message": "What size?"}
+    assert asyncio.run(reopened.get_async("missing")) is None
+    assert reopened.stats()["hits"] == 1 and reopened.stats()["misses"] == 1
+    reopened.close()
+
+
+def test_prompt_or_model_version_changes_the_key():
+    cache = ResponseCache()
+    old = cache.make_key("a red dress", {}, 0, [], version="prompt-v1")
+    assert cache.make_key("a red dress", {}, 0, [], version="prompt-v2") != old
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from services.conversation_manager import ConversationManager
+from services.fashion_agent import FashionAgent
+from services.llm_client import MockLLMClient
+from services.product_filter import ProductFilter
+from services.product_recommender import ProductRecommender
+from services.response_formatter import ResponseFormatter
+
+
+def test_page_reports_matches_and_ranking_depth(products_df, catalog_index):
+    agent = FashionAgent(products_df, "", catalog_index=catalog_index, ranking_depth=4,
+                         llm_client=MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0))
+    conversation = ConversationManager()
+    asyncio.run(agent.process_message("a dress please", conversation))
+
+    page = agent.more_recommendations(conversation, 3, 3)
+    matches = int((products_df['category'].str.lower() == 'dress').sum())
+    assert page["total"] == matches > 4
+    assert page["depth"] == 4
+    assert len(page["recommendations"]) == 1 and page["next_cursor"] is None
+
+
+def iterrows_recommendations(recommendations, attributes):
+    """The per-row serialization create_recommendation_response used before the columnar pass"""
+    rec_list = []
+    for _, product in recommendations.iterrows():
+        product = product.to_dict()
+        reasons = [f"matches {attr}: {value}" for attr, value in attributes.items()
+                   if attr in product and product[attr] == value]
+        rec_list.append({
+            "id": str(product['id']),
+            "name": str(product['name']),
+            "price": float(product['price']),
+            "category": str(product['category']),
+            "available_sizes": str(product['available_sizes']),
+            "match_reason": f"Perfect for your request: {', '.join(reasons[:2])}" if reasons else "Great match for your style"
+        })
+    return rec_list
+
+
+@pytest.mark.parametrize('attributes', [
+    {'category': 'dress', 'fabric': 'Linen', 'occasion': 'Party', 'fit': 'Flowy'},
+    {'category': 'top', 'fit': 'Relaxed'},
+    {'category': 'skirt', 'color_or_print': 'Nonexistent'},
+])
+def test_columnar_serialization_matches_iterrows(products_df, catalog_index, attributes):
+    recommendations = ProductFilter.filter_products(products_df, attributes, top_k=10, index=catalog_index)
+    formatter = ResponseFormatter(ProductRecommender(products_df, catalog_index))
+    assert formatter._serialize_recommendations(recommendations) == iterrows_recommendations(recommendations, attributes)
@@ -0,0 +1,216 @@
+import json
+import pytest
+from models import ChatSession
+from session_manager import SessionManager
+from session_store import JsonLogSessionStore, create_session_store
+
+
+@pytest.fixture(params=['log', 'sqlite'])
+def store_path(request, tmp_path):
+    return request.param, str(tmp_path / f"sessions.{request.param}")
+
+
+def open_manager(store_path):
+    backend, path = store_path
+    return SessionManager(store=create_session_store(backend, legacy_file=None, path=path))
+
+
+def test_conversation_state_survives_restart(store_path):
+    manager = open_manager(store_path)
+    session = manager.create_session()
+    conversation = manager.get_conversation(session.session_id)
+    conversation.update_attributes({'category': 'dress', 'size': 'M'}, {'fit': 'Relaxed'})
+    conversation.update_ranking_hints({'fabric': 'Satin'})
+    conversation.increment_followup_count()
+    session.add_message("user", "a relaxed dress in M")
+    session.attributes = {'size': 'M'}
+    manager.update_session(session.session_id, session)
+    manager.stop()
+
+    restored = open_manager(store_path).get_conversation(session.session_id)
+    assert restored.get_extracted_attributes() == {'category': 'dress', 'size': 'M'}
+    assert restored.get_inferred_attributes() == {'fit': 'Relaxed'}
+    assert restored.get_attributes() == {'category': 'dress', 'size': 'M', 'fit': 'Relaxed'}
+    assert restored.get_ranking_hints() == {'fabric': 'Satin'}
+    assert restored.get_followup_count() == 1
+    assert [m['content'] for m in restored.get_messages()] == ["a relaxed dress in M"]
+
+
+def test_sessions_without_conversation_state_fall_back_to_attributes(store_path):
+    manager = open_manager(store_path)
+    session = manager.create_session()
+    session.attributes = {'category': 'top'}
+    session.followup_count = 2
+    manager.update_session(session.session_id, session)
+    manager.stop()
+
+    restored = open_manager(store_path).get_conversation(session.session_id)
+    assert restored.get_attributes() == {'category': 'top'}
+    assert restored.get_followup_count() == 2
+
+
+def message_record(session_id, content):
+    return {'op': 'message', 'session_id': session_id, 'message': {'role': 'user', 'content': content}}
+
+
+def test_log_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    first = JsonLogSessionStore(path)
+    second = JsonLogSessionStore(path)
+    session = ChatSession()
+    first.append([{'op': 'create', 'session_id': session.session_id, 'created_at': session.created_at.isoformat()},
+                  message_record(session.session_id, "one")])
+
+    # Records another worker appended after startup are found without a restart
+    assert [m['content'] for m in second.load_session(session.session_id).messages] == ["one"]
+    second.append([message_record(session.session_id, "two")])
+    assert first.refresh() == {session.session_id}
+    assert first.refresh() == set()
+
+    # Appends after another worker compacted go to the new file, not the replaced one
+    first.compact()
+    second.append([message_record(session.session_id, "three")])
+    assert [m['content'] for m in first.load_session(session.session_id).messages] == ["one", "two", "three"]
+    assert session.session_id in first.refresh()
+    first.close()
+    second.close()
+
+    reopened = JsonLogSessionStore(path)
+    assert [m['content'] for m in reopened.load_session(session.session_id).messages] == ["one", "two", "three"]
+    reopened.close()
+
+
+def test_manager_reloads_sessions_written_by_another_worker(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    first = SessionManager(store=JsonLogSessionStore(path))
+    second = SessionManager(store=JsonLogSessionStore(path))
+    session = first.create_session()
+    session.add_message("user", "hello")
+    first.update_session(session.session_id, session)
+
+    other = second.get_session(session.session_id)
+    other.add_message("bot", "hi there")
+    second.update_session(session.session_id, other)
+
+    assert [m['content'] for m in first.get_session(session.session_id).messages] == ["hello", "hi there"]
+    first.stop()
+    second.stop()
+
+
+def test_log_lines_are_session_id_tab_record(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    manager = SessionManager(store=JsonLogSessionStore(path))
+    session = manager.create_session()
+    session.add_message("user", "a linen top")
+    manager.update_session(session.session_id, session)
+    manager.stop()
+
+    with open(path, encoding='utf-8') as f:
+        lines = [line.rstrip("\n").split("\t", 1) for line in f]
+    assert {sid for sid, _ in lines} == {session.session_id}
+    records = [json.loads(payload) for _, payload in lines]
+    assert [record['op'] for record in records] == ['create', 'message']
+    assert records[1]['message']['content'] == "a linen top"
+
+
+def test_compaction_keeps_one_snapshot_per_session(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    store = JsonLogSessionStore(path, compact_every=7)
+    manager = SessionManager(store=store)
+    sessions = [manager.create_session() for _ in range(2)]
+    for turn in range(3):
+        for session in sessions:
+            session.add_message("user", f"message {turn}")
+            manager.update_session(session.session_id, session)
+    before = {s.session_id: store.load_session(s.session_id).messages for s in sessions}
+    store.compact()
+
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line.split("\t", 1)[1]) for line in f]
+    assert [record['op'] for record in records] == ['snapshot', 'snapshot']
+    assert {s.session_id: store.load_session(s.session_id).messages for s in sessions} == before
+    manager.stop()
+
+
+def test_legacy_sessions_are_imported(store_path, tmp_path):
+    legacy = tmp_path / "chat_sessions.json"
+    legacy.write_text(json.dumps({"old": {
+        "created_at": "2024-05-01T10:00:00", "attributes": {"category": "skirt"}, "followup_count": 1,
+        "messages": [{"role": "user", "content": "a skirt"}]
+    }}))
+    backend, path = store_path
+    store = create_session_store(backend, legacy_file=str(legacy), path=path)
+    session = store.load_session("old")
+    assert session.attributes == {"category": "skirt"}
+    assert [m['content'] for m in session.messages] == ["a skirt"]
+    assert store.session_ids() == ["old"]
+    store.close()
+
+
+def test_least_recently_used_sessions_are_evicted_and_reloaded(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    manager = SessionManager(store=JsonLogSessionStore(path), max_sessions=2)
+    manager.start()
+    sessions = []
+    for n in range(3):
+        session = manager.create_session()
+        session.add_message("user", f"message {n}")
+        manager.get_conversation(session.session_id)
+        manager.update_session(session.session_id, session)
+        sessions.append(session.session_id)
+
+    assert list(manager.sessions) == sessions[1:]
+    assert set(manager.conversations) <= set(sessions[1:])
+    assert set(manager._persisted_messages) == set(sessions[1:])
+    # Evicted sessions come back from the store, queued records included
+    reloaded = manager.get_session(sessions[0])
+    assert [m['content'] for m in reloaded.messages] == ["message 0"]
+    assert list(manager.sessions) == [sessions[2], sessions[0]]
+    manager.stop()
+
+
+def test_session_evicted_mid_turn_is_saved_once(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    manager = SessionManager(store=JsonLogSessionStore(path), max_sessions=1)
+    manager.start()
+    session = manager.create_session()
+    session.add_message("user", "first")
+    manager.update_session(session.session_id, session)
+    conversation = manager.get_conversation(session.session_id)
+
+    # Another session pushes this one out while its turn is running
+    manager.create_session()
+    conversation.update_attributes({'category': 'dress'}, {})
+    session.add_message("bot", "a reply")
+    manager.update_session(session.session_id, session, conversation)
+    manager.stop()
+
+    restored = open_manager(('log', path))
+    assert [m['content'] for m in restored.get_session(session.session_id).messages] == ["first", "a reply"]
+    assert restored.get_conversation(session.session_id).get_attributes() == {'category': 'dress'}
+    restored.stop()
+
+
+def test_sync_writes_let_workers_alternate_turns(tmp_path):
+    path = str(tmp_path / "sessions.log")
+    first = SessionManager(store=JsonLogSessionStore(path), sync_writes=True)
+    second = SessionManager(store=JsonLogSessionStore(path), sync_writes=True)
+    first.start()
+    second.start()
+
+    session = first.create_session()
+    for turn in range(3):
+        # Consecutive turns of one session land on alternating workers
+        manager = first if turn % 2 == 0 else second
+        current = manager.get_session(session.session_id)
+        current.add_message("user", f"question {turn}")
+        current.add_message("bot", f"answer {turn}")
+        manager.update_session(session.session_id, current)
+        manager.wait_persisted()
+
+    for manager in (first, second):
+        messages = manager.get_session(session.session_id).messages
+        assert [m['id'] for m in messages] == list(range(1, 7))
+        assert [m['content'] for m in messages][::2] == ["question 0", "question 1", "question 2"]
+    first.stop()
+    second.stop()
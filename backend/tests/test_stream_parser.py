@@ -0,0 +1,68 @@
+import json
+import random
+import pytest
+from services.stream_parser import IncrementalResponseParser
+
+RESPONSE = {
+    "type": "recommendation",
+    "extracted_attributes": {"category": "dress", "size": ["S", "M"], "price_max": 80},
+    "inferred_attributes": {},
+    "message": "Here are \"lovely\" picks,\nwith a café vibe — and a back\\slash! \U0001F457",
+    "confidence": 0.75,
+    "followup": None
+}
+
+
+def chunked(text, sizes):
+    position = 0
+    for size in sizes:
+        yield text[position:position + size]
+        position += size
+    yield text[position:]
+
+
+def parse(chunks):
+    parser = IncrementalResponseParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return parser, events
+
+
+@pytest.mark.parametrize('text', [
+    json.dumps(RESPONSE),
+    json.dumps(RESPONSE, ensure_ascii=False, indent=2),
+    "```json\n" + json.dumps(RESPONSE) + "\n```",
+])
+@pytest.mark.parametrize('seed', range(5))
+def test_any_chunking_gives_the_same_events(text, seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 8) for _ in range(len(text))]
+    parser, events = parse(chunked(text, sizes))
+
+    fields = dict(data for kind, data in events if kind == "field")
+    deltas = "".join(data for kind, data in events if kind == "message_delta")
+    assert fields == RESPONSE
+    assert deltas == RESPONSE["message"]
+    assert parser.done
+    assert parser.result() == RESPONSE
+
+
+def test_fields_arrive_before_the_object_ends():
+    text = json.dumps(RESPONSE)
+    cut = text.index('"message"')
+    parser, events = parse([text[:cut]])
+    assert [data[0] for kind, data in events if kind == "field"] == \
+        ["type", "extracted_attributes", "inferred_attributes"]
+    assert not parser.done
+
+
+def test_message_streams_while_it_is_written():
+    text = json.dumps(RESPONSE)
+    start = text.index('"message": "') + len('"message": "')
+    parser, events = parse([text[:start + 10]])
+    assert events[-1] == ("message_delta", RESPONSE["message"][:9])
+
+
+def test_truncated_output_is_not_valid():
+    parser, _ = parse([json.dumps(RESPONSE)[:40]])
+    with pytest.raises(json.JSONDecodeError):
+        parser.result()
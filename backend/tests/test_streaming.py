@@ -0,0 +1,28 @@
+import asyncio
+from services.conversation_manager import ConversationManager
+from services.fashion_agent import FashionAgent
+from services.llm_client import MockLLMClient
+
+
+def stream(agent, message, conversation):
+    async def collect():
+        return [event async for event in agent.stream_message(message, conversation)]
+    return asyncio.run(collect())
+
+
+def test_done_message_is_the_streamed_text(products_df, catalog_index):
+    llm = MockLLMClient(latency_ms=0, distribution='fixed', chunk_delay_ms=0, chunk_size=7)
+    agent = FashionAgent(products_df, "", catalog_index=catalog_index, llm_client=llm)
+    conversation = ConversationManager()
+
+    for message in ["something for a party", "a dress please"]:
+        events = stream(agent, message, conversation)
+        streamed = "".join(data["text"] for kind, data in events if kind == "token")
+        kind, response = events[-1]
+        assert kind == "done"
+        assert response["message"] == streamed
+        reply = conversation.get_messages()[-1]
+        assert (reply["role"], reply["content"]) == ("assistant", streamed)
+    # The recommendation keeps the formatter's justification in its own field
+    assert response["type"] == "recommendation"
+    assert response["justification"].startswith("Based on your request")
@@ -0,0 +1,47 @@
+import pytest
+from services.attribute_extractor import LocalAttributeExtractor
+from services.product_filter import ProductFilter
+
+PLAIN_QUERIES = [
+    "size M dress under 60 for the office",
+    "I need jeans",
+    "M size dress under $80 for work",
+    "show me tops",
+    "boho chic top",
+]
+
+
+@pytest.mark.parametrize("query", PLAIN_QUERIES[:2] + PLAIN_QUERIES[3:])
+def test_plain_queries_resolve_to_nothing(vector_index, query):
+    resolution = vector_index.resolve(query)
+    assert resolution.attributes == {}
+    assert resolution.vibes == []
+
+
+def test_category_words_do_not_pull_in_vibes(vector_index):
+    resolution = vector_index.resolve("black dress for a party")
+    assert 'color_or_print' not in resolution.attributes
+    assert resolution.vibes == ['party']
+
+
+def test_descriptive_words_still_resolve(vector_index):
+    assert vector_index.resolve("a velvet top").attributes == {'fabric': 'Velvet'}
+    assert vector_index.resolve("dusty rose maxi").attributes == {'color_or_print': 'Dusty rose', 'length': 'Maxi'}
+
+
+@pytest.mark.parametrize("query", PLAIN_QUERIES)
+def test_resolver_hints_never_become_filters(vector_index, vibe_engine, query):
+    extractor = LocalAttributeExtractor(vibe_resolver=vector_index, vibe_engine=vibe_engine)
+    without = LocalAttributeExtractor(vibe_engine=vibe_engine).extract(query)
+    result = extractor.extract(query)
+    assert result["extracted_attributes"] == without["extracted_attributes"]
+    assert result["inferred_attributes"] == without["inferred_attributes"]
+
+
+def test_hints_only_reorder_ties(products_df, catalog_index):
+    attributes = {'category': 'dress'}
+    plain = ProductFilter.rank_products(products_df, attributes, 3, index=catalog_index)
+    hinted = ProductFilter.rank_products(products_df, attributes, 3, index=catalog_index, hints={'fabric': 'Satin'})
+    assert hinted.total == plain.total
+    assert sorted(hinted.positions) == sorted(plain.positions)
+    assert set(catalog_index.products_df['fabric'].iloc[hinted.positions[:2]]) == {'Satin'}
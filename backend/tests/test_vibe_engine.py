@@ -0,0 +1,44 @@
+from services.vibe_engine import VibeEngine, parse_vibe_file
+
+VIBE_FILE = '''
+# version: 2
+"beachy vacay dress": {"fit": "Relaxed", "fabric": ["Linen", "Cotton"]},
+"flowy dresses for garden-party": {"color": "pastel floral"}
+"luxurious" / "party"  → fabric: velvet / satin
+'''
+
+
+def test_parse_both_entry_forms():
+    mappings = parse_vibe_file(VIBE_FILE)
+    assert mappings['beachy vacay dress'] == {'fit': 'Relaxed', 'fabric': ['Linen', 'Cotton']}
+    assert mappings['party'] == {'fabric': ['velvet', 'satin']}
+    assert mappings['luxurious'] == mappings['party']
+
+
+def test_aliases_use_distinctive_words_only():
+    assert VibeEngine.aliases('beachy vacay dress') == ['beachy vacay']
+    assert VibeEngine.aliases('flowy dresses for garden-party') == ['flowy garden party', 'garden party']
+    assert VibeEngine.aliases('party') == ['party']
+
+
+def test_category_words_do_not_match_curated_phrases():
+    engine = VibeEngine(parse_vibe_file(VIBE_FILE))
+    assert engine.match("size M dress under 60 for the office") == []
+    assert engine.match("a black dress for a party") == ['party']
+    assert engine.match("something beachy vacay") == ['beachy vacay dress']
+
+
+def test_hints_use_canonical_attribute_names_and_values():
+    engine = VibeEngine(parse_vibe_file(VIBE_FILE))
+    assert engine.infer("flowy dress for a garden party") == {'color_or_print': 'Pastel floral'}
+    assert engine.infer("party tonight") == {'fabric': ['Velvet', 'Satin']}
+
+
+def test_later_file_versions_override_earlier(tmp_path):
+    old = tmp_path / 'vibes.v1.txt'
+    new = tmp_path / 'vibes.v3.txt'
+    old.write_text('"party" → fabric: satin\n"party" → fit: relaxed\n')
+    new.write_text('"party" → fabric: velvet\n')
+    engine = VibeEngine.from_files([str(new), str(old)], base={})
+    assert engine.mappings['party'] == {'fabric': 'Velvet', 'fit': 'Relaxed'}
+    assert engine.version.startswith('v3-')
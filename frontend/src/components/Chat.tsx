@@ -19,13 +19,25 @@ export const Chat: React.FC = () => {
   const [inputValue, setInputValue] = useState("");
   const [isTyping, setIsTyping] = useState(false);
   const [sessionId, setSessionId] = useState<string | null>(null);
+  // Newest server message id we hold, so responses only carry newer messages
+  const [lastMessageId, setLastMessageId] = useState<number | undefined>();
+  // Oldest server message id we hold, and whether the server has older ones
+  const [oldestMessageId, setOldestMessageId] = useState<number | undefined>();
+  const [hasMore, setHasMore] = useState(false);
+  const [isLoadingEarlier, setIsLoadingEarlier] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  // Earlier messages are added above the ones being read, so they must not scroll down
+  const skipScrollRef = useRef(false);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   };
 
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -38,6 +50,16 @@ export const Chat: React.FC = () => {
     }
   }, []);
 
+  const formatServerMessage = (msg: any): Message => ({
+    id: Date.now() + Math.random(),
+    type: msg.role === "user" ? "user" : "bot",
+    content: msg.content,
+    timestamp: new Date(msg.timestamp),
+    recommendations: msg.response_data?.recommendations,
+    responseType: msg.response_data?.type,
+  });
+
+  // Loads the newest page of history; older pages come from loadEarlierMessages
   const loadChatHistory = async (sid: string) => {
     try {
       const history = await chatService.getChatHistory(sid);
@@ -45,26 +67,46 @@ export const Chat: React.FC = () => {
         setMessages([initialMessage]);
         return;
       }
-      const formattedMessages: Message[] = history.messages.map((msg: any) => ({
-        id: Date.now() + Math.random(),
-        type: msg.role === "user" ? "user" : "bot",
-        content: msg.content,
-        timestamp: new Date(msg.timestamp),
-        recommendations: msg.response_data?.recommendations,
-        responseType: msg.response_data?.type,
-      }));
-      setMessages(formattedMessages);
+      setMessages(history.messages.map(formatServerMessage));
+      setLastMessageId(history.last_message_id);
+      setOldestMessageId(history.messages[0]?.id);
+      setHasMore(!!history.has_more);
     } catch (error: any) {
       console.error("Error loading chat history:", error);
       // If session not found (404), clear the stored session ID and start fresh
       if (error.response?.status === 404) {
         localStorage.removeItem("chatSessionId");
         setSessionId(null);
+        setLastMessageId(undefined);
+        setOldestMessageId(undefined);
+        setHasMore(false);
         setMessages([initialMessage]);
       }
     }
   };
 
+  const loadEarlierMessages = async () => {
+    if (!sessionId || !oldestMessageId || isLoadingEarlier) return;
+    setIsLoadingEarlier(true);
+    try {
+      const history = await chatService.getChatHistory(
+        sessionId,
+        oldestMessageId
+      );
+      const earlier = history.messages || [];
+      skipScrollRef.current = earlier.length > 0;
+      setMessages((prev) => [...earlier.map(formatServerMessage), ...prev]);
+      if (earlier.length > 0) {
+        setOldestMessageId(earlier[0].id);
+      }
+      setHasMore(!!history.has_more && earlier.length > 0);
+    } catch (error) {
+      console.error("Error loading earlier messages:", error);
+    } finally {
+      setIsLoadingEarlier(false);
+    }
+  };
+
   const handleSendMessage = async () => {
     if (!inputValue.trim()) return;
 
@@ -79,10 +121,48 @@ export const Chat: React.FC = () => {
     setInputValue("");
     setIsTyping(true);
 
+    // Placeholder bot message filled in as the response streams
+    const streamingId = Date.now() + 1;
+    const updateStreamingMessage = (update: Partial<Message>) => {
+      setIsTyping(false);
+      setMessages((prev) => {
+        const exists = prev.some((msg) => msg.id === streamingId);
+        if (!exists) {
+          return [
+            ...prev,
+            {
+              id: streamingId,
+              type: "bot",
+              content: "",
+              timestamp: new Date(),
+              ...update,
+            },
+          ];
+        }
+        return prev.map((msg) =>
+          msg.id === streamingId ? { ...msg, ...update } : msg
+        );
+      });
+    };
+    let streamedContent = "";
+
     try {
-      const response = await chatService.processMessage(
+      const response = await chatService.streamMessage(
         inputValue,
-        sessionId || undefined
+        sessionId || undefined,
+        {
+          onProducts: ({ recommendations }) =>
+            updateStreamingMessage({
+              recommendations,
+              responseType: "recommendation",
+            }),
+          onToken: (text) => {
+            streamedContent += text;
+            updateStreamingMessage({ content: streamedContent });
+          },
+        },
+        undefined,
+        sessionId ? lastMessageId : undefined
       );
 
       // Save session ID if this is a new session
@@ -91,19 +171,16 @@ export const Chat: React.FC = () => {
         localStorage.setItem("chatSessionId", response.session_id);
       }
 
-      // Update messages with full history from response
+      // Replace the local user message and placeholder with the new messages from the server
       if (response.messages) {
-        const formattedMessages: Message[] = response.messages.map(
-          (msg: any) => ({
-            id: msg.id || Date.now() + Math.random(),
-            type: msg.role === "user" ? "user" : "bot",
-            content: msg.content,
-            timestamp: new Date(msg.timestamp),
-            recommendations: msg.response_data?.recommendations,
-            responseType: msg.response_data?.type,
-          })
-        );
-        setMessages(formattedMessages);
+        const newMessages: Message[] = response.messages.map(formatServerMessage);
+        setMessages((prev) => [
+          ...prev.filter(
+            (msg) => msg.id !== userMessage.id && msg.id !== streamingId
+          ),
+          ...newMessages,
+        ]);
+        setLastMessageId(response.last_message_id);
       } else {
         // Fallback to just adding the bot message if no history is provided
         const botMessage: Message = {
@@ -118,7 +195,10 @@ export const Chat: React.FC = () => {
           recommendations: response.recommendations,
           responseType: response.type,
         };
-        setMessages((prev) => [...prev, botMessage]);
+        setMessages((prev) => [
+          ...prev.filter((msg) => msg.id !== streamingId),
+          botMessage,
+        ]);
       }
     } catch (error) {
       console.error("Error processing message:", error);
@@ -129,7 +209,10 @@ export const Chat: React.FC = () => {
           "Sorry, I had a little hiccup! Can you tell me again what you're looking for? 😊",
         timestamp: new Date(),
       };
-      setMessages((prev) => [...prev, errorMessage]);
+      setMessages((prev) => [
+        ...prev.filter((msg) => msg.id !== streamingId),
+        errorMessage,
+      ]);
     } finally {
       setIsTyping(false);
     }
@@ -143,6 +226,18 @@ export const Chat: React.FC = () => {
       <div className="max-w-4xl mx-auto p-4 h-[calc(100vh-140px)] flex flex-col">
         {/* Messages */}
         <div className="flex-1 overflow-y-auto space-y-4 mb-4">
+          {hasMore && (
+            <div className="flex justify-center">
+              <button
+                onClick={loadEarlierMessages}
+                disabled={isLoadingEarlier}
+                className="px-3 py-1.5 bg-gray-100 hover:bg-gray-200 text-gray-700 text-xs rounded-full transition-colors disabled:opacity-50"
+              >
+                {isLoadingEarlier ? "Loading..." : "Load earlier messages"}
+              </button>
+            </div>
+          )}
+
           {messages.map((message) => (
             <MessageComponent key={message.id} message={message} />
           ))}
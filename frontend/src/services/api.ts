@@ -1,5 +1,5 @@
 import axios from "axios";
-import { ChatResponse } from "@/types";
+import { ChatResponse, StreamHandlers } from "@/types";
 
 const api = axios.create({
   baseURL:
@@ -15,13 +15,15 @@ export const chatService = {
   async processMessage(
     message: string,
     sessionId?: string,
-    currentAttributes?: Record<string, any>
+    currentAttributes?: Record<string, any>,
+    lastMessageId?: number
   ): Promise<ChatResponse> {
     try {
       const response = await api.post<ChatResponse>("/chat", {
         message,
         session_id: sessionId,
         current_attributes: currentAttributes,
+        last_message_id: lastMessageId,
       });
       console.log("chat response: processMessage", response.data);
       return response.data;
@@ -31,9 +33,92 @@ export const chatService = {
     }
   },
 
-  async getChatHistory(sessionId: string): Promise<ChatResponse> {
+  // Streams /chat/stream (Server-Sent Events) and resolves with the final response
+  async streamMessage(
+    message: string,
+    sessionId: string | undefined,
+    handlers: StreamHandlers,
+    currentAttributes?: Record<string, any>,
+    lastMessageId?: number
+  ): Promise<ChatResponse> {
+    const response = await fetch(`${api.defaults.baseURL ?? ""}/chat/stream`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        message,
+        session_id: sessionId,
+        current_attributes: currentAttributes,
+        last_message_id: lastMessageId,
+      }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Chat stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let finalResponse: ChatResponse | null = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf("\n\n");
+
+        let event = "message";
+        let data = "";
+        for (const line of rawEvent.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        }
+        if (!data) continue;
+        const payload = JSON.parse(data);
+
+        switch (event) {
+          case "session":
+            handlers.onSession?.(payload.session_id);
+            break;
+          case "attributes":
+            handlers.onAttributes?.(payload);
+            break;
+          case "products":
+            handlers.onProducts?.(payload);
+            break;
+          case "token":
+            handlers.onToken?.(payload.text);
+            break;
+          case "done":
+            finalResponse = payload;
+            break;
+          case "error":
+            throw new Error(payload.detail);
+        }
+      }
+    }
+
+    if (!finalResponse) {
+      throw new Error("Chat stream ended without a response");
+    }
+    console.log("chat response: streamMessage", finalResponse);
+    return finalResponse;
+  },
+
+  // Returns the newest page of history; pass before to load older messages
+  async getChatHistory(
+    sessionId: string,
+    before?: number,
+    limit?: number
+  ): Promise<ChatResponse> {
     try {
-      const response = await api.get<ChatResponse>(`/chat/${sessionId}`);
+      const response = await api.get<ChatResponse>(`/chat/${sessionId}`, {
+        params: { before, limit },
+      });
       console.log(response.data);
       return response.data;
     } catch (error) {
@@ -46,9 +46,25 @@ export interface ChatResponse {
     followup_count: number;
   };
   messages?: Array<{
+    id?: number;
     role: string;
     content: string;
     timestamp: string;
     response_data?: any;
   }>;
+  last_message_id?: number;
+  has_more?: boolean;
+}
+
+export interface StreamHandlers {
+  onSession?: (sessionId: string) => void;
+  onAttributes?: (data: {
+    type?: string;
+    attributes: Record<string, any>;
+  }) => void;
+  onProducts?: (data: {
+    recommendations: Product[];
+    is_fallback: boolean;
+  }) => void;
+  onToken?: (text: string) => void;
 }